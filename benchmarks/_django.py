@@ -0,0 +1,48 @@
+"""
+Shared Django bootstrap for the benchmark scripts.
+
+Benchmarks reuse the test settings but point the default database at a
+throwaway SQLite file, so that worker threads share one database.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup(**overrides):
+    """Configure Django from tests.settings, migrate, and return the db path."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+    import django
+    from django.conf import settings
+    from tests import settings as test_settings
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='tictactoe-bench-'), 'bench.sqlite3')
+    options = {
+        name: getattr(test_settings, name)
+        for name in dir(test_settings) if name.isupper()
+    }
+    db_options = {'timeout': 30}
+    if django.VERSION >= (5, 1):
+        # Take the write lock up front so concurrent writers wait instead
+        # of failing with "database is locked" on lock upgrade.
+        db_options['transaction_mode'] = 'IMMEDIATE'
+        db_options['init_command'] = 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;'
+    options['DATABASES'] = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': db_path,
+            'OPTIONS': db_options,
+        }
+    }
+    options.update(overrides)
+    settings.configure(**options)
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
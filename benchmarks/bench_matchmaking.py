@@ -0,0 +1,98 @@
+"""
+Benchmark matchmaking joins per second.
+
+Usage:
+    python benchmarks/bench_matchmaking.py [--backend memory|database]
+                                           [--players N] [--threads T]
+
+Every player joins once, then players left parked keep polling (joining
+again) until their match is delivered, as clients of the API do. N players
+produce N / 2 games. The script checks that no player was paired twice and
+that every player got a match, then reports the join rate, the time until
+every match was delivered and the overall request rate.
+"""
+import argparse
+import threading
+import time
+
+from _django import setup
+
+
+def run(backend_name: str, players: int, threads: int) -> None:
+    from tictactoe.matchmaking import DatabaseQueueBackend, InMemoryQueueBackend
+    from tictactoe.models import Game
+
+    backend_class = {
+        'memory': InMemoryQueueBackend,
+        'database': DatabaseQueueBackend,
+    }[backend_name]
+    backend = backend_class(timeout=3600)
+    keys = [f'bench:{i}' for i in range(players - players % 2)]
+    matches = {}
+    requests = [0]
+    lock = threading.Lock()
+    joined = threading.Barrier(threads + 1)
+
+    def worker(chunk):
+        from django.db import connection
+        local = {}
+        calls = 0
+        for key in chunk:
+            match = backend.join(key)
+            calls += 1
+            if match is not None:
+                local[key] = match
+        joined.wait()
+        # Parked players poll until their match arrives
+        parked = [key for key in chunk if key not in local]
+        while parked:
+            still_parked = []
+            for key in parked:
+                match = backend.join(key)
+                calls += 1
+                if match is not None:
+                    local[key] = match
+                else:
+                    still_parked.append(key)
+            parked = still_parked
+        with lock:
+            for key, match in local.items():
+                matches.setdefault(match.game_id, match)
+            requests[0] += calls
+        connection.close()
+
+    workers = [threading.Thread(target=worker, args=(keys[i::threads],)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    joined.wait()
+    joins_elapsed = time.perf_counter() - start
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    paired = [p for m in matches.values() for p in (m.player_x, m.player_o)]
+    assert len(paired) == len(set(paired)), 'player paired twice'
+    assert set(paired) == set(keys), 'player never matched'
+    assert Game.objects.count() == len(matches)
+
+    print(f'backend={backend_name} players={len(keys)} threads={threads}')
+    print(f'  pairings:   {len(matches)}')
+    print(f'  joins/s:    {len(keys) / joins_elapsed:,.0f} (first join of every player)')
+    print(f'  delivered:  {elapsed:.3f}s until every player had their match')
+    print(f'  requests/s: {requests[0] / elapsed:,.0f} ({requests[0]} joins including polls)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backend', choices=['memory', 'database'], default='memory')
+    parser.add_argument('--players', type=int, default=10000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    setup()
+    run(args.backend, args.players, args.threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark import and django.setup() time with tictactoe installed.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N]
+
+Every run starts a fresh interpreter and reports the median of each phase:
+configuring settings, django.setup() (which imports tictactoe.models),
+and loading the URLconf. Two scenarios are measured:
+
+    models  -- tictactoe without DRF, HTML URLs only (tictactoe.html_urls)
+    full    -- DRF installed, API and HTML URLs (tictactoe.urls)
+
+"drf" shows whether rest_framework ended up in sys.modules; it should stay
+"no" for the models scenario.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from django.conf import settings
+settings.configure(
+    INSTALLED_APPS={apps!r},
+    DATABASES={{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}}},
+    ROOT_URLCONF={urlconf!r},
+    USE_TZ=True,
+)
+import django
+configured = time.perf_counter()
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+print(json.dumps({{
+    'configure': configured - start,
+    'setup': setup_done - configured,
+    'urls': urls_done - setup_done,
+    'total': urls_done - start,
+    'drf': 'rest_framework' in sys.modules,
+}}))
+'''
+
+BASE_APPS = ['django.contrib.contenttypes', 'django.contrib.auth', 'tictactoe']
+
+SCENARIOS = {
+    'models': (BASE_APPS, 'tictactoe.html_urls'),
+    'full': (BASE_APPS[:-1] + ['rest_framework', 'tictactoe'], 'tictactoe.urls'),
+}
+
+
+def probe(apps, urlconf):
+    code = PROBE.format(apps=apps, urlconf=urlconf)
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    phases = ('configure', 'setup', 'urls', 'total')
+    print(f'runs={args.runs} (median ms per phase)')
+    for name, (apps, urlconf) in SCENARIOS.items():
+        results = [probe(apps, urlconf) for _ in range(args.runs)]
+        medians = {
+            phase: statistics.median(result[phase] for result in results) * 1000
+            for phase in phases
+        }
+        drf = 'yes' if any(result['drf'] for result in results) else 'no'
+        columns = '  '.join(f'{phase}={medians[phase]:7.1f}' for phase in phases)
+        print(f'  {name:7} {columns}  drf={drf}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark template render time with the fragment cache cold and warm.
+
+Usage:
+    python benchmarks/bench_templates.py [--games N] [--iterations I]
+
+"cold" clears the cache before every render, "warm" renders from a
+populated cache, and "off" runs with fragment caching disabled. The game
+page has no cached fragment, and is timed for comparison: its board
+renders faster than a cache round trip.
+"""
+import argparse
+import time
+
+from _django import setup
+
+
+def timed(render, iterations, before=None):
+    total = 0.0
+    for _ in range(iterations):
+        if before:
+            before()
+        start = time.perf_counter()
+        render()
+        total += time.perf_counter() - start
+    return total / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from django.core.cache import cache
+    from django.test import RequestFactory, override_settings
+    from tictactoe import views
+    from tictactoe.models import Game
+
+    Game.objects.bulk_create(Game(board=[None] * 9) for _ in range(args.games))
+    game = Game.objects.first()
+    for position in (0, 4, 8):
+        game.make_move(position)
+
+    factory = RequestFactory()
+
+    def render_list():
+        return views.game_list(factory.get('/'))
+
+    def render_detail():
+        return views.game_detail(factory.get('/'), pk=game.pk)
+
+    print(f'games={args.games} iterations={args.iterations} (ms per render)')
+    with override_settings(TICTACTOE_TEMPLATE_CACHE_TIMEOUT=None):
+        off = timed(render_list, args.iterations)
+    with override_settings(TICTACTOE_TEMPLATE_CACHE_TIMEOUT=300):
+        cold = timed(render_list, args.iterations, before=cache.clear)
+        render_list()
+        warm = timed(render_list, args.iterations)
+    print(f'  {"game_list":12} off={off:8.3f}  cold={cold:8.3f}  warm={warm:8.3f}')
+    print(f'  {"game_detail":12} off={timed(render_detail, args.iterations):8.3f}  (not cached)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark the per-request cost of the API throttles.
+
+Usage:
+    python benchmarks/bench_throttle.py [--requests N] [--clients C]
+
+Each scenario calls ``allow_request`` N times for C distinct clients
+against a bucket that never runs dry, and reports microseconds per call:
+
+    buckets       -- ClientRateThrottle, counters synced every second
+    buckets-sync  -- ClientRateThrottle, synced every 10 ms
+    rejected      -- ClientRateThrottle on an exhausted bucket (load shedding)
+    drf           -- DRF's AnonRateThrottle, a cache read and write per call
+
+The cache is Django's local-memory backend, so "drf" is a lower bound; a
+networked cache adds a round trip per request to it and, for the bucket
+throttles, once per sync interval.
+"""
+import argparse
+import time
+
+from _django import setup
+
+
+def timed(throttle, requests, view, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        throttle.allow_request(requests[i % len(requests)], view)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--clients', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'anon': '1000000000/day'}})
+    from django.test import override_settings
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.throttling import AnonRateThrottle
+    from tictactoe.throttling import ClientRateThrottle, buckets
+
+    factory = APIRequestFactory()
+    requests = [
+        Request(factory.post('/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}'))
+        for i in range(args.clients)
+    ]
+    for request in requests:
+        request.user = None
+
+    class View:
+        action = 'move'
+        basename = 'game'
+        kwargs = {}
+
+    unlimited = {'move': '1000000000/s'}
+    print(f'requests={args.requests} clients={args.clients} (microseconds per request)')
+    for name, rates, interval in [('buckets', unlimited, 1.0), ('buckets-sync', unlimited, 0.01),
+                                  ('rejected', {'move': '1/day'}, 1.0)]:
+        with override_settings(TICTACTOE_THROTTLE_RATES=rates, TICTACTOE_THROTTLE_SYNC_INTERVAL=interval):
+            throttle = ClientRateThrottle()
+            timed(throttle, requests, View, args.clients)  # create the buckets
+            print(f'  {name:13} {timed(throttle, requests, View, args.requests):8.2f}')
+            buckets.clear()
+
+    throttle = AnonRateThrottle()
+    print(f'  {"drf":13} {timed(throttle, requests, View, args.requests):8.2f}')
+
+
+if __name__ == '__main__':
+    main()
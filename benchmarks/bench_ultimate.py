@@ -0,0 +1,57 @@
+"""
+Benchmark the ultimate tic-tac-toe engine in moves per second.
+
+Usage:
+    python benchmarks/bench_ultimate.py [--depth D] [--games N]
+
+"perft" walks the full move tree to depth D from the empty position and
+reports leaf positions per second (the last ply is counted, not played);
+"playouts" plays N random games to the end and reports moves per second.
+Neither touches the database.
+"""
+import argparse
+import random
+import sys
+import time
+
+from _django import ROOT
+
+sys.path.insert(0, str(ROOT))
+from tictactoe import ultimate  # noqa: E402
+
+
+def playouts(games, rng):
+    moves = 0
+    for _ in range(games):
+        state = ultimate.State()
+        while True:
+            legal = list(ultimate.iter_cells(ultimate.legal_mask(state)))
+            if not legal:
+                break
+            state = ultimate.play(state, rng.choice(legal))
+            moves += 1
+    return moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    leaves = ultimate.perft(ultimate.State(), args.depth)
+    elapsed = time.perf_counter() - start
+    print(f'perft depth={args.depth} leaves={leaves} '
+          f'{leaves / elapsed:12,.0f} leaves/s ({elapsed:.2f}s)')
+
+    start = time.perf_counter()
+    moves = playouts(args.games, random.Random(args.seed))
+    elapsed = time.perf_counter() - start
+    print(f'playouts games={args.games} moves={moves} '
+          f'{moves / elapsed:12,.0f} moves/s ({elapsed:.2f}s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -16,7 +16,7 @@ setup(
     long_description=long_description,
     long_description_content_type='text/markdown',
     url='https://github.com/nestorwheelock/django-tictactoe',
-    packages=find_packages(exclude=['tests', 'tests.*', 'planning', 'planning.*']),
+    packages=find_packages(exclude=['tests', 'tests.*', 'planning', 'planning.*', 'benchmarks', 'benchmarks.*']),
     include_package_data=True,
     install_requires=requirements,
     python_requires='>=3.8',
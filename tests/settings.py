@@ -18,7 +18,21 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
-    }
+    },
+    # Stands in for a read replica in the routing tests (tictactoe.routers).
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    # Game shards for the sharding tests (tictactoe.sharding).
+    'shard0': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    'shard1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
 }
 
 ROOT_URLCONF = 'tests.urls'
@@ -47,3 +61,6 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.JSONParser',
     ],
 }
+
+# Run post-game task handlers inline (see tictactoe.tasks).
+TICTACTOE_TASKS_SYNC = True
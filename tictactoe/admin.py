@@ -1,19 +1,120 @@
-from django.contrib import admin
-from .models import Game
+from datetime import timedelta
+
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .bulk import chunked_delete, chunked_pks, chunked_update
+from .cache import bump_list_version
+from .conf import get_setting
+from .hotstore import discard, get_store
+from .models import Game, PlayerStats
+from .sharding import public_id_from
+from .signals import game_finished
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for an unfiltered queryset.
+
+    Returns None when the queryset is filtered or the database has no
+    cheap estimate, in which case callers should fall back to COUNT(*).
+    """
+    if queryset.query.where:
+        return None
+
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    elif connection.vendor == 'mysql':
+        sql = (
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s'
+        )
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that skips COUNT(*) on large unfiltered tables."""
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate > get_setting('ADMIN_ESTIMATED_COUNT_THRESHOLD'):
+            return estimate
+        return super().count
+
+
+class CreatedAtFilter(admin.SimpleListFilter):
+    """
+    Fixed creation-date ranges.
+
+    Unlike the default date filter, building the options runs no query,
+    and each option is a range scan on the created_at index.
+    """
+
+    title = 'created'
+    parameter_name = 'created'
+
+    RANGES = {
+        'today': 1,
+        'week': 7,
+        'month': 30,
+    }
+
+    def lookups(self, request, model_admin):
+        return (
+            ('today', 'Last 24 hours'),
+            ('week', 'Past 7 days'),
+            ('month', 'Past 30 days'),
+        )
+
+    def queryset(self, request, queryset):
+        days = self.RANGES.get(self.value())
+        if days is None:
+            return queryset
+        return queryset.filter(created_at__gte=timezone.now() - timedelta(days=days))
 
 
 @admin.register(Game)
 class GameAdmin(admin.ModelAdmin):
-    """Django admin configuration for Game model."""
+    """
+    Django admin configuration for Game model.
+
+    Tuned for very large tables: exact lookups instead of substring
+    search, no full-table counts, and bulk actions that run as chunked
+    UPDATE/DELETE statements instead of loading every selected object.
+    """
 
-    list_display = ('id', 'status', 'current_player', 'created_at', 'updated_at')
-    list_filter = ('status', 'current_player', 'created_at')
-    search_fields = ('id', 'status')
+    list_display = ('id', 'status', 'current_player', 'is_archived', 'created_at', 'updated_at')
+    # Each filter is served by an index that leads with its column
+    list_filter = ('status', 'is_archived', CreatedAtFilter)
+    search_fields = ('=id',)
+    search_help_text = 'Search by exact game ID or status.'
     readonly_fields = ('created_at', 'updated_at', 'board_display')
+    raw_id_fields = ('player_x', 'player_o')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('archive_games', 'force_finish_games', 'delete_finished_games')
 
     fieldsets = (
         ('Game State', {
-            'fields': ('status', 'current_player', 'board')
+            'fields': ('status', 'current_player', 'board', 'is_archived')
+        }),
+        ('Players', {
+            'fields': ('player_x', 'player_o')
         }),
         ('Display', {
             'fields': ('board_display',),
@@ -25,8 +126,101 @@ class GameAdmin(admin.ModelAdmin):
         }),
     )
 
+    if hasattr(admin, 'ShowFacets'):
+        show_facets = admin.ShowFacets.NEVER
+
+    def get_actions(self, request):
+        """Drop delete_selected, which loads every selected object."""
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match an exact game ID, or a status value or label."""
+        term = search_term.strip().lstrip('#')
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            return queryset.filter(pk=int(term)), False
+
+        term = term.lower()
+        statuses = [
+            value for value, label in Game.STATUS_CHOICES
+            if term in (value, label.lower())
+        ]
+        if statuses:
+            return queryset.filter(status__in=statuses), False
+        return queryset.none(), False
+
     def board_display(self, obj):
         """Display formatted board in admin."""
         return obj.get_board_display()
 
     board_display.short_description = 'Board Visualization'
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        discard(obj.public_id)
+
+    def delete_model(self, request, obj):
+        public_id = obj.public_id
+        super().delete_model(request, obj)
+        discard(public_id)
+
+    def hot_game_ids(self, queryset):
+        """Public IDs of the games in ``queryset``, if a hot store may hold copies of them."""
+        if get_store() is None:
+            return []
+        return [
+            public_id_from(queryset.db, pk)
+            for chunk in chunked_pks(queryset) for pk in chunk
+        ]
+
+    @admin.action(description='Archive selected games')
+    def archive_games(self, request, queryset):
+        queryset = queryset.filter(is_archived=False)
+        game_ids = self.hot_game_ids(queryset)
+        count = chunked_update(queryset, is_archived=True, version=F('version') + 1)
+        for game_id in game_ids:
+            discard(game_id)
+        bump_list_version()
+        self.message_user(request, f'Archived {count} games.', messages.SUCCESS)
+
+    @admin.action(description='Force-finish selected games as a draw')
+    def force_finish_games(self, request, queryset):
+        queryset = queryset.filter(status=Game.STATUS_IN_PROGRESS)
+        game_ids = self.hot_game_ids(queryset)
+        manager = Game._base_manager.db_manager(queryset.db)
+        count = 0
+        for chunk in chunked_pks(queryset):
+            # Like the move clock, finish each chunk and send game_finished
+            # in one transaction so PlayerStats record the draws.
+            with transaction.atomic(using=queryset.db):
+                games = list(manager.select_for_update().filter(
+                    pk__in=chunk, status=Game.STATUS_IN_PROGRESS,
+                ).only('pk'))
+                manager.filter(pk__in=[game.pk for game in games]).update(
+                    status=Game.STATUS_DRAW, version=F('version') + 1,
+                )
+                for game in games:
+                    game.status = Game.STATUS_DRAW
+                    game_finished.send(sender=Game, game=game)
+            count += len(games)
+        for game_id in game_ids:
+            discard(game_id)
+        bump_list_version()
+        self.message_user(request, f'Finished {count} games.', messages.SUCCESS)
+
+    @admin.action(description='Delete selected finished games')
+    def delete_finished_games(self, request, queryset):
+        count = chunked_delete(queryset.exclude(status=Game.STATUS_IN_PROGRESS))
+        bump_list_version()
+        self.message_user(request, f'Deleted {count} finished games.', messages.SUCCESS)
+
+
+@admin.register(PlayerStats)
+class PlayerStatsAdmin(admin.ModelAdmin):
+    """Django admin configuration for PlayerStats model."""
+
+    list_display = ('user', 'wins', 'losses', 'draws')
+    raw_id_fields = ('user',)
@@ -0,0 +1,458 @@
+"""
+REST API viewsets.
+
+Kept apart from the template views so that projects which only use the
+models or the HTML pages never import Django REST framework.
+"""
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from .conf import get_setting
+from .hotstore import discard, get_store, play_move, undo_move, with_hot_copies
+from .idempotency import idempotent
+from .matchmaking import USER_KEY_PREFIX, get_backend
+from .models import Game, UltimateGame
+from .pagination import PlayerGamesPagination
+from .renderers import CompactJSONRenderer
+from .routers import ReplicaRoutingMixin
+from .serializers import (
+    BulkIdsSerializer, GameSerializer, MoveSerializer, GameDetailSerializer, MatchmakingJoinSerializer,
+    PlayerSerializer, TimeControlSerializer, UltimateGameSerializer, UltimateMoveSerializer,
+)
+from .sharding import create_game, get_game, get_games, recent_games, shard_aliases
+from .throttling import ClientRateThrottle, GameRateThrottle
+from .views import get_game_or_404, player_games
+
+# Project throttles plus the token buckets configured by TICTACTOE_*THROTTLE_RATES
+THROTTLE_CLASSES = [*api_settings.DEFAULT_THROTTLE_CLASSES, ClientRateThrottle, GameRateThrottle]
+
+
+def game_etag(game) -> str:
+    """Entity tag of one game's current state, as sent by the bulk endpoint."""
+    return f'"{game.public_id}:{game.version}"'
+
+
+def is_not_modified(game, etags, modified_since) -> bool:
+    """Apply If-None-Match, or failing that If-Modified-Since, to one game."""
+    if etags:
+        return '*' in etags or game_etag(game) in etags
+    if modified_since is not None:
+        return int(game.updated_at.timestamp()) <= modified_since
+    return False
+
+
+class GameViewSet(ReplicaRoutingMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for Game model.
+
+    Provides CRUD operations plus custom 'move' action.
+    """
+
+    queryset = Game.objects.all()
+    serializer_class = GameSerializer
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CompactJSONRenderer]
+    throttle_classes = THROTTLE_CLASSES
+    replica_actions = ReplicaRoutingMixin.replica_actions + ('bulk',)
+    pinning_actions = ReplicaRoutingMixin.pinning_actions + ('move', 'undo')
+    # Actions whose queryset is narrowed to the columns named in ?fields=
+    sparse_actions = ('list', 'retrieve', 'bulk')
+
+    def get_serializer_class(self):
+        """Use detailed serializer for retrieve action."""
+        if self.action == 'retrieve':
+            return GameDetailSerializer
+        return GameSerializer
+
+    def get_queryset(self):
+        """Hide archived games from the list; select only the columns needed for ?fields=."""
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Archived games stay reachable by ID but leave the listing
+            queryset = queryset.filter(is_archived=False)
+        fields = GameSerializer.requested_fields(self.request)
+        if fields and self.action in self.sparse_actions:
+            columns = self.get_serializer_class().columns_for(fields)
+            if self.action == 'bulk':
+                # Needed for the per-game validators
+                columns += ['version', 'updated_at']
+            if self.action == 'retrieve' and 'ply' in self.request.query_params:
+                columns += ['history']
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def get_object(self):
+        """Look the game up on its shard by public ID."""
+        game = get_game_or_404(self.kwargs[self.lookup_field], self.get_queryset())
+        self.check_object_permissions(self.request, game)
+        return game
+
+    def list(self, request, *args, **kwargs):
+        """
+        List games that are not archived.
+
+        When sharded, returns the newest TICTACTOE_SHARD_LIST_LIMIT games
+        merged across shards. Games held by the hot store are listed as
+        their hot copies.
+        """
+        if shard_aliases():
+            games = recent_games(get_setting('SHARD_LIST_LIMIT'))
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(with_hot_copies(page), many=True)
+                return self.get_paginated_response(serializer.data)
+            games = queryset
+        return Response(self.get_serializer(with_hot_copies(games), many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve a game, optionally as it stood earlier.
+
+        GET /api/games/{id}/?ply=N returns the game after its first N moves.
+        """
+        game = self.get_object()
+        ply = request.query_params.get('ply')
+        if ply is not None:
+            try:
+                # Anything but a plain number is out of range
+                game = game.at_ply(int(ply) if ply.isdigit() else -1)
+            except ValueError as e:
+                return Response(
+                    {'error': {'ply': [str(e)]}},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(self.get_serializer(game).data)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """
+        Create a new game.
+
+        POST /api/games/
+        Body (optional): {"move_time_limit": <seconds per move>}
+        Header (optional): Idempotency-Key, to replay the first response on retries
+        """
+        time_control = TimeControlSerializer(data=request.data)
+        if not time_control.is_valid():
+            return Response(
+                {'error': time_control.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Build the response serializer first so an unknown ?fields= name
+        # is rejected before a game is created.
+        serializer = self.get_serializer()
+        serializer.instance = create_game(**time_control.validated_data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        discard(serializer.instance.public_id)
+
+    def perform_destroy(self, instance):
+        public_id = instance.public_id
+        instance.delete()
+        discard(public_id)
+
+    @action(detail=False, methods=['get', 'post'])
+    def bulk(self, request):
+        """
+        Retrieve many games in one request.
+
+        GET /api/games/bulk/?ids=1,2,3
+        POST /api/games/bulk/  Body: {"ids": [1, 2, 3]}
+
+        Returns a map from game ID to game. Each game has an extra "etag".
+        IDs with no game map to {"missing": true}. Games matched by
+        If-None-Match (a list of those etags), or not updated since
+        If-Modified-Since, map to {"not_modified": true}.
+
+        Returns:
+            200: The map of games
+            304: Every requested game exists and is unchanged
+            400: No ids, malformed ids, or more than TICTACTOE_BULK_MAX_IDS
+        """
+        if request.method == 'GET':
+            raw_ids = request.query_params.get('ids', '')
+            data = {'ids': [value.strip() for value in raw_ids.split(',') if value.strip()]}
+        else:
+            data = request.data
+        ids_serializer = BulkIdsSerializer(data=data)
+        if not ids_serializer.is_valid():
+            return Response(
+                {'error': ids_serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ids = ids_serializer.validated_data['ids']
+
+        games = get_games(ids, self.get_queryset())
+        games = dict(zip(games, with_hot_copies(games.values())))
+        etags = parse_etags(request.headers.get('If-None-Match', ''))
+        modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        changed = [
+            game for game in games.values()
+            if not is_not_modified(game, etags, modified_since)
+        ]
+        if len(games) == len(ids) and not changed:
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        serialized = dict(zip(
+            (game.public_id for game in changed),
+            self.get_serializer(changed, many=True).data,
+        ))
+        result = {}
+        for game_id in ids:
+            game = games.get(game_id)
+            if game is None:
+                result[str(game_id)] = {'missing': True}
+            elif game_id in serialized:
+                result[str(game_id)] = {**serialized[game_id], 'etag': game_etag(game)}
+            else:
+                result[str(game_id)] = {'not_modified': True}
+
+        response = Response(result, status=status.HTTP_200_OK)
+        if games:
+            last_modified = max(game.updated_at for game in games.values())
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    @action(detail=True, methods=['post'])
+    @idempotent
+    def move(self, request, pk=None):
+        """
+        Make a move in the game.
+
+        POST /api/games/{id}/move/
+        Body: {"position": 0-8}
+        Header (optional): Idempotency-Key, to replay the first response on retries
+
+        Returns:
+            200: Move successful, returns updated game state
+            400: Invalid move (occupied, out of turn, game over)
+            404: Game not found
+        """
+        # With a hot store this is the hot copy, if any, and only checks
+        # permissions; play_move loads the game again under its lock
+        game = self.get_object()
+        hot = get_store() is not None
+        serializer = MoveSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {'error': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        position = serializer.validated_data['position']
+
+        try:
+            if hot:
+                game = play_move(game.public_id, position)
+                message = 'Move successful'
+            else:
+                message = game.make_move(position)['message']
+            game_serializer = self.get_serializer(game)
+            return Response({
+                **game_serializer.data,
+                'message': message
+            }, status=status.HTTP_200_OK)
+
+        except Game.DoesNotExist:
+            raise Http404("No game matches the given query.")
+        except DjangoValidationError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=True, methods=['post'])
+    @idempotent
+    def undo(self, request, pk=None):
+        """
+        Take back the last move.
+
+        POST /api/games/{id}/undo/
+        Header (optional): Idempotency-Key, so a retry does not undo twice
+
+        Returns:
+            200: Move undone, returns updated game state
+            400: No moves to undo, or the result is already recorded
+            404: Game not found
+        """
+        game = self.get_object()
+        try:
+            if get_store() is not None:
+                game = undo_move(game.public_id)
+            else:
+                game.undo()
+                game.save()
+        except Game.DoesNotExist:
+            raise Http404("No game matches the given query.")
+        except DjangoValidationError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            **self.get_serializer(game).data,
+            'message': 'Move undone'
+        }, status=status.HTTP_200_OK)
+
+
+class UltimateGameViewSet(ReplicaRoutingMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                          mixins.ListModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet for ultimate tic-tac-toe games.
+
+    Games are created empty; moves go through the 'move' action.
+    """
+
+    queryset = UltimateGame.objects.all()
+    serializer_class = UltimateGameSerializer
+    throttle_classes = THROTTLE_CLASSES
+    pinning_actions = ReplicaRoutingMixin.pinning_actions + ('move',)
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """
+        Make a move in the game.
+
+        POST /api/ultimate-games/{id}/move/
+        Body: {"board": 0-8, "position": 0-8}
+
+        Returns:
+            200: Move successful, returns updated game state
+            400: Invalid move (occupied, wrong board, game over)
+            404: Game not found
+        """
+        game = self.get_object()
+        serializer = UltimateMoveSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {'error': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = game.make_move(
+                serializer.validated_data['board'], serializer.validated_data['position']
+            )
+        except DjangoValidationError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            **self.get_serializer(game).data,
+            'message': result['message']
+        }, status=status.HTTP_200_OK)
+
+
+class MatchmakingViewSet(ReplicaRoutingMixin, viewsets.ViewSet):
+    """
+    ViewSet for the matchmaking queue.
+
+    Authenticated users are queued under their user id; anonymous clients
+    must send a ``player`` key of their choosing.
+    """
+
+    throttle_classes = THROTTLE_CLASSES
+    replica_actions = ()
+    pinning_actions = ('join',)
+
+    def get_player_key(self, request):
+        """Return the queue key for the caller, or None if unidentified."""
+        if request.user.is_authenticated:
+            return f'{USER_KEY_PREFIX}{request.user.pk}'
+        serializer = MatchmakingJoinSerializer(data=request.data)
+        if serializer.is_valid() and serializer.validated_data.get('player'):
+            return f'anon:{serializer.validated_data["player"]}'
+        return None
+
+    @action(detail=False, methods=['post'])
+    def join(self, request):
+        """
+        Join the queue, or poll an earlier join.
+
+        POST /api/matchmaking/join/
+        Body: {"player": "<key>"} (anonymous clients only)
+
+        Returns:
+            200: Paired, returns the game and the caller's mark
+            202: Parked in the queue; call join again to check for a match
+            400: Caller could not be identified
+        """
+        player = self.get_player_key(request)
+        if player is None:
+            return Response(
+                {'error': 'A player key is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        backend = get_backend()
+        match = backend.join(player)
+        if match is None:
+            return Response(
+                {'status': 'waiting', 'timeout': backend.timeout},
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        game = get_game(match.game_id)
+        return Response({
+            'status': 'matched',
+            'player': match.symbol_for(player),
+            'game': GameSerializer(game).data,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def leave(self, request):
+        """
+        Leave the queue.
+
+        POST /api/matchmaking/leave/
+        """
+        player = self.get_player_key(request)
+        if player is None:
+            return Response(
+                {'error': 'A player key is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        get_backend().leave(player)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PlayerViewSet(ReplicaRoutingMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet for player profiles.
+
+    Provides the player's record plus a 'games' action with their history.
+    """
+
+    serializer_class = PlayerSerializer
+    replica_actions = ('retrieve', 'games')
+
+    def get_queryset(self):
+        return get_user_model().objects.select_related('tictactoe_stats')
+
+    @action(detail=True, methods=['get'], pagination_class=PlayerGamesPagination)
+    def games(self, request, pk=None):
+        """
+        List a player's games, newest first.
+
+        GET /api/players/{id}/games/?cursor=<cursor>
+
+        Returns:
+            200: A page of games with 'next'/'previous' cursor links
+            404: Player not found
+        """
+        player = self.get_object()
+        page = self.paginate_queryset(player_games(player))
+        serializer = GameSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,16 @@
+"""
+REST API URLs.
+
+Included by ``tictactoe.urls`` under ``api/``. Projects that only want the
+API can include this module on its own.
+"""
+from rest_framework.routers import DefaultRouter
+from . import api
+
+router = DefaultRouter()
+router.register(r'games', api.GameViewSet, basename='game')
+router.register(r'ultimate-games', api.UltimateGameViewSet, basename='ultimate-game')
+router.register(r'matchmaking', api.MatchmakingViewSet, basename='matchmaking')
+router.register(r'players', api.PlayerViewSet, basename='player')
+
+urlpatterns = router.urls
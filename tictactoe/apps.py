@@ -5,3 +5,10 @@ class TictactoeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tictactoe'
     verbose_name = 'Tic-Tac-Toe Game'
+
+    def ready(self):
+        from . import tasks  # noqa: F401 -- connects the game_finished receiver
+        from .conf import get_setting
+        if get_setting('CLOCK_THREAD'):
+            from .clock import start_scheduler
+            start_scheduler()
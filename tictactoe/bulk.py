@@ -0,0 +1,46 @@
+"""
+Chunked bulk operations on querysets.
+
+Each chunk is a keyset page of primary keys followed by a single
+``UPDATE``/``DELETE ... WHERE id IN (...)``, so memory and lock time stay
+bounded however many rows the queryset matches.
+"""
+from typing import Iterator, List
+
+from django.db.models import QuerySet
+
+from .conf import get_setting
+
+
+def chunked_pks(queryset: QuerySet, chunk_size: int = None) -> Iterator[List]:
+    """Yield lists of primary keys from ``queryset`` in ascending pk order."""
+    chunk_size = chunk_size or get_setting('BULK_CHUNK_SIZE')
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        page = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]
+
+
+def chunked_update(queryset: QuerySet, chunk_size: int = None, **values) -> int:
+    """Apply ``queryset.update(**values)`` chunk by chunk; return rows updated."""
+    manager = queryset.model._base_manager.db_manager(queryset.db)
+    updated = 0
+    for chunk in chunked_pks(queryset, chunk_size):
+        updated += manager.filter(pk__in=chunk).update(**values)
+    return updated
+
+
+def chunked_delete(queryset: QuerySet, chunk_size: int = None) -> int:
+    """Delete the rows of ``queryset`` chunk by chunk; return rows deleted."""
+    manager = queryset.model._base_manager.db_manager(queryset.db)
+    model_label = queryset.model._meta.label
+    deleted = 0
+    for chunk in chunked_pks(queryset, chunk_size):
+        _, per_model = manager.filter(pk__in=chunk).delete()
+        deleted += per_model.get(model_label, 0)
+    return deleted
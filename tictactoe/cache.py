@@ -0,0 +1,47 @@
+"""
+Version counters for template fragment caching.
+
+Cached fragments are keyed by a version rather than deleted on change:
+each Game carries its own ``version``, and the game list is keyed by a
+global counter stored in the cache. Bumping a version makes the old
+fragments unreachable and lets them age out.
+"""
+import time
+
+from django.core.cache import caches
+
+from .conf import get_setting
+
+LIST_VERSION_KEY = 'tictactoe:game-list:version'
+
+
+def fragment_cache_enabled() -> bool:
+    """Return True if template fragment caching is switched on."""
+    return get_setting('TEMPLATE_CACHE_TIMEOUT') is not None
+
+
+def get_cache():
+    return caches[get_setting('CACHE_ALIAS')]
+
+
+def get_list_version() -> int:
+    """Return the current game list version, initialising it if missing."""
+    cache = get_cache()
+    version = cache.get(LIST_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so that a counter lost to eviction can never
+        # restart at a value whose fragments are still cached.
+        cache.add(LIST_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(LIST_VERSION_KEY)
+    return version
+
+
+def bump_list_version() -> None:
+    """Invalidate cached game list fragments."""
+    if not fragment_cache_enabled():
+        return
+    cache = get_cache()
+    try:
+        cache.incr(LIST_VERSION_KEY)
+    except ValueError:
+        cache.add(LIST_VERSION_KEY, time.time_ns(), None)
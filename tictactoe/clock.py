@@ -0,0 +1,211 @@
+"""
+Move clocks: expire timed games whose current player ran out of time.
+
+A timed game stores the absolute ``move_deadline`` of the player to move.
+``Game.make_move`` refuses a move past it, so a late move is never
+accepted whether or not anything has expired the game yet. The scheduler
+only turns such games into ``timeout`` so that listings and clients see it.
+
+``TimeoutScheduler`` keeps upcoming deadlines in a min-heap:
+
+* ``refill()`` loads the in-progress games whose deadline falls within
+  ``TICTACTOE_CLOCK_HORIZON`` seconds, an index range scan on
+  ``(status, move_deadline)`` on the default database and on every shard.
+  It runs again every half horizon, so the heap never holds more than
+  the deadlines in the next horizon. Games are tracked by public ID,
+  which says which database to expire them on.
+* ``run_pending()`` pops the due entries and expires them in batches:
+  one transaction locks the games still in progress with
+  ``move_deadline <= now``, times them out with one UPDATE and sends
+  ``game_finished`` for each, so post-game tasks run for timeouts too. A
+  game that moved after it was scheduled has a later deadline and is left
+  alone; its new deadline comes in through a later refill.
+* A deadline rescheduled for the same game pushes a second heap entry;
+  ``_deadlines`` remembers the latest one, and popped entries that do not
+  match it are dropped instead of being removed from the heap eagerly.
+* ``run_forever()`` sleeps until the next deadline or refill, whichever
+  is first, so an idle scheduler costs one query per half horizon.
+
+The work is proportional to the games actually expiring rather than to
+the size of the Game table.
+
+No signals are needed for expiry. ``manage.py expire_games --loop`` runs
+in its own process and never sees ``post_save``; it learns deadlines only
+from refills, so a deadline set just after a refill may be expired up to
+half a horizon late. ``start_scheduler()`` (or ``TICTACTOE_CLOCK_THREAD =
+True``) runs the same loop in a thread of the web process and also
+listens to ``post_save`` on ``Game``, which schedules new deadlines at
+once and wakes the loop. The receiver only makes expiry more prompt.
+"""
+import heapq
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .cache import bump_list_version
+from .conf import get_setting
+from .models import Game
+from .sharding import game_aliases, locate, public_id_from
+from .signals import game_finished
+
+logger = logging.getLogger(__name__)
+
+
+class TimeoutScheduler:
+    """Min-heap of move deadlines with batched expiry."""
+
+    def __init__(self, horizon: Optional[float] = None, batch_size: Optional[int] = None):
+        self.horizon = timedelta(seconds=horizon or get_setting('CLOCK_HORIZON'))
+        self.batch_size = batch_size or get_setting('BULK_CHUNK_SIZE')
+        self._heap: List[Tuple] = []
+        # public game ID -> latest known deadline; older heap entries are stale
+        self._deadlines: Dict[int, object] = {}
+        self._next_refill = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, game_id: int, deadline) -> None:
+        """Track ``deadline`` for ``game_id``, replacing any earlier one."""
+        with self._lock:
+            if self._deadlines.get(game_id) == deadline:
+                return
+            self._deadlines[game_id] = deadline
+            heapq.heappush(self._heap, (deadline, game_id))
+        self._wakeup.set()
+
+    def refill(self, now=None) -> None:
+        """Load in-progress games whose deadline falls before now + horizon."""
+        now = now or timezone.now()
+        for alias in game_aliases():
+            upcoming = Game.objects.using(alias).filter(
+                status=Game.STATUS_IN_PROGRESS,
+                move_deadline__lte=now + self.horizon,
+            ).values_list('pk', 'move_deadline')
+            for pk, deadline in upcoming.iterator():
+                self.schedule(public_id_from(alias, pk), deadline)
+        self._next_refill = now + self.horizon / 2
+
+    def run_pending(self, now=None) -> int:
+        """Expire every game whose deadline has passed; return how many."""
+        now = now or timezone.now()
+        if self._next_refill is None or now >= self._next_refill:
+            self.refill(now)
+
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, game_id = heapq.heappop(self._heap)
+                if self._deadlines.get(game_id) == deadline:
+                    del self._deadlines[game_id]
+                    due.append(game_id)
+
+        by_alias = defaultdict(list)
+        for game_id in due:
+            alias, pk = locate(game_id)
+            by_alias[alias or DEFAULT_DB_ALIAS].append(pk)
+
+        expired = 0
+        for alias, pks in by_alias.items():
+            for start in range(0, len(pks), self.batch_size):
+                expired += self._expire(alias, pks[start:start + self.batch_size], now)
+        if expired:
+            bump_list_version()
+        return expired
+
+    def _expire(self, alias: str, pks: List[int], now) -> int:
+        """Time out one batch of due games and send ``game_finished`` for each."""
+        with transaction.atomic(using=alias):
+            # The deadline condition skips games that moved since they
+            # were scheduled; their new deadline arrives via refill().
+            games = list(Game.objects.using(alias).select_for_update().filter(
+                pk__in=pks,
+                status=Game.STATUS_IN_PROGRESS,
+                move_deadline__lte=now,
+            ).only('pk'))
+            if not games:
+                return 0
+            Game.objects.using(alias).filter(pk__in=[game.pk for game in games]).update(
+                status=Game.STATUS_TIMEOUT,
+                move_deadline=None,
+                version=F('version') + 1,
+            )
+            for game in games:
+                game.status = Game.STATUS_TIMEOUT
+                game.move_deadline = None
+                game_finished.send(sender=Game, game=game)
+        return len(games)
+
+    def seconds_until_next(self, now=None) -> float:
+        """Seconds until the next deadline or refill, capped at the horizon."""
+        now = now or timezone.now()
+        candidates = [now + self.horizon]
+        if self._next_refill is not None:
+            candidates.append(self._next_refill)
+        with self._lock:
+            if self._heap:
+                candidates.append(self._heap[0][0])
+        return max((min(candidates) - now).total_seconds(), 0.0)
+
+    def run_forever(self) -> None:
+        """Expire games until ``stop()`` is called."""
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Move clock sweep failed")
+            finally:
+                close_old_connections()
+            self._wakeup.wait(self.seconds_until_next())
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """Run the scheduler in a daemon thread, tracking deadlines as games save."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        post_save.connect(self._game_saved, sender=Game, dispatch_uid=f'tictactoe-clock-{id(self)}')
+        self._thread = threading.Thread(target=self.run_forever, name='tictactoe-clock', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        post_save.disconnect(sender=Game, dispatch_uid=f'tictactoe-clock-{id(self)}')
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _game_saved(self, sender, instance, **kwargs) -> None:
+        if instance.move_deadline is not None and instance.status == Game.STATUS_IN_PROGRESS:
+            self.schedule(instance.public_id, instance.move_deadline)
+
+
+_scheduler: Optional[TimeoutScheduler] = None
+
+
+def start_scheduler() -> TimeoutScheduler:
+    """Start the process-wide background scheduler if it is not running."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TimeoutScheduler()
+        _scheduler.start()
+    return _scheduler
+
+
+def stop_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
@@ -0,0 +1,85 @@
+"""
+App settings for tictactoe.
+
+Every setting can be overridden in the host project's settings module by
+prefixing its name with ``TICTACTOE_``, e.g. ``TICTACTOE_MATCHMAKING_TIMEOUT``.
+"""
+from django.conf import settings
+
+DEFAULTS = {
+    # Dotted path to the matchmaking queue backend class.
+    'MATCHMAKING_BACKEND': 'tictactoe.matchmaking.InMemoryQueueBackend',
+    # Seconds a player stays parked in the queue before their ticket expires.
+    'MATCHMAKING_TIMEOUT': 30,
+    # Rows per UPDATE/DELETE statement in chunked bulk operations.
+    'BULK_CHUNK_SIZE': 1000,
+    # Unfiltered admin changelists use planner row estimates above this size.
+    'ADMIN_ESTIMATED_COUNT_THRESHOLD': 10000,
+    # Seconds to cache rendered template fragments; None disables caching.
+    'TEMPLATE_CACHE_TIMEOUT': None,
+    # Cache alias used for fragments and version counters.
+    'CACHE_ALIAS': 'default',
+    # Seconds ahead of now that the move clock loads upcoming deadlines.
+    'CLOCK_HORIZON': 60,
+    # Start the move clock in a background thread when the app loads.
+    'CLOCK_THREAD': False,
+    # Database alias that receives every write (see tictactoe.routers).
+    'PRIMARY_DATABASE': 'default',
+    # Replica aliases for the read-only views; empty keeps reads on the primary.
+    'REPLICA_DATABASES': [],
+    # Seconds a client reads from the primary after it writes.
+    'READ_YOUR_WRITES_SECONDS': 5,
+    # Database aliases games are sharded across; empty disables sharding.
+    'SHARDS': [],
+    # 'round_robin', 'least_loaded', or a dotted path to policy(shards) -> alias.
+    'SHARD_PLACEMENT': 'round_robin',
+    # Seconds 'least_loaded' reuses its per-shard counts of games in progress.
+    'SHARD_LOAD_TTL': 5,
+    # Games shown by the sharded game list and GET /api/games/.
+    'SHARD_LIST_LIMIT': 100,
+    # Most game IDs accepted by one GET/POST /api/games/bulk/ request.
+    'BULK_MAX_IDS': 100,
+    # Dotted path to a hot store backend for in-progress games; None disables it.
+    'HOT_STORE': None,
+    # Moves between write-behind checkpoints of a hot game.
+    'HOT_STORE_CHECKPOINT_MOVES': 4,
+    # File journalling hot moves for crash recovery; None disables the journal.
+    'HOT_STORE_JOURNAL': None,
+    # Journal size in bytes past which it is compacted to the unsaved moves.
+    'HOT_STORE_JOURNAL_MAX_BYTES': 1024 * 1024,
+    # Seconds without a move before a hot game is saved and evicted; None keeps it.
+    'HOT_STORE_IDLE_TIMEOUT': 600,
+    # Dotted paths of handler(games) callables run after games finish.
+    'TASK_HANDLERS': ['tictactoe.tasks.update_player_stats'],
+    # Run task handlers immediately in the saving thread (e.g. in tests).
+    'TASKS_SYNC': False,
+    # Worker threads running task batches.
+    'TASK_WORKERS': 2,
+    # Tasks queued in memory; beyond this they wait in the outbox.
+    'TASK_QUEUE_SIZE': 1000,
+    # Most tasks passed to one handler call.
+    'TASK_BATCH_SIZE': 50,
+    # Seconds the dispatcher waits for a batch to fill.
+    'TASK_BATCH_WAIT': 0.05,
+    # Failed attempts after which process_outbox leaves a task alone.
+    'TASK_MAX_ATTEMPTS': 5,
+    # Seconds a worker holds the outbox tasks it runs before others may retry them.
+    'TASK_LEASE': 300,
+    # Dotted path to the store for Idempotency-Key responses.
+    'IDEMPOTENCY_STORE': 'tictactoe.idempotency.CacheIdempotencyStore',
+    # Seconds a stored response is replayed for retries with the same key.
+    'IDEMPOTENCY_TTL': 24 * 60 * 60,
+    # Per-action client rates for the API throttle, e.g. {'move': '120/min'}.
+    'THROTTLE_RATES': {},
+    # Per-action rates for each game, e.g. {'move': '60/min'}.
+    'GAME_THROTTLE_RATES': {},
+    # Seconds between syncs of throttle counters through the cache; None keeps them local.
+    'THROTTLE_SYNC_INTERVAL': 1.0,
+    # Most throttle buckets a process keeps; past it the oldest are dropped.
+    'THROTTLE_MAX_BUCKETS': 100000,
+}
+
+
+def get_setting(name: str):
+    """Return the ``TICTACTOE_<name>`` setting, falling back to its default."""
+    return getattr(settings, f'TICTACTOE_{name}', DEFAULTS[name])
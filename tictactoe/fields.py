@@ -0,0 +1,231 @@
+"""
+Compact storage for the 3x3 board.
+
+In Python a board is a list of nine ``None``/``'X'``/``'O'`` cells. In the
+database it is a single SMALLINT: each cell is a base-3 digit (0 empty,
+1 X, 2 O) with cell 0 least significant, so the largest board code is
+3**9 - 1 = 19682.
+"""
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+
+CELLS = 9
+CELL_VALUES = (None, 'X', 'O')
+CELL_DIGITS = {None: 0, 'X': 1, 'O': 2}
+CELL_CHARS = {None: '.', 'X': 'X', 'O': 'O'}
+CHAR_CELLS = {'.': None, 'X': 'X', 'O': 'O'}
+MAX_BOARD_CODE = 3 ** CELLS - 1
+
+
+def empty_board() -> list:
+    """Return a new empty board."""
+    return [None] * CELLS
+
+
+def encode_board(board) -> int:
+    """Pack a board list into its base-3 code."""
+    if len(board) != CELLS:
+        raise ValueError("Board must have exactly 9 elements")
+    code = 0
+    try:
+        for cell in reversed(board):
+            code = code * 3 + CELL_DIGITS[cell]
+    except (KeyError, TypeError):
+        raise ValueError("Board cells must be null, 'X', or 'O'")
+    return code
+
+
+def decode_board(code: int) -> list:
+    """Unpack a base-3 board code into a board list."""
+    if not 0 <= code <= MAX_BOARD_CODE:
+        raise ValueError(f"Board code must be between 0 and {MAX_BOARD_CODE}")
+    board = []
+    for _ in range(CELLS):
+        code, digit = divmod(code, 3)
+        board.append(CELL_VALUES[digit])
+    return board
+
+
+def board_to_string(board) -> str:
+    """Render a board as nine characters, e.g. ``'X.O..X...'``."""
+    return ''.join(CELL_CHARS[cell] for cell in board)
+
+
+def string_to_board(value: str) -> list:
+    """Parse the nine-character form produced by ``board_to_string``."""
+    if len(value) != CELLS:
+        raise ValueError("Board must have exactly 9 cells")
+    try:
+        return [CHAR_CELLS[char] for char in value.upper()]
+    except KeyError:
+        raise ValueError("Board cells must be '.', 'X', or 'O'")
+
+
+# Move history: the board code after each move, PLY_BITS per ply with ply 1
+# lowest. Nine plies take 135 bits, more than a BIGINT holds, so
+# Game.history is a BitmaskField.
+PLY_BITS = (MAX_BOARD_CODE).bit_length()
+PLY_MASK = (1 << PLY_BITS) - 1
+HISTORY_BITS = CELLS * PLY_BITS
+
+
+def history_code(history: int, ply: int) -> int:
+    """Return the board code recorded for ``ply`` (1-9)."""
+    return history >> (ply - 1) * PLY_BITS & PLY_MASK
+
+
+def record_ply(history: int, ply: int, code: int) -> int:
+    """Record ``code`` as ``ply`` (1-9), forgetting any later plies."""
+    shift = (ply - 1) * PLY_BITS
+    return history & ((1 << shift) - 1) | code << shift
+
+
+def truncate_history(history: int, ply: int) -> int:
+    """Forget every ply after ``ply``."""
+    return history & ((1 << ply * PLY_BITS) - 1)
+
+
+class BoardFormField(forms.CharField):
+    """Form field editing a board in its nine-character form."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', CELLS)
+        kwargs.setdefault('min_length', CELLS)
+        kwargs.setdefault('help_text', "Nine cells of '.', 'X' or 'O', row by row")
+        super().__init__(**kwargs)
+
+    def prepare_value(self, value):
+        if isinstance(value, list):
+            return board_to_string(value)
+        return value
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if value in self.empty_values:
+            return None
+        try:
+            return string_to_board(value)
+        except ValueError as e:
+            raise ValidationError(str(e), code='invalid')
+
+
+class BoardField(models.Field):
+    """
+    Model field storing a tic-tac-toe board in a SMALLINT.
+
+    The Python value is a plain list, so code can index and assign cells
+    exactly as with a JSON list. Serialization (dumpdata/loaddata) uses the
+    nine-character form.
+    """
+
+    description = "Tic-tac-toe board packed into a small integer"
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', empty_board)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get('default') is empty_board:
+            del kwargs['default']
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'SmallIntegerField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decode_board(value)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        if isinstance(value, list):
+            # An empty list is the blank value, i.e. the empty board
+            return value or empty_board()
+        try:
+            if isinstance(value, int):
+                return decode_board(value)
+            if isinstance(value, str):
+                return string_to_board(value)
+        except ValueError as e:
+            raise ValidationError(str(e), code='invalid')
+        raise ValidationError("Invalid board value", code='invalid')
+
+    def pre_save(self, model_instance, add):
+        """Normalise the attribute too, so the instance matches what is stored."""
+        value = self.to_python(super().pre_save(model_instance, add))
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return None
+        if isinstance(value, int):
+            return value
+        if isinstance(value, str):
+            value = string_to_board(value)
+        if not value:
+            value = empty_board()
+        return encode_board(value)
+
+    def value_to_string(self, obj):
+        return board_to_string(self.value_from_object(obj))
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'form_class': BoardFormField, **kwargs})
+
+
+class BitmaskField(models.Field):
+    """
+    Model field storing a non-negative integer of up to ``bits`` bits.
+
+    Masks wider than a BIGINT are stored as lowercase hex text, so any
+    database can hold them; Python code sees a plain ``int``.
+    """
+
+    description = "Bitmask of up to %(bits)s bits, stored as hex"
+
+    def __init__(self, *args, bits=64, **kwargs):
+        self.bits = bits
+        kwargs['max_length'] = -(-bits // 4)
+        kwargs.setdefault('default', 0)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs['max_length']
+        kwargs['bits'] = self.bits
+        if kwargs.get('default') == 0:
+            del kwargs['default']
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return int(value, 16)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return int(value, 16)
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid bitmask value", code='invalid')
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        value = self.to_python(value)
+        if not 0 <= value < 1 << self.bits:
+            raise ValueError(f"Bitmask must fit in {self.bits} bits")
+        return format(value, 'x')
+
+    def get_internal_type(self):
+        return 'CharField'
+
+    def value_to_string(self, obj):
+        return format(self.value_from_object(obj), 'x')
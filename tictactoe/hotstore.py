@@ -0,0 +1,547 @@
+"""
+Hot store: keep in-progress games in memory and write them behind.
+
+With ``TICTACTOE_HOT_STORE`` set, ``play_move`` applies moves to a copy of
+the game held in a fast store instead of loading and saving the row on
+every move. The database is written:
+
+* every ``TICTACTOE_HOT_STORE_CHECKPOINT_MOVES`` moves (a checkpoint),
+* on every move of a timed game, so the move clock sees real deadlines,
+* synchronously when the game finishes, before ``play_move`` returns,
+  and when ``undo_move`` takes a move back.
+
+Only the columns a move changes are written, and only while the row is
+still at the version the store last saved. If anything else wrote the row
+in the meantime (an admin action, an API update, the move clock) or
+deleted it, the hot copy is dropped and the move is played on the row
+instead. Those writers also ``discard()`` the hot copy where they can.
+
+Each move is also appended to the journal file named by
+``TICTACTOE_HOT_STORE_JOURNAL``, if any. After a crash,
+``recover_from_journal()`` (``manage.py recover_hot_games``) replays the
+journalled moves on top of each game's last checkpoint. Once the journal
+outgrows ``TICTACTOE_HOT_STORE_JOURNAL_MAX_BYTES`` it is compacted down to
+the moves that are not saved yet.
+
+A hot copy that sees no move for ``TICTACTOE_HOT_STORE_IDLE_TIMEOUT``
+seconds is saved, if it is ahead of its checkpoint, and evicted. Each
+process sweeps the games it moved, at most every half timeout.
+
+Two backends are provided: ``LocalHotStore`` (a process-local dict, for a
+single process) and ``CacheHotStore`` (a Django cache shared by workers).
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not POSIX; the journal is then compacted without a lock
+    fcntl = None
+
+from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
+from django.db import router, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .cache import bump_list_version, get_cache
+from .conf import get_setting
+from .models import Game
+from .sharding import get_game, get_games
+
+
+# Columns a move or an undo changes; the rest belong to other writers
+CHECKPOINT_FIELDS = [
+    'board', 'history', 'current_player', 'status', 'move_deadline', 'updated_at',
+]
+
+
+def ply_of(board) -> int:
+    """Number of moves played on ``board``."""
+    return len(board) - board.count(None)
+
+
+@dataclass
+class HotEntry:
+    """A game held in the store, and the ply and version it was last saved at."""
+
+    game: Game
+    checkpoint_ply: int
+    # time.time() of the last move, for idle eviction
+    touched: float = 0.0
+    # The row's version after the last save; any other version means the
+    # row was written outside the store since
+    saved_version: Optional[int] = None
+
+    @property
+    def dirty(self) -> bool:
+        """True if the copy holds moves made since its last save."""
+        return ply_of(self.game.board) != self.checkpoint_ply
+
+
+class BaseHotStore:
+    """
+    Interface for hot store backends.
+
+    Entries are keyed by public game ID. ``lock`` must serialize moves on a
+    game across every process sharing the store.
+
+    Every store also remembers, in this process, when it last moved each
+    game, so ``evict_idle`` can find idle games without scanning the store.
+    """
+
+    def __init__(self):
+        self._touched: Dict[int, float] = {}
+        self._touched_lock = threading.Lock()
+        self.next_sweep = 0.0
+
+    def touch(self, game_id: int, now: float) -> None:
+        with self._touched_lock:
+            self._touched[game_id] = now
+
+    def forget(self, game_id: int) -> None:
+        with self._touched_lock:
+            self._touched.pop(game_id, None)
+
+    def idle(self, cutoff: float) -> Dict[int, float]:
+        """Return ``{game_id: touched}`` for the games this process last moved before ``cutoff``."""
+        with self._touched_lock:
+            return {game_id: at for game_id, at in self._touched.items() if at < cutoff}
+
+    def get(self, game_id: int) -> Optional[HotEntry]:
+        raise NotImplementedError
+
+    def get_many(self, game_ids: Iterable[int]) -> Dict[int, HotEntry]:
+        entries = {game_id: self.get(game_id) for game_id in game_ids}
+        return {game_id: entry for game_id, entry in entries.items() if entry is not None}
+
+    def set(self, game_id: int, entry: HotEntry) -> None:
+        raise NotImplementedError
+
+    def delete(self, game_id: int) -> None:
+        raise NotImplementedError
+
+    def lock(self, game_id: int):
+        raise NotImplementedError
+
+
+class LocalHotStore(BaseHotStore):
+    """Entries in a dict in this process, with one lock per game."""
+
+    def __init__(self):
+        super().__init__()
+        self._entries: Dict[int, HotEntry] = {}
+        self._locks: Dict[int, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def get(self, game_id):
+        return self._entries.get(game_id)
+
+    def set(self, game_id, entry):
+        self._entries[game_id] = entry
+
+    def delete(self, game_id):
+        self._entries.pop(game_id, None)
+        with self._locks_lock:
+            self._locks.pop(game_id, None)
+
+    @contextmanager
+    def lock(self, game_id):
+        with self._locks_lock:
+            game_lock = self._locks.setdefault(game_id, threading.Lock())
+        with game_lock:
+            yield
+
+
+class CacheHotStore(BaseHotStore):
+    """
+    Entries pickled into the Django cache named by ``TICTACTOE_CACHE_ALIAS``.
+
+    Locks are ``cache.add`` keys with a timeout, so a crashed worker cannot
+    hold a game forever. Entries expire after twice the idle timeout, a
+    backstop for games whose process died before evicting them (their
+    unsaved moves are in the journal).
+    """
+
+    key_prefix = 'tictactoe:hot:'
+    lock_timeout = 5
+    lock_poll_interval = 0.001
+
+    def _key(self, game_id):
+        return f'{self.key_prefix}{game_id}'
+
+    def get(self, game_id):
+        return get_cache().get(self._key(game_id))
+
+    def get_many(self, game_ids):
+        keys = {self._key(game_id): game_id for game_id in game_ids}
+        return {keys[key]: entry for key, entry in get_cache().get_many(list(keys)).items()}
+
+    def set(self, game_id, entry):
+        idle_timeout = get_setting('HOT_STORE_IDLE_TIMEOUT')
+        get_cache().set(self._key(game_id), entry, None if idle_timeout is None else idle_timeout * 2)
+
+    def delete(self, game_id):
+        get_cache().delete(self._key(game_id))
+
+    @contextmanager
+    def lock(self, game_id):
+        cache = get_cache()
+        key = f'{self._key(game_id)}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        while not cache.add(key, 1, self.lock_timeout):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not lock game {game_id}")
+            time.sleep(self.lock_poll_interval)
+        try:
+            yield
+        finally:
+            cache.delete(key)
+
+
+class MoveJournal:
+    """
+    Append-only file of ``game_id ply position`` lines.
+
+    A position of ``UNDO`` records a take-back: every move from that ply
+    on is forgotten.
+    """
+
+    UNDO = -1
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @contextmanager
+    def _locked(self, fd: int, exclusive: bool):
+        # Appends share the lock; compaction and truncation rewrite the
+        # file in place, so they hold it alone.
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def append(self, game_id: int, ply: int, position: int) -> int:
+        """Append one line; return the journal's size afterwards."""
+        # One short O_APPEND write per move, so lines from concurrent
+        # writers never interleave. Flushed to the OS, not fsynced.
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            with self._locked(fd, exclusive=False):
+                os.write(fd, f'{game_id} {ply} {position}\n'.encode())
+                return os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _parse(lines: Iterable[str]):
+        for line in lines:
+            try:
+                game_id, ply, position = map(int, line.split())
+            except ValueError:
+                continue  # a line torn by the crash
+            yield game_id, ply, position
+
+    def read(self) -> Dict[int, Dict[int, int]]:
+        """Return ``{game_id: {ply: position}}`` for every journalled move."""
+        moves = defaultdict(dict)
+        if not os.path.exists(self.path):
+            return moves
+        with open(self.path) as journal:
+            for game_id, ply, position in self._parse(journal):
+                if position == self.UNDO:
+                    for later in [p for p in moves[game_id] if p >= ply]:
+                        del moves[game_id][later]
+                else:
+                    moves[game_id][ply] = position
+        return moves
+
+    def compact(self, saved_plies) -> int:
+        """
+        Drop the lines for moves that are already saved; return how many.
+
+        ``saved_plies(game_ids)`` returns ``{game_id: ply}`` of each game's
+        row. A line for ply ``p`` is kept while the row is at ply ``p`` or
+        earlier; lines for deleted games are dropped. Appends wait while
+        the journal is rewritten.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, 'r+') as journal:
+            with self._locked(journal.fileno(), exclusive=True):
+                lines = list(self._parse(journal))
+                plies = saved_plies({game_id for game_id, _, _ in lines})
+                kept = [
+                    f'{game_id} {ply} {position}\n' for game_id, ply, position in lines
+                    if game_id in plies and ply >= plies[game_id]
+                ]
+                journal.seek(0)
+                journal.truncate()
+                journal.writelines(kept)
+        return len(lines) - len(kept)
+
+    def truncate(self) -> None:
+        with open(self.path, 'a') as journal:
+            with self._locked(journal.fileno(), exclusive=True):
+                journal.truncate(0)
+
+
+_store: Optional[BaseHotStore] = None
+
+
+def get_store() -> Optional[BaseHotStore]:
+    """Return the configured hot store, or None when the hot store is off."""
+    global _store
+    if _store is None and get_setting('HOT_STORE'):
+        _store = import_string(get_setting('HOT_STORE'))()
+    return _store
+
+
+def get_journal() -> Optional[MoveJournal]:
+    path = get_setting('HOT_STORE_JOURNAL')
+    return MoveJournal(path) if path else None
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    global _store
+    if setting.startswith('TICTACTOE_HOT_STORE'):
+        _store = None
+
+
+def current_game(game_id: int) -> Optional[Game]:
+    """Return the hot copy of a game, if the store holds one."""
+    store = get_store()
+    entry = store.get(game_id) if store is not None else None
+    return entry.game if entry is not None else None
+
+
+def with_hot_copies(games: Iterable[Game]) -> List[Game]:
+    """Return ``games`` with each game the store holds replaced by its hot copy."""
+    games = list(games)
+    store = get_store()
+    if store is None or not games:
+        return games
+    entries = store.get_many([game.public_id for game in games])
+    return [
+        entries[game.public_id].game if game.public_id in entries else game
+        for game in games
+    ]
+
+
+def discard(game_id: int) -> None:
+    """Forget the hot copy of a game, e.g. after deleting or updating it."""
+    store = get_store()
+    if store is not None:
+        store.delete(game_id)
+        store.forget(game_id)
+
+
+def _load(game_id: int) -> HotEntry:
+    game = get_game(game_id)
+    return HotEntry(game, ply_of(game.board), saved_version=game.version)
+
+
+def _checkpoint(entry: HotEntry) -> bool:
+    """
+    Save the moves in a hot copy; return False, saving nothing, if the row
+    was written outside the store since the last checkpoint or deleted.
+    """
+    game = entry.game
+    using = router.db_for_write(Game, instance=game)
+    with transaction.atomic(using=using):
+        version = (
+            Game.objects.using(using).select_for_update()
+            .filter(pk=game.pk).values_list('version', flat=True).first()
+        )
+        if version is None or version != entry.saved_version:
+            return False
+        game.save(update_fields=CHECKPOINT_FIELDS)
+    entry.checkpoint_ply = ply_of(game.board)
+    entry.saved_version = game.version
+    return True
+
+
+def saved_plies(game_ids: Iterable[int]) -> Dict[int, int]:
+    """Return ``{game_id: ply}`` as saved in the database, for journal compaction."""
+    games = get_games(game_ids, Game.objects.only('board'))
+    return {game_id: ply_of(game.board) for game_id, game in games.items()}
+
+
+def compact_journal() -> int:
+    """Drop journal lines for moves that are saved; return how many were dropped."""
+    journal = get_journal()
+    return journal.compact(saved_plies) if journal is not None else 0
+
+
+# Journal path -> size at which this process compacts it next
+_compact_at: Dict[str, int] = {}
+
+
+def _journal(game_id: int, ply: int, position: int) -> None:
+    journal = get_journal()
+    if journal is None:
+        return
+    size = journal.append(game_id, ply, position)
+    max_bytes = get_setting('HOT_STORE_JOURNAL_MAX_BYTES')
+    if size > max(max_bytes, _compact_at.get(journal.path, 0)):
+        journal.compact(saved_plies)
+        # If most lines are still unsaved moves, let the journal grow
+        # before trying again rather than compacting on every move
+        _compact_at[journal.path] = 2 * os.path.getsize(journal.path)
+
+
+def evict_idle(now: Optional[float] = None) -> int:
+    """
+    Save and drop the hot copies this process moved that have been idle
+    for ``TICTACTOE_HOT_STORE_IDLE_TIMEOUT`` seconds; return how many.
+    """
+    store = get_store()
+    timeout = get_setting('HOT_STORE_IDLE_TIMEOUT')
+    if store is None or timeout is None:
+        return 0
+    now = time.time() if now is None else now
+    evicted = 0
+    for game_id, touched in store.idle(now - timeout).items():
+        with store.lock(game_id):
+            entry = store.get(game_id)
+            if entry is not None and entry.touched > touched:
+                # Moved since by another process, which now tracks it
+                store.forget(game_id)
+                continue
+            if entry is not None:
+                if entry.dirty:
+                    # A stale copy is simply dropped
+                    _checkpoint(entry)
+                store.delete(game_id)
+                evicted += 1
+            store.forget(game_id)
+    return evicted
+
+
+def _maybe_evict_idle(store: BaseHotStore, now: float) -> None:
+    timeout = get_setting('HOT_STORE_IDLE_TIMEOUT')
+    if timeout is None or now < store.next_sweep:
+        return
+    store.next_sweep = now + timeout / 2
+    evict_idle(now)
+
+
+def play_move(game_id: int, position: int) -> Game:
+    """
+    Apply a move to a game through the hot store and return the game.
+
+    Raises ``Game.DoesNotExist`` for unknown games and ``ValidationError``
+    for illegal moves, exactly like ``Game.make_move``.
+    """
+    store = get_store()
+    now = time.time()
+    _maybe_evict_idle(store, now)
+    with store.lock(game_id):
+        entry = store.get(game_id) or _load(game_id)
+        while True:
+            game = entry.game
+            game.apply_move(position)
+            ply = ply_of(game.board)
+            _journal(game_id, ply - 1, position)
+
+            if (game.status == Game.STATUS_IN_PROGRESS and game.move_time_limit is None
+                    and ply - entry.checkpoint_ply < get_setting('HOT_STORE_CHECKPOINT_MOVES')):
+                # Keep the version and timestamp moving so etags and
+                # If-Modified-Since see the change, and drop the cached list
+                game.version += 1
+                game.updated_at = timezone.now()
+                bump_list_version()
+                break
+            if _checkpoint(entry):
+                break
+            # Written or deleted outside the store: play the move on the row
+            store.delete(game_id)
+            entry = _load(game_id)
+
+        if game.status != Game.STATUS_IN_PROGRESS:
+            store.delete(game_id)
+            store.forget(game_id)
+            return game
+        entry.touched = now
+        store.set(game_id, entry)
+        store.touch(game_id, now)
+    return game
+
+
+def undo_move(game_id: int) -> Game:
+    """
+    Take back the last move of a game through the hot store and return the game.
+
+    The undo is saved at once and becomes the game's checkpoint. Raises
+    like ``Game.undo``.
+    """
+    store = get_store()
+    with store.lock(game_id):
+        entry = store.get(game_id)
+        hot = entry is not None
+        if not hot:
+            entry = _load(game_id)
+        while True:
+            game = entry.game
+            game.undo()
+            # Journal first: a crash before the save then loses the undo
+            # rather than replaying the move it took back.
+            _journal(game_id, ply_of(game.board), MoveJournal.UNDO)
+            if _checkpoint(entry):
+                break
+            # Written or deleted outside the store (say, timed out by the
+            # move clock): take the move back on the row instead
+            store.delete(game_id)
+            store.forget(game_id)
+            hot = False
+            entry = _load(game_id)
+        if hot:
+            store.set(game_id, entry)
+    return game
+
+
+def recover_from_journal() -> int:
+    """
+    Replay journalled moves past each game's last checkpoint.
+
+    Returns the number of games brought forward. The journal is emptied
+    afterwards, and any hot copies of those games are dropped.
+    """
+    journal = get_journal()
+    if journal is None:
+        return 0
+    recovered = 0
+    for game_id, moves in journal.read().items():
+        discard(game_id)
+        try:
+            game = get_game(game_id)
+        except Game.DoesNotExist:
+            continue
+        ply = ply_of(game.board)
+        replayed = 0
+        # Deadlines passed while the process was down; replay the moves
+        # that were accepted at the time.
+        game.move_deadline = None
+        while ply in moves and game.status == Game.STATUS_IN_PROGRESS:
+            try:
+                game.apply_move(moves[ply])
+            except ValidationError:
+                break
+            ply += 1
+            replayed += 1
+        if replayed:
+            game.save()
+            recovered += 1
+    journal.truncate()
+    return recovered
@@ -0,0 +1,13 @@
+"""
+Template view URLs only, without the REST API (and without importing DRF).
+"""
+from django.urls import path
+from . import views
+
+app_name = 'tictactoe'
+
+urlpatterns = [
+    path('', views.game_list, name='game-list'),
+    path('game/<int:pk>/', views.game_detail, name='game-detail'),
+    path('player/<int:pk>/', views.player_detail, name='player-detail'),
+]
@@ -0,0 +1,232 @@
+"""
+Idempotency keys for retried POSTs.
+
+A client that may retry ``POST /api/games/`` or ``POST /api/games/{id}/move/``
+sends an ``Idempotency-Key`` header. The first request with a key runs
+normally and its response is stored for ``TICTACTOE_IDEMPOTENCY_TTL``
+seconds. A retry with the same key and body gets that stored response
+back, marked ``Idempotent-Replayed: true``, instead of creating a second
+game or failing with "Position already occupied".
+
+* A retry that arrives while the first request is still running gets
+  409 Conflict.
+* Reusing a key for a different request (another path or body) gets
+  422 Unprocessable Entity.
+* Server errors are not stored, so those requests can simply be retried.
+
+Keys are scoped to the authenticated user, if any. Two stores are
+provided: ``CacheIdempotencyStore`` (the default; the cache named by
+``TICTACTOE_CACHE_ALIAS``, whose eviction bounds its size) and
+``DatabaseIdempotencyStore`` (the ``IdempotencyKey`` table, pruned by
+``manage.py purge_idempotency_keys``).
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import wraps
+from typing import Any, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from .bulk import chunked_delete
+from .cache import get_cache
+from .conf import get_setting
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class StoredResponse:
+    """The request a key was first used with and, once complete, its response."""
+
+    fingerprint: str
+    status_code: Optional[int] = None
+    body: Any = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self.status_code is None
+
+
+class BaseIdempotencyStore:
+    """
+    Interface for idempotency stores.
+
+    ``claim`` must atomically take a free key, returning None, or return
+    what is already stored under it. Claims that are not completed within
+    ``claim_timeout`` seconds (say, by a crashed worker) are given up.
+    """
+
+    claim_timeout = 30
+
+    def claim(self, key: str, fingerprint: str, ttl: int) -> Optional[StoredResponse]:
+        raise NotImplementedError
+
+    def complete(self, key: str, response: StoredResponse, ttl: int) -> None:
+        raise NotImplementedError
+
+    def release(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class CacheIdempotencyStore(BaseIdempotencyStore):
+    """Responses in the Django cache; claims are ``cache.add`` calls."""
+
+    key_prefix = 'tictactoe:idem:'
+
+    def _key(self, key):
+        return f'{self.key_prefix}{key}'
+
+    def claim(self, key, fingerprint, ttl):
+        cache = get_cache()
+        while not cache.add(self._key(key), StoredResponse(fingerprint), self.claim_timeout):
+            stored = cache.get(self._key(key))
+            if stored is not None:
+                return stored
+            # Expired between the add and the get; try to take it again
+        return None
+
+    def complete(self, key, response, ttl):
+        get_cache().set(self._key(key), response, ttl)
+
+    def release(self, key):
+        get_cache().delete(self._key(key))
+
+
+class DatabaseIdempotencyStore(BaseIdempotencyStore):
+    """Responses in the ``IdempotencyKey`` table; claims rely on its unique key."""
+
+    def claim(self, key, fingerprint, ttl):
+        while True:
+            # Read first, so a retry costs one SELECT and no writes
+            now = timezone.now()
+            row = IdempotencyKey.objects.filter(key=key).first()
+            if row is None:
+                try:
+                    with transaction.atomic():
+                        IdempotencyKey.objects.create(key=key, fingerprint=fingerprint, created_at=now)
+                    return None
+                except IntegrityError:
+                    continue  # claimed concurrently; read it back
+            lifetime = self.claim_timeout if row.status_code is None else ttl
+            if row.created_at > now - timedelta(seconds=lifetime):
+                return StoredResponse(row.fingerprint, row.status_code, row.body)
+            # Expired: take the row over, unless another request just did
+            taken = IdempotencyKey.objects.filter(pk=row.pk, created_at=row.created_at).update(
+                fingerprint=fingerprint, status_code=None, body=None, created_at=now
+            )
+            if taken:
+                return None
+
+    def complete(self, key, response, ttl):
+        IdempotencyKey.objects.filter(key=key).update(
+            status_code=response.status_code, body=response.body, created_at=timezone.now()
+        )
+
+    def release(self, key):
+        IdempotencyKey.objects.filter(key=key).delete()
+
+    def purge(self, ttl: int) -> int:
+        """Delete expired keys; return how many were deleted."""
+        now = timezone.now()
+        expired = IdempotencyKey.objects.filter(
+            Q(status_code__isnull=True, created_at__lte=now - timedelta(seconds=self.claim_timeout))
+            | Q(status_code__isnull=False, created_at__lte=now - timedelta(seconds=ttl))
+        )
+        return chunked_delete(expired)
+
+
+_store: Optional[BaseIdempotencyStore] = None
+
+
+def get_store() -> BaseIdempotencyStore:
+    """Return the configured idempotency store."""
+    global _store
+    if _store is None:
+        _store = import_string(get_setting('IDEMPOTENCY_STORE'))()
+    return _store
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    global _store
+    if setting == 'TICTACTOE_IDEMPOTENCY_STORE':
+        _store = None
+
+
+def scoped_key(request, client_key: str) -> str:
+    """Digest of the client's key, scoped to the authenticated user."""
+    user = getattr(request, 'user', None)
+    owner = user.pk if user is not None and user.is_authenticated else ''
+    return hashlib.sha256(f'{owner}\n{client_key}'.encode()).hexdigest()
+
+
+def request_fingerprint(request) -> str:
+    """Digest of the method, path and parsed body, so retries may re-encode the body."""
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(
+        f'{request.method}\n{request.get_full_path()}\n{body}'.encode()
+    ).hexdigest()
+
+
+def idempotent(view_method):
+    """
+    Decorate a viewset action so a repeated ``Idempotency-Key`` replays
+    its first response. Requests without the header are unaffected.
+    """
+    @wraps(view_method)
+    def wrapped(self, request, *args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if client_key is None:
+            return view_method(self, request, *args, **kwargs)
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        store = get_store()
+        ttl = get_setting('IDEMPOTENCY_TTL')
+        key = scoped_key(request, client_key)
+        fingerprint = request_fingerprint(request)
+        stored = store.claim(key, fingerprint, ttl)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                return Response(
+                    {'error': f"{HEADER} was already used for a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if stored.in_flight:
+                return Response(
+                    {'error': f"A request with this {HEADER} is still in progress"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            response = Response(stored.body, status=stored.status_code)
+            response[REPLAYED_HEADER] = 'true'
+            return response
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            store.release(key)
+            raise
+        if response.status_code >= 500:
+            store.release(key)
+        else:
+            # Stored as plain JSON data, exactly as the client first received it
+            body = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+            store.complete(key, StoredResponse(fingerprint, response.status_code, body), ttl)
+        return response
+    return wrapped
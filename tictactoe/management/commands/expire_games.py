@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from tictactoe.clock import TimeoutScheduler
+
+
+class Command(BaseCommand):
+    help = "Mark timed games whose current player ran out of time as timed out."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running, expiring games as their deadlines pass",
+        )
+        parser.add_argument(
+            '--horizon', type=float, default=None,
+            help="Seconds ahead to load upcoming deadlines (default: TICTACTOE_CLOCK_HORIZON)",
+        )
+
+    def handle(self, *args, **options):
+        scheduler = TimeoutScheduler(horizon=options['horizon'])
+        if not options['loop']:
+            expired = scheduler.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Expired {expired} games."))
+            return
+
+        self.stdout.write("Expiring games as deadlines pass; press Ctrl+C to stop.")
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from tictactoe.models import OutboxTask
+from tictactoe.sharding import game_aliases
+from tictactoe.tasks import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Run post-game tasks left in the outbox (after a crash, a full queue or a failure)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=float, default=60,
+            help="Only run tasks at least this many seconds old, so tasks still "
+                 "queued in a live process are left to it (default: 60)",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help="Tasks per handler call (default: TICTACTOE_TASK_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help="Only print the outbox size and attempts, as JSON",
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            stats = {'pending': 0, 'failing': 0}
+            for using in game_aliases():
+                stats['pending'] += OutboxTask.objects.using(using).count()
+                stats['failing'] += OutboxTask.objects.using(using).filter(attempts__gt=0).count()
+            self.stdout.write(json.dumps(stats))
+            return
+
+        result = process_outbox(min_age=options['min_age'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {result['processed']} tasks, {result['failed']} failed."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tictactoe.conf import get_setting
+from tictactoe.idempotency import DatabaseIdempotencyStore, get_store
+
+
+class Command(BaseCommand):
+    help = "Delete expired rows from the IdempotencyKey table."
+
+    def handle(self, *args, **options):
+        store = get_store()
+        if not isinstance(store, DatabaseIdempotencyStore):
+            raise CommandError("TICTACTOE_IDEMPOTENCY_STORE is not a DatabaseIdempotencyStore")
+        deleted = store.purge(get_setting('IDEMPOTENCY_TTL'))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tictactoe.conf import get_setting
+from tictactoe.hotstore import recover_from_journal
+
+
+class Command(BaseCommand):
+    help = "Replay journalled hot-store moves on top of each game's last checkpoint."
+
+    def handle(self, *args, **options):
+        if not get_setting('HOT_STORE_JOURNAL'):
+            raise CommandError("TICTACTOE_HOT_STORE_JOURNAL is not set.")
+        recovered = recover_from_journal()
+        self.stdout.write(self.style.SUCCESS(f"Recovered {recovered} games."))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tictactoe.tournament import DEFAULT_STRATEGIES, run_tournament
+
+
+class Command(BaseCommand):
+    help = (
+        "Play a round robin between bot strategies in a process pool and "
+        "store the final positions as Game rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'strategies', nargs='*', default=DEFAULT_STRATEGIES,
+            help="Dotted paths to strategy callables (default: built-in random and minimax)",
+        )
+        parser.add_argument('--games', type=int, default=100, help="Games per pairing")
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Games per worker task")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per bulk_create")
+        parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible random play")
+        parser.add_argument('--no-save', action='store_true', help="Do not write games to the database")
+
+    def handle(self, *args, **options):
+        strategies = options['strategies']
+        if len(set(strategies)) < 2:
+            raise CommandError("A tournament needs at least two different strategies")
+        if options['games'] < 1:
+            raise CommandError("--games must be at least 1")
+
+        result = run_tournament(
+            strategies,
+            games=options['games'],
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            seed=options['seed'],
+            save=not options['no_save'],
+            batch_size=options['batch_size'],
+        )
+
+        names = {path: path.rsplit('.', 1)[-1] for path in strategies}
+        width = max(len(f"{names[x]} vs {names[o]}") for x, o in result.pairings)
+        self.stdout.write(
+            f"{'X vs O':<{width}}  {'games':>7}  {'X wins':>7}  {'O wins':>7}  {'draws':>7}"
+        )
+        for (x, o), pairing in result.pairings.items():
+            self.stdout.write(
+                f"{names[x] + ' vs ' + names[o]:<{width}}  {pairing.games:>7}  "
+                f"{pairing.x_wins:>7}  {pairing.o_wins:>7}  {pairing.draws:>7}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Played {result.games} games in {result.elapsed:.2f}s on {result.workers} "
+            f"worker(s): {result.games_per_second:,.0f} games/s, "
+            f"{result.games_per_second_per_core:,.0f} games/s per core"
+        ))
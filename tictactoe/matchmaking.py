@@ -0,0 +1,258 @@
+"""
+Matchmaking queue that pairs waiting players into games.
+
+Players are identified by an opaque string key. The first player to join
+is parked in the queue; the next player to join is paired with the
+longest-waiting one, a Game is created and the parked player plays X.
+A parked player learns about their match the next time they call join.
+
+The queue lives in a pluggable backend selected by the
+``TICTACTOE_MATCHMAKING_BACKEND`` setting.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .conf import get_setting
+from .models import Game, MatchmakingTicket
+from .sharding import public_id_from
+
+
+@dataclass(frozen=True)
+class Match:
+    """A pairing of two players into a game, identified by its public ID."""
+
+    game_id: int
+    player_x: str
+    player_o: str
+
+    def symbol_for(self, player: str) -> str:
+        """Return the mark ('X' or 'O') assigned to ``player``."""
+        return Game.PLAYER_X if player == self.player_x else Game.PLAYER_O
+
+
+USER_KEY_PREFIX = 'user:'
+
+
+def user_id_for(player: str) -> Optional[str]:
+    """Return the user id encoded in a ``user:<id>`` player key, if any."""
+    if player.startswith(USER_KEY_PREFIX):
+        return player[len(USER_KEY_PREFIX):]
+    return None
+
+
+def create_match_game(player_x: str, player_o: str) -> Game:
+    """
+    Create the Game for a new pairing, linking players that are users.
+
+    The game goes on the default database even when sharding is on, next
+    to the ``MatchmakingTicket`` rows that reference it; its public ID
+    carries ``sharding.DEFAULT_INDEX``.
+    """
+    return Game.objects.db_manager(DEFAULT_DB_ALIAS).create(
+        player_x_id=user_id_for(player_x),
+        player_o_id=user_id_for(player_o),
+    )
+
+
+class BaseQueueBackend:
+    """
+    Interface for matchmaking queue backends.
+
+    Subclasses must make ``join`` atomic: a waiting player may be paired
+    at most once, however many joins race for them.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = get_setting('MATCHMAKING_TIMEOUT') if timeout is None else timeout
+
+    def join(self, player: str) -> Optional[Match]:
+        """
+        Join the queue, or check on an earlier join.
+
+        Returns the Match if ``player`` has been paired, otherwise None
+        while they stay parked.
+        """
+        raise NotImplementedError
+
+    def leave(self, player: str) -> None:
+        """Remove ``player`` from the queue if they are still waiting."""
+        raise NotImplementedError
+
+
+_PENDING = object()
+
+
+class InMemoryQueueBackend(BaseQueueBackend):
+    """
+    Process-local queue for single-node deployments.
+
+    Pairing happens under a lock; the Game is created outside it so the
+    lock is only held for a few dictionary operations.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        super().__init__(timeout)
+        self._lock = threading.Lock()
+        # player -> monotonic enqueue time, oldest first
+        self._waiting = OrderedDict()
+        # player -> (Match or _PENDING, monotonic match time), oldest first
+        self._matches = OrderedDict()
+
+    def join(self, player: str) -> Optional[Match]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if player in self._matches:
+                match, _ = self._matches[player]
+                if match is _PENDING:
+                    return None
+                del self._matches[player]
+                return match
+            if player in self._waiting:
+                return None
+            if not self._waiting:
+                self._waiting[player] = now
+                return None
+            opponent, enqueued_at = self._waiting.popitem(last=False)
+            self._matches[opponent] = (_PENDING, now)
+
+        try:
+            game = create_match_game(opponent, player)
+        except Exception:
+            with self._lock:
+                self._matches.pop(opponent, None)
+                self._waiting[opponent] = enqueued_at
+                self._waiting.move_to_end(opponent, last=False)
+            raise
+
+        match = Match(game.public_id, opponent, player)
+        with self._lock:
+            self._matches[opponent] = (match, now)
+        return match
+
+    def leave(self, player: str) -> None:
+        with self._lock:
+            self._waiting.pop(player, None)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.timeout
+        while self._waiting:
+            player, enqueued_at = next(iter(self._waiting.items()))
+            if enqueued_at >= cutoff:
+                break
+            del self._waiting[player]
+        while self._matches:
+            player, (match, matched_at) = next(iter(self._matches.items()))
+            if match is _PENDING or matched_at >= cutoff:
+                break
+            del self._matches[player]
+
+
+class DatabaseQueueBackend(BaseQueueBackend):
+    """
+    Queue stored in the MatchmakingTicket table, shared by all workers.
+
+    A waiting ticket is claimed with ``UPDATE ... WHERE opponent = ''``;
+    only one concurrent join can see that update succeed. On databases
+    that support it, candidates are read with ``SKIP LOCKED`` so joins
+    do not queue up behind each other on the same ticket.
+
+    A parked player who joins again also looks for an opponent, so two
+    players parked by joins that each found the queue empty still meet.
+    Their own ticket is claimed first, so nobody can pair with them
+    meanwhile, and released again if no one is found.
+    """
+
+    candidate_batch_size = 8
+
+    def join(self, player: str) -> Optional[Match]:
+        cutoff = timezone.now() - timedelta(seconds=self.timeout)
+        with transaction.atomic():
+            ticket = MatchmakingTicket.objects.filter(player=player).first()
+            waiting = None
+            if ticket is not None:
+                if ticket.game_id is not None:
+                    ticket.delete()
+                    return Match(
+                        public_id_from(DEFAULT_DB_ALIAS, ticket.game_id), ticket.player, ticket.opponent
+                    )
+                if ticket.opponent:
+                    return None
+                if ticket.created_at < cutoff:
+                    ticket.delete()
+                else:
+                    # Claim our own ticket while we look; if someone else
+                    # just claimed it, our game is on its way
+                    waiting = MatchmakingTicket.objects.filter(pk=ticket.pk, opponent='')
+                    if not waiting.update(opponent=player):
+                        return None
+
+            for candidate in self._candidates(player, cutoff):
+                claimed = MatchmakingTicket.objects.filter(
+                    pk=candidate.pk, opponent=''
+                ).update(opponent=player)
+                if not claimed:
+                    continue
+                if waiting is not None:
+                    MatchmakingTicket.objects.filter(pk=ticket.pk).delete()
+                game = create_match_game(candidate.player, player)
+                MatchmakingTicket.objects.filter(pk=candidate.pk).update(game=game)
+                return Match(game.public_id, candidate.player, player)
+
+            if waiting is not None:
+                # Still parked, keeping our place in the queue
+                MatchmakingTicket.objects.filter(pk=ticket.pk).update(opponent='')
+                return None
+            self._purge_expired(cutoff)
+            try:
+                with transaction.atomic():
+                    MatchmakingTicket.objects.create(player=player)
+            except IntegrityError:
+                # A concurrent join for the same player parked them first.
+                pass
+            return None
+
+    def leave(self, player: str) -> None:
+        MatchmakingTicket.objects.filter(player=player, opponent='').delete()
+
+    def _candidates(self, player: str, cutoff):
+        queryset = MatchmakingTicket.objects.filter(
+            opponent='', created_at__gte=cutoff
+        ).exclude(player=player).order_by('created_at')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        return list(queryset[:self.candidate_batch_size])
+
+    def _purge_expired(self, cutoff) -> None:
+        MatchmakingTicket.objects.filter(opponent='', created_at__lt=cutoff).delete()
+        MatchmakingTicket.objects.filter(
+            created_at__lt=cutoff - timedelta(seconds=self.timeout)
+        ).delete()
+
+
+_backend = None
+
+
+def get_backend() -> BaseQueueBackend:
+    """Return the configured matchmaking backend instance."""
+    global _backend
+    if _backend is None:
+        _backend = import_string(get_setting('MATCHMAKING_BACKEND'))()
+    return _backend
+
+
+@receiver(setting_changed)
+def _reset_backend(setting, **kwargs):
+    global _backend
+    if setting.startswith('TICTACTOE_MATCHMAKING_'):
+        _backend = None
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MatchmakingTicket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "player",
+                    models.CharField(
+                        help_text="Opaque player key", max_length=150, unique=True
+                    ),
+                ),
+                (
+                    "opponent",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="Key of the paired player",
+                        max_length=150,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "game",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Game created when the ticket was paired",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="tictactoe.game",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["created_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("opponent", "")),
+                        fields=["created_at"],
+                        name="tictactoe_ticket_waiting_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0002_matchmakingticket"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlayerStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="tictactoe_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("wins", models.PositiveIntegerField(default=0)),
+                ("losses", models.PositiveIntegerField(default=0)),
+                ("draws", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Player Stats",
+                "verbose_name_plural": "Player Stats",
+            },
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="player_o",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="User playing O",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="tictactoe_games_as_o",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="player_x",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="User playing X",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="tictactoe_games_as_x",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                fields=["player_x", "-created_at"], name="tictactoe_game_px_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                fields=["player_o", "-created_at"], name="tictactoe_game_po_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0003_players"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="is_archived",
+            field=models.BooleanField(
+                default=False, help_text="Hidden from active listings"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                fields=["-created_at"], name="tictactoe_game_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                fields=["status", "-created_at"], name="tictactoe_game_status_idx"
+            ),
+        ),
+    ]
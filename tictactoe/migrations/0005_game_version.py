@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0004_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, help_text="Incremented on every save"
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+import tictactoe.fields
+
+CHUNK_SIZE = 2000
+
+
+def pack_boards(apps, schema_editor):
+    """Copy each JSON board into the packed column, one chunk at a time."""
+    Game = apps.get_model('tictactoe', 'Game')
+    games = Game.objects.using(schema_editor.connection.alias)
+    batch = []
+    for game in games.only('pk', 'board').order_by('pk').iterator(chunk_size=CHUNK_SIZE):
+        game.board_code = game.board or tictactoe.fields.empty_board()
+        batch.append(game)
+        if len(batch) >= CHUNK_SIZE:
+            games.bulk_update(batch, ['board_code'])
+            batch = []
+    if batch:
+        games.bulk_update(batch, ['board_code'])
+
+
+def unpack_boards(apps, schema_editor):
+    """Copy each packed board back into the JSON column."""
+    Game = apps.get_model('tictactoe', 'Game')
+    games = Game.objects.using(schema_editor.connection.alias)
+    batch = []
+    for game in games.only('pk', 'board_code').order_by('pk').iterator(chunk_size=CHUNK_SIZE):
+        game.board = game.board_code
+        batch.append(game)
+        if len(batch) >= CHUNK_SIZE:
+            games.bulk_update(batch, ['board'])
+            batch = []
+    if batch:
+        games.bulk_update(batch, ['board'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tictactoe', '0005_game_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='board_code',
+            field=tictactoe.fields.BoardField(help_text='Game board state (9 cells)'),
+        ),
+        migrations.RunPython(pack_boards, unpack_boards),
+        migrations.RemoveField(
+            model_name='game',
+            name='board',
+        ),
+        migrations.RenameField(
+            model_name='game',
+            old_name='board_code',
+            new_name='board',
+        ),
+    ]
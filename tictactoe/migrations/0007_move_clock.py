@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0006_compact_board"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="move_deadline",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the current player runs out of time",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="move_time_limit",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Seconds allowed per move; empty for no time control",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="game",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("in_progress", "In Progress"),
+                    ("x_wins", "X Wins"),
+                    ("o_wins", "O Wins"),
+                    ("draw", "Draw"),
+                    ("timeout", "Timed Out"),
+                ],
+                default="in_progress",
+                help_text="Current game status",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                fields=["status", "move_deadline"], name="tictactoe_game_deadline_idx"
+            ),
+        ),
+    ]
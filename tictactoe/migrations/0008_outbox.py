@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0007_move_clock"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxTask",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "handler",
+                    models.CharField(
+                        help_text="Dotted path of the handler", max_length=200
+                    ),
+                ),
+                (
+                    "game_id",
+                    models.BigIntegerField(
+                        help_text="Primary key of the game on its database"
+                    ),
+                ),
+                (
+                    "database",
+                    models.CharField(
+                        default="default",
+                        help_text="Database alias holding the game",
+                        max_length=100,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Outbox Task",
+                "verbose_name_plural": "Outbox Tasks",
+                "indexes": [
+                    models.Index(
+                        fields=["created_at"], name="tictactoe_outbox_created_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:47
+
+import tictactoe.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0008_outbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UltimateGame",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "x_cells",
+                    tictactoe.fields.BitmaskField(
+                        bits=81, help_text="Cells held by X (bit 9 * board + position)"
+                    ),
+                ),
+                (
+                    "o_cells",
+                    tictactoe.fields.BitmaskField(
+                        bits=81, help_text="Cells held by O (bit 9 * board + position)"
+                    ),
+                ),
+                (
+                    "meta_x",
+                    models.PositiveSmallIntegerField(
+                        default=0, help_text="Sub-boards won by X"
+                    ),
+                ),
+                (
+                    "meta_o",
+                    models.PositiveSmallIntegerField(
+                        default=0, help_text="Sub-boards won by O"
+                    ),
+                ),
+                (
+                    "meta_draw",
+                    models.PositiveSmallIntegerField(
+                        default=0, help_text="Sub-boards drawn"
+                    ),
+                ),
+                (
+                    "forced_board",
+                    models.PositiveSmallIntegerField(
+                        blank=True,
+                        help_text="Sub-board the next move must be played on; empty for any open board",
+                        null=True,
+                    ),
+                ),
+                (
+                    "current_player",
+                    models.CharField(
+                        choices=[("X", "Player X"), ("O", "Player O")],
+                        default="X",
+                        help_text="Current player's turn",
+                        max_length=1,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("in_progress", "In Progress"),
+                            ("x_wins", "X Wins"),
+                            ("o_wins", "O Wins"),
+                            ("draw", "Draw"),
+                        ],
+                        default="in_progress",
+                        help_text="Current game status",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveIntegerField(
+                        default=0, editable=False, help_text="Incremented on every save"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Ultimate Tic-Tac-Toe Game",
+                "verbose_name_plural": "Ultimate Tic-Tac-Toe Games",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:55
+
+import tictactoe.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0010_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="history",
+            field=tictactoe.fields.BitmaskField(
+                bits=135,
+                editable=False,
+                help_text="Board code after each move, 15 bits per ply (see tictactoe.fields)",
+            ),
+        ),
+    ]
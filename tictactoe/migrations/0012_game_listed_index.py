@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0011_game_history"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                fields=["is_archived", "-created_at"], name="tictactoe_game_listed_idx"
+            ),
+        ),
+    ]
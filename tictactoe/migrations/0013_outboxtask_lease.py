@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tictactoe", "0012_game_listed_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxtask",
+            name="lease_token",
+            field=models.UUIDField(
+                blank=True,
+                help_text="Worker batch currently running the task",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="outboxtask",
+            name="leased_until",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When an unfinished lease may be taken over",
+                null=True,
+            ),
+        ),
+    ]
@@ -1,5 +1,20 @@
-from django.db import models
+import copy
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import F
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .cache import bump_list_version
+from . import ultimate
+from .fields import (
+    HISTORY_BITS, BitmaskField, BoardField, decode_board, encode_board, history_code, record_ply,
+    truncate_history,
+)
+from .signals import game_finished
 
 
 class Game(models.Model):
@@ -7,12 +22,14 @@ class Game(models.Model):
     STATUS_X_WINS = 'x_wins'
     STATUS_O_WINS = 'o_wins'
     STATUS_DRAW = 'draw'
+    STATUS_TIMEOUT = 'timeout'
 
     STATUS_CHOICES = [
         (STATUS_IN_PROGRESS, 'In Progress'),
         (STATUS_X_WINS, 'X Wins'),
         (STATUS_O_WINS, 'O Wins'),
         (STATUS_DRAW, 'Draw'),
+        (STATUS_TIMEOUT, 'Timed Out'),
     ]
 
     PLAYER_X = 'X'
@@ -34,7 +51,12 @@ class Game(models.Model):
         [2, 4, 6],
     ]
 
-    board = models.JSONField(default=list, help_text="Game board state (9 elements)")
+    board = BoardField(help_text="Game board state (9 cells)")
+    history = BitmaskField(
+        bits=HISTORY_BITS,
+        editable=False,
+        help_text="Board code after each move, 15 bits per ply (see tictactoe.fields)"
+    )
     current_player = models.CharField(
         max_length=1,
         choices=PLAYER_CHOICES,
@@ -47,6 +69,34 @@ class Game(models.Model):
         default=STATUS_IN_PROGRESS,
         help_text="Current game status"
     )
+    player_x = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='tictactoe_games_as_x',
+        help_text="User playing X"
+    )
+    player_o = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='tictactoe_games_as_o',
+        help_text="User playing O"
+    )
+    move_time_limit = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Seconds allowed per move; empty for no time control"
+    )
+    move_deadline = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the current player runs out of time"
+    )
+    is_archived = models.BooleanField(default=False, help_text="Hidden from active listings")
+    version = models.PositiveIntegerField(default=0, editable=False, help_text="Incremented on every save")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -54,16 +104,48 @@ class Game(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Tic-Tac-Toe Game'
         verbose_name_plural = 'Tic-Tac-Toe Games'
+        indexes = [
+            models.Index(fields=['-created_at'], name='tictactoe_game_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='tictactoe_game_status_idx'),
+            models.Index(fields=['status', 'move_deadline'], name='tictactoe_game_deadline_idx'),
+            models.Index(fields=['player_x', '-created_at'], name='tictactoe_game_px_created_idx'),
+            models.Index(fields=['player_o', '-created_at'], name='tictactoe_game_po_created_idx'),
+            models.Index(fields=['is_archived', '-created_at'], name='tictactoe_game_listed_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"Game {self.id} - {self.get_status_display()}"
 
+    @property
+    def public_id(self):
+        """ID exposed to clients; encodes the shard when sharding is on."""
+        from .sharding import public_id_for
+        return public_id_for(self)
+
     def save(self, *args, **kwargs) -> None:
-        if not self.board:
-            self.board = [None] * 9
-        super().save(*args, **kwargs)
+        if self._state.adding and self.move_deadline is None:
+            self.move_deadline = self.next_deadline()
+        self.version += 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'version' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'version']
+        if self.__dict__.pop('_finishing', False):
+            # Receivers (e.g. the task outbox) write in the same transaction
+            using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+                game_finished.send(sender=type(self), game=self)
+        else:
+            super().save(*args, **kwargs)
+        bump_list_version()
 
-    def make_move(self, position: int) -> dict:
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        bump_list_version()
+        return result
+
+    def apply_move(self, position: int) -> None:
+        """Validate and apply a move in memory, without saving."""
         if self.status != self.STATUS_IN_PROGRESS:
             raise ValidationError("Game is already finished")
 
@@ -73,12 +155,91 @@ class Game(models.Model):
         if self.board[position] is not None:
             raise ValidationError("Position already occupied")
 
+        if self.is_out_of_time():
+            raise ValidationError("Move time limit exceeded")
+
         self.board[position] = self.current_player
+        self.history = record_ply(self.history, self.ply, encode_board(self.board))
         self.update_status()
 
         if self.status == self.STATUS_IN_PROGRESS:
             self.current_player = self.PLAYER_O if self.current_player == self.PLAYER_X else self.PLAYER_X
+        self.move_deadline = self.next_deadline()
+
+    @property
+    def ply(self) -> int:
+        """Number of moves played so far."""
+        return len(self.board) - self.board.count(None)
 
+    def board_at(self, ply: int) -> list:
+        """
+        Return the board as it stood after ``ply`` moves.
+
+        Raises ValueError if ``ply`` is outside 0 to ``self.ply``, or if the
+        move was not recorded (games played before the history column).
+        """
+        current = self.ply
+        if not isinstance(ply, int) or not 0 <= ply <= current:
+            raise ValueError(f"Ply must be between 0 and {current}")
+        if ply == current:
+            return list(self.board)
+        if ply == 0:
+            return [None] * len(self.board)
+        board = decode_board(history_code(self.history, ply))
+        if len(board) - board.count(None) != ply:
+            raise ValueError(f"No history recorded for ply {ply}")
+        return board
+
+    def at_ply(self, ply: int) -> 'Game':
+        """Return an unsaved copy of this game as it stood after ``ply`` moves."""
+        if ply == self.ply:
+            return self
+        snapshot = copy.copy(self)
+        snapshot.board = self.board_at(ply)
+        # Only the final position can be finished
+        snapshot.status = self.STATUS_IN_PROGRESS
+        snapshot.current_player = self.PLAYER_X if ply % 2 == 0 else self.PLAYER_O
+        snapshot.move_deadline = None
+        return snapshot
+
+    def undo(self) -> None:
+        """
+        Take back the last move in memory, without saving.
+
+        Finished games can be taken back unless their result already
+        counts towards a player's record. Games that timed out, or whose
+        move deadline has passed, cannot.
+        """
+        ply = self.ply
+        if ply == 0:
+            raise ValidationError("No moves to undo")
+        if self.status == self.STATUS_TIMEOUT or self.is_out_of_time():
+            raise ValidationError("Game has timed out")
+        if self.status != self.STATUS_IN_PROGRESS and self.result_counters():
+            raise ValidationError("Game result is already recorded for its players")
+        try:
+            previous = self.board_at(ply - 1)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+        mover = next(cell for cell, before in zip(self.board, previous) if cell != before)
+        self.board = previous
+        self.history = truncate_history(self.history, ply - 1)
+        self.current_player = mover
+        self.update_status()
+        self.move_deadline = self.next_deadline()
+
+    def next_deadline(self):
+        """Return the deadline for the player to move now, if the game is timed."""
+        if self.move_time_limit is None or self.status != self.STATUS_IN_PROGRESS:
+            return None
+        return timezone.now() + timedelta(seconds=self.move_time_limit)
+
+    def is_out_of_time(self) -> bool:
+        return self.move_deadline is not None and timezone.now() > self.move_deadline
+
+    def make_move(self, position: int) -> dict:
+        self.apply_move(position)
         self.save()
 
         return {
@@ -97,6 +258,13 @@ class Game(models.Model):
         return None not in self.board and self.check_winner() is None
 
     def update_status(self) -> None:
+        """
+        Recompute the status from the board.
+
+        When this finishes the game, the next ``save()`` sends
+        ``tictactoe.signals.game_finished``.
+        """
+        was_in_progress = self.status == self.STATUS_IN_PROGRESS
         winner = self.check_winner()
         if winner == self.PLAYER_X:
             self.status = self.STATUS_X_WINS
@@ -106,6 +274,20 @@ class Game(models.Model):
             self.status = self.STATUS_DRAW
         else:
             self.status = self.STATUS_IN_PROGRESS
+        if was_in_progress and self.status != self.STATUS_IN_PROGRESS:
+            self._finishing = True
+
+    def result_counters(self) -> list:
+        """Return the (user_id, PlayerStats counter) pairs this result adds to."""
+        if self.status == self.STATUS_DRAW:
+            outcomes = [(self.player_x_id, 'draws'), (self.player_o_id, 'draws')]
+        elif self.status == self.STATUS_X_WINS:
+            outcomes = [(self.player_x_id, 'wins'), (self.player_o_id, 'losses')]
+        elif self.status == self.STATUS_O_WINS:
+            outcomes = [(self.player_x_id, 'losses'), (self.player_o_id, 'wins')]
+        else:
+            return []
+        return [(user_id, counter) for user_id, counter in outcomes if user_id is not None]
 
     def get_board_display(self) -> str:
         def cell(val):
@@ -118,3 +300,280 @@ class Game(models.Model):
 -----------
  {cell(self.board[6])} | {cell(self.board[7])} | {cell(self.board[8])}
 """
+
+
+class UltimateGame(models.Model):
+    """
+    Ultimate tic-tac-toe: nine sub-boards whose results form a meta-board.
+
+    The position is stored as bitmasks (see ``tictactoe.ultimate``); moves
+    name a sub-board and a cell within it.
+    """
+
+    STATUS_CHOICES = [
+        choice for choice in Game.STATUS_CHOICES if choice[0] != Game.STATUS_TIMEOUT
+    ]
+
+    x_cells = BitmaskField(bits=ultimate.CELLS, help_text="Cells held by X (bit 9 * board + position)")
+    o_cells = BitmaskField(bits=ultimate.CELLS, help_text="Cells held by O (bit 9 * board + position)")
+    meta_x = models.PositiveSmallIntegerField(default=0, help_text="Sub-boards won by X")
+    meta_o = models.PositiveSmallIntegerField(default=0, help_text="Sub-boards won by O")
+    meta_draw = models.PositiveSmallIntegerField(default=0, help_text="Sub-boards drawn")
+    forced_board = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Sub-board the next move must be played on; empty for any open board"
+    )
+    current_player = models.CharField(
+        max_length=1,
+        choices=Game.PLAYER_CHOICES,
+        default=Game.PLAYER_X,
+        help_text="Current player's turn"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=Game.STATUS_IN_PROGRESS,
+        help_text="Current game status"
+    )
+    version = models.PositiveIntegerField(default=0, editable=False, help_text="Incremented on every save")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Ultimate Tic-Tac-Toe Game'
+        verbose_name_plural = 'Ultimate Tic-Tac-Toe Games'
+
+    def __str__(self) -> str:
+        return f"Ultimate game {self.id} - {self.get_status_display()}"
+
+    def save(self, *args, **kwargs) -> None:
+        self.version += 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'version' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'version']
+        super().save(*args, **kwargs)
+
+    @property
+    def state(self) -> ultimate.State:
+        return ultimate.State(
+            self.x_cells, self.o_cells, self.meta_x, self.meta_o, self.meta_draw,
+            ultimate.ANY_BOARD if self.forced_board is None else self.forced_board,
+            ultimate.PLAYER_X if self.current_player == Game.PLAYER_X else ultimate.PLAYER_O,
+        )
+
+    @state.setter
+    def state(self, state: ultimate.State) -> None:
+        self.x_cells, self.o_cells = state.x, state.o
+        self.meta_x, self.meta_o, self.meta_draw = state.meta_x, state.meta_o, state.meta_draw
+        self.forced_board = None if state.forced == ultimate.ANY_BOARD else state.forced
+        self.current_player = Game.PLAYER_X if state.player == ultimate.PLAYER_X else Game.PLAYER_O
+        winner = state.winner
+        if winner is not None:
+            self.status = Game.STATUS_X_WINS if winner == ultimate.PLAYER_X else Game.STATUS_O_WINS
+            self.current_player = Game.PLAYER_X if winner == ultimate.PLAYER_X else Game.PLAYER_O
+        elif state.is_over:
+            self.status = Game.STATUS_DRAW
+        else:
+            self.status = Game.STATUS_IN_PROGRESS
+
+    def legal_moves(self) -> list:
+        """Return the legal moves as (board, position) pairs."""
+        return [
+            divmod(cell, ultimate.SUB_CELLS)
+            for cell in ultimate.iter_cells(ultimate.legal_mask(self.state))
+        ]
+
+    def apply_move(self, board: int, position: int) -> None:
+        """Validate and apply a move in memory, without saving."""
+        if self.status != Game.STATUS_IN_PROGRESS:
+            raise ValidationError("Game is already finished")
+
+        for name, value in (('Board', board), ('Position', position)):
+            if not isinstance(value, int) or value < 0 or value > 8:
+                raise ValidationError(f"{name} must be between 0 and 8")
+
+        state = self.state
+        cell = ultimate.cell_index(board, position)
+        if not ultimate.legal_mask(state) >> cell & 1:
+            if (state.x | state.o) >> cell & 1:
+                raise ValidationError("Position already occupied")
+            if state.forced != ultimate.ANY_BOARD:
+                raise ValidationError(f"Move must be played on board {state.forced}")
+            raise ValidationError("Board is already decided")
+
+        self.state = ultimate.play(state, cell)
+
+    def make_move(self, board: int, position: int) -> dict:
+        self.apply_move(board, position)
+        self.save()
+        return {
+            'success': True,
+            'message': 'Move successful'
+        }
+
+    def get_boards(self) -> list:
+        """Return the nine sub-boards as nine-character strings, e.g. ``'X.O......'``."""
+        boards = []
+        for board in range(ultimate.SUB_CELLS):
+            shift = board * ultimate.SUB_CELLS
+            x, o = self.x_cells >> shift, self.o_cells >> shift
+            boards.append(''.join(
+                'X' if x >> cell & 1 else 'O' if o >> cell & 1 else '.'
+                for cell in range(ultimate.SUB_CELLS)
+            ))
+        return boards
+
+    def get_meta_board(self) -> str:
+        """Return the meta-board: 'X'/'O' for won sub-boards, 'D' for drawn, '.' for open."""
+        return ''.join(
+            'X' if self.meta_x >> board & 1 else
+            'O' if self.meta_o >> board & 1 else
+            'D' if self.meta_draw >> board & 1 else '.'
+            for board in range(ultimate.SUB_CELLS)
+        )
+
+
+class PlayerStats(models.Model):
+    """
+    Denormalized win/loss/draw record for a user.
+
+    Counters are bumped with ``F()`` updates as games finish, so reading a
+    player's record never aggregates over their games.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='tictactoe_stats'
+    )
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Player Stats'
+        verbose_name_plural = 'Player Stats'
+
+    def __str__(self) -> str:
+        return f"{self.user} ({self.wins}-{self.losses}-{self.draws})"
+
+    @property
+    def games_played(self) -> int:
+        return self.wins + self.losses + self.draws
+
+    @classmethod
+    def for_user(cls, user) -> 'PlayerStats':
+        """Return the user's stats, or an unsaved empty record if they have none."""
+        try:
+            return user.tictactoe_stats
+        except cls.DoesNotExist:
+            return cls(user=user)
+
+    @classmethod
+    def increment(cls, user_id, counter: str, amount: int = 1) -> None:
+        """Atomically add ``amount`` to ``counter`` for ``user_id``, creating the row if needed."""
+        updated = cls.objects.filter(user_id=user_id).update(**{counter: F(counter) + amount})
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(user_id=user_id, **{counter: amount})
+        except IntegrityError:
+            cls.objects.filter(user_id=user_id).update(**{counter: F(counter) + amount})
+
+
+class MatchmakingTicket(models.Model):
+    """
+    A player parked in the database matchmaking queue.
+
+    A ticket is waiting while ``opponent`` is empty. Pairing claims the
+    oldest waiting ticket with a conditional UPDATE, so two concurrent
+    joins can never claim the same ticket.
+    """
+
+    player = models.CharField(max_length=150, unique=True, help_text="Opaque player key")
+    opponent = models.CharField(max_length=150, blank=True, default='', help_text="Key of the paired player")
+    game = models.ForeignKey(
+        Game,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Game created when the ticket was paired"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['created_at'],
+                name='tictactoe_ticket_waiting_idx',
+                condition=models.Q(opponent=''),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Ticket {self.player}"
+
+
+class OutboxTask(models.Model):
+    """
+    A post-game handler call that has not completed yet.
+
+    Rows are written on the game's own database (default or its shard), in
+    the same transaction as the game's finishing move, and deleted once the
+    handler succeeds, so work queued in memory by
+    ``tictactoe.tasks`` survives a crash; ``manage.py process_outbox``
+    runs whatever is left. A worker leases the rows it runs, so no two
+    workers run the same task at once.
+    """
+
+    handler = models.CharField(max_length=200, help_text="Dotted path of the handler")
+    game_id = models.BigIntegerField(help_text="Primary key of the game on its database")
+    database = models.CharField(max_length=100, default='default', help_text="Database alias holding the game")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    lease_token = models.UUIDField(null=True, blank=True, help_text="Worker batch currently running the task")
+    leased_until = models.DateTimeField(null=True, blank=True, help_text="When an unfinished lease may be taken over")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Outbox Task'
+        verbose_name_plural = 'Outbox Tasks'
+        indexes = [
+            models.Index(fields=['created_at'], name='tictactoe_outbox_created_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.handler} for game {self.game_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The stored response to a POST sent with an ``Idempotency-Key`` header.
+
+    Used by ``tictactoe.idempotency.DatabaseIdempotencyStore``. ``key`` is
+    a SHA-256 digest of the client's key and its scope, so rows stay a
+    fixed, small size; a row without a status code is a request still in
+    flight.
+    """
+
+    key = models.CharField(max_length=64, unique=True, help_text="Digest of the scoped client key")
+    fingerprint = models.CharField(max_length=64, help_text="Digest of the request the key was first used with")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        indexes = [
+            models.Index(fields=['created_at'], name='tictactoe_idem_created_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return self.key
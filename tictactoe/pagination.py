@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PlayerGamesPagination(CursorPagination):
+    """
+    Keyset pagination for a player's game history.
+
+    The cursor encodes the last ``created_at`` seen, so each page is an
+    index range scan on ``(player, -created_at)`` instead of an OFFSET.
+    Used with ``views.PlayerGames``, which runs that scan once per side.
+    """
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
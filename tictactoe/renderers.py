@@ -0,0 +1,13 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class CompactJSONRenderer(JSONRenderer):
+    """
+    JSON with boards as nine-character strings, e.g. ``"X.O..X..."``.
+
+    Selected with ``?format=compact``. The renderer only marks the request;
+    ``BoardJSONField`` produces the string form while serializing, so no
+    second pass over the data is needed.
+    """
+
+    format = 'compact'
@@ -0,0 +1,146 @@
+"""
+Read-replica routing for the read-heavy endpoints.
+
+``ReplicaRouter`` only sends a read to a replica while a view has opted in
+with ``use_replica()`` (via ``replica_reads`` for function views or
+``ReplicaRoutingMixin`` for viewsets). Everything else -- writes, the
+admin, management commands, background jobs -- stays on the primary, so
+enabling the router never makes a write path read stale data.
+
+Right after a client writes (a move, a new game) it gets a short-lived
+cookie that pins its reads to the primary, so it never polls a replica that
+has not caught up with its own move yet.
+
+Enable it with::
+
+    DATABASE_ROUTERS = ['tictactoe.routers.ReplicaRouter']
+    TICTACTOE_REPLICA_DATABASES = ['replica']
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import List
+
+from .conf import get_setting
+
+PIN_COOKIE = 'tictactoe_primary_until'
+
+_use_replica: ContextVar[bool] = ContextVar('tictactoe_use_replica', default=False)
+
+
+def replica_aliases() -> List[str]:
+    return list(get_setting('REPLICA_DATABASES'))
+
+
+def primary_alias() -> str:
+    return get_setting('PRIMARY_DATABASE')
+
+
+@contextmanager
+def use_replica(enabled: bool = True):
+    """Route reads made inside the block to a replica (when any are configured)."""
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def is_pinned(request) -> bool:
+    """Whether ``request`` falls inside its client's read-your-writes window."""
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def pin_to_primary(response) -> None:
+    """Pin the client that receives ``response`` to the primary for a while."""
+    window = get_setting('READ_YOUR_WRITES_SECONDS')
+    if window and replica_aliases():
+        response.set_cookie(
+            PIN_COOKIE, f'{time.time() + window:.3f}', max_age=window, samesite='Lax'
+        )
+
+
+def replica_reads(view):
+    """Decorate a read-only function view so its queries may use a replica."""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        with use_replica(not is_pinned(request)):
+            return view(request, *args, **kwargs)
+    return wrapped
+
+
+class ReplicaRoutingMixin:
+    """
+    Viewset mixin routing ``replica_actions`` to a replica.
+
+    Authentication and permission checks run before the switch, on the
+    primary. Successful ``pinning_actions`` start the read-your-writes
+    window.
+    """
+
+    replica_actions = ('list', 'retrieve')
+    pinning_actions = ('create', 'update', 'partial_update', 'destroy')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica_token = _use_replica.set(not is_pinned(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _use_replica.reset(token)
+            self._replica_token = None
+        if self.action in self.pinning_actions and response.status_code < 400:
+            pin_to_primary(response)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Send opted-in reads to a random replica and every write to the primary.
+
+    Instances loaded from a shard (see tictactoe.sharding) are left on
+    their shard.
+    """
+
+    def _databases(self):
+        return {primary_alias(), *replica_aliases()}
+
+    def _shard_for(self, hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in get_setting('SHARDS'):
+            return instance._state.db
+        return None
+
+    def db_for_read(self, model, **hints):
+        shard = self._shard_for(hints)
+        if shard:
+            return shard
+        if _use_replica.get():
+            replicas = replica_aliases()
+            if replicas:
+                return random.choice(replicas)
+        return primary_alias()
+
+    def db_for_write(self, model, **hints):
+        shard = self._shard_for(hints)
+        if shard:
+            return shard
+        # Name the primary explicitly: an instance loaded from a replica
+        # would otherwise be saved back to the replica it came from.
+        return primary_alias()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = self._databases()
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
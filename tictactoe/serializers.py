@@ -1,14 +1,92 @@
 from rest_framework import serializers
-from .models import Game
-
-
-class GameSerializer(serializers.ModelSerializer):
+from .conf import get_setting
+from .fields import board_to_string
+from .models import Game, PlayerStats, UltimateGame
+from .renderers import CompactJSONRenderer
+
+
+class BoardJSONField(serializers.JSONField):
+    """
+    The board as a JSON list of nine cells.
+
+    The model stores the board packed into an integer; the API keeps
+    exposing it as a list, or as a nine-character string when the response
+    is rendered with ``?format=compact``.
+    """
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        renderer = getattr(request, 'accepted_renderer', None)
+        if renderer is not None and renderer.format == CompactJSONRenderer.format:
+            return board_to_string(value)
+        return super().to_representation(value)
+
+
+class SparseFieldsMixin:
+    """
+    Limit the serialized fields to those named in ``?fields=a,b,c``.
+
+    The selection can also be passed directly as ``fields=[...]``. Unknown
+    names are rejected so typos do not silently return less data.
+    """
+
+    # Model columns each serializer field reads, where they differ from its name
+    field_columns = {}
+
+    def __init__(self, *args, **kwargs):
+        selected = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if selected is None:
+            selected = self.requested_fields(self.context.get('request'))
+        if selected is None:
+            return
+        unknown = set(selected) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': [f"Unknown field: {name}" for name in sorted(unknown)]}
+            )
+        for name in set(self.fields) - set(selected):
+            self.fields.pop(name)
+
+    @staticmethod
+    def requested_fields(request):
+        """Return the field names in ``?fields=``, or None to keep them all."""
+        query_params = getattr(request, 'query_params', None)
+        if not query_params or not query_params.get('fields'):
+            return None
+        return [name.strip() for name in query_params['fields'].split(',') if name.strip()]
+
+    @classmethod
+    def columns_for(cls, fields):
+        """Return the model columns needed to serialize ``fields``."""
+        concrete = {field.name for field in cls.Meta.model._meta.concrete_fields}
+        columns = set()
+        for name in fields:
+            columns.update(cls.field_columns.get(name, (name,)))
+        # Unknown names are left for the serializer to reject
+        return sorted(columns & concrete)
+
+
+class GameSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Game model."""
 
+    board = BoardJSONField(required=False)
+    id = serializers.IntegerField(source='public_id', read_only=True)
+    ply = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = Game
-        fields = ['id', 'board', 'current_player', 'status', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'current_player', 'status', 'created_at', 'updated_at']
+        fields = [
+            'id', 'board', 'ply', 'current_player', 'status', 'player_x', 'player_o',
+            'move_time_limit', 'move_deadline', 'created_at', 'updated_at',
+        ]
+        read_only_fields = [
+            'id', 'ply', 'current_player', 'status', 'player_x', 'player_o',
+            'move_time_limit', 'move_deadline', 'created_at', 'updated_at',
+        ]
+
+    # The public ID is derived from the primary key, which is always loaded.
+    field_columns = {'id': (), 'ply': ('board',)}
 
     def validate_board(self, value):
         """Validate board structure."""
@@ -25,6 +103,26 @@ class GameSerializer(serializers.ModelSerializer):
         return value
 
 
+class TimeControlSerializer(serializers.Serializer):
+    """Serializer for the optional time control of a new game."""
+
+    move_time_limit = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    """Serializer for the game IDs of a bulk retrieve."""
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_ids(self, value):
+        """Drop duplicates, keeping the first occurrence, and enforce the batch limit."""
+        ids = list(dict.fromkeys(value))
+        limit = get_setting('BULK_MAX_IDS')
+        if len(ids) > limit:
+            raise serializers.ValidationError(f"At most {limit} ids per request")
+        return ids
+
+
 class MoveSerializer(serializers.Serializer):
     """Serializer for making a move."""
 
@@ -45,6 +143,64 @@ class GameDetailSerializer(GameSerializer):
     class Meta(GameSerializer.Meta):
         fields = GameSerializer.Meta.fields + ['board_display']
 
+    field_columns = {**GameSerializer.field_columns, 'board_display': ('board',)}
+
     def get_board_display(self, obj):
         """Get formatted board display."""
         return obj.get_board_display()
+
+
+class UltimateGameSerializer(serializers.ModelSerializer):
+    """
+    Serializer for UltimateGame.
+
+    Sub-boards are nine-character strings; ``meta_board`` marks won
+    sub-boards with 'X'/'O' and drawn ones with 'D'.
+    """
+
+    boards = serializers.ListField(source='get_boards', child=serializers.CharField(), read_only=True)
+    meta_board = serializers.CharField(source='get_meta_board', read_only=True)
+    legal_moves = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UltimateGame
+        fields = [
+            'id', 'boards', 'meta_board', 'forced_board', 'current_player', 'status',
+            'legal_moves', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+    def get_legal_moves(self, obj):
+        return [list(move) for move in obj.legal_moves()]
+
+
+class UltimateMoveSerializer(serializers.Serializer):
+    """Serializer for a move in an ultimate game."""
+
+    board = serializers.IntegerField(min_value=0, max_value=8)
+    position = serializers.IntegerField(min_value=0, max_value=8)
+
+
+class MatchmakingJoinSerializer(serializers.Serializer):
+    """Serializer for joining the matchmaking queue."""
+
+    player = serializers.CharField(max_length=100, required=False)
+
+
+class PlayerSerializer(serializers.Serializer):
+    """Serializer for a user's player profile and record."""
+
+    id = serializers.IntegerField(source='pk', read_only=True)
+    username = serializers.CharField(source='get_username', read_only=True)
+    wins = serializers.SerializerMethodField()
+    losses = serializers.SerializerMethodField()
+    draws = serializers.SerializerMethodField()
+
+    def get_wins(self, obj):
+        return PlayerStats.for_user(obj).wins
+
+    def get_losses(self, obj):
+        return PlayerStats.for_user(obj).losses
+
+    def get_draws(self, obj):
+        return PlayerStats.for_user(obj).draws
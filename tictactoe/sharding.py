@@ -0,0 +1,224 @@
+"""
+Optional horizontal sharding of games across database aliases.
+
+With ``TICTACTOE_SHARDS = ['shard0', 'shard1', ...]`` every new game is
+placed on one shard, and its public ID encodes where it lives::
+
+    public_id = (local_pk << SHARD_BITS) | shard_index
+
+so a lookup goes straight to one database without a directory table. Each
+shard keeps its own auto-increment sequence; the shard list is
+append-only, because an alias's position in it is part of every ID.
+
+The highest index, ``DEFAULT_INDEX``, is reserved for games on the default
+database, which stays addressable next to the shards: matchmaking creates
+its games there, beside the tickets that reference them.
+
+Placement is pluggable: ``TICTACTOE_SHARD_PLACEMENT`` names a built-in
+policy (``'round_robin'`` or ``'least_loaded'``) or gives the dotted path
+to a callable ``policy(shards) -> alias``.
+
+When ``TICTACTOE_SHARDS`` is empty (the default) sharding is off and public
+IDs equal primary keys.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .conf import get_setting
+from .models import Game
+
+SHARD_BITS = 10
+SHARD_MASK = (1 << SHARD_BITS) - 1
+# Shard index of games on the default database while sharding is on
+DEFAULT_INDEX = SHARD_MASK
+MAX_SHARDS = DEFAULT_INDEX
+
+
+def shard_aliases() -> List[str]:
+    """Return the configured shard aliases; empty when sharding is off."""
+    shards = list(get_setting('SHARDS'))
+    if len(shards) > MAX_SHARDS:
+        raise ValueError(f"At most {MAX_SHARDS} shards are supported")
+    return shards
+
+
+def game_aliases() -> List[str]:
+    """Return every alias that may hold games: the default database, then the shards."""
+    return [DEFAULT_DB_ALIAS, *(alias for alias in shard_aliases() if alias != DEFAULT_DB_ALIAS)]
+
+
+def public_id_from(alias: Optional[str], pk: int) -> int:
+    """Return the public ID of the game with local ``pk`` on ``alias``."""
+    shards = shard_aliases()
+    if not shards:
+        return pk
+    if alias in shards:
+        return (pk << SHARD_BITS) | shards.index(alias)
+    # The default database, or a replica of it
+    return (pk << SHARD_BITS) | DEFAULT_INDEX
+
+
+def public_id_for(game: Game) -> Optional[int]:
+    """Return the ID clients use for ``game``."""
+    if game.pk is None:
+        return None
+    return public_id_from(game._state.db, game.pk)
+
+
+def locate(public_id: int) -> Tuple[Optional[str], int]:
+    """
+    Return ``(alias, local_pk)`` for a public ID.
+
+    The alias is None for games on the default database (every game when
+    sharding is off), leaving the choice of default or replica to the
+    router. Raises ``Game.DoesNotExist`` for IDs that point at no
+    configured shard.
+    """
+    shards = shard_aliases()
+    if not shards:
+        return None, public_id
+    index = public_id & SHARD_MASK
+    if public_id < 0:
+        raise Game.DoesNotExist(f"No shard for game {public_id}")
+    if index == DEFAULT_INDEX and DEFAULT_DB_ALIAS not in shards:
+        return None, public_id >> SHARD_BITS
+    if index >= len(shards):
+        raise Game.DoesNotExist(f"No shard for game {public_id}")
+    return shards[index], public_id >> SHARD_BITS
+
+
+def get_game(public_id: int, queryset=None) -> Game:
+    """Load a game by public ID from the shard that holds it."""
+    alias, pk = locate(public_id)
+    if queryset is None:
+        queryset = Game.objects.all()
+    if alias is not None:
+        queryset = queryset.using(alias)
+    return queryset.get(pk=pk)
+
+
+def get_games(public_ids: Iterable[int], queryset=None) -> Dict[int, Game]:
+    """
+    Load many games by public ID with one ``in_bulk`` query per shard.
+
+    IDs that match no game (or no shard) are left out of the result.
+    """
+    if queryset is None:
+        queryset = Game.objects.all()
+    by_alias = defaultdict(dict)
+    for public_id in public_ids:
+        try:
+            alias, pk = locate(public_id)
+        except Game.DoesNotExist:
+            continue
+        by_alias[alias][pk] = public_id
+    games = {}
+    for alias, public_ids_by_pk in by_alias.items():
+        shard_games = queryset.using(alias) if alias is not None else queryset
+        for pk, game in shard_games.in_bulk(list(public_ids_by_pk)).items():
+            games[public_ids_by_pk[pk]] = game
+    return games
+
+
+_round_robin_counter = itertools.count()
+_round_robin_lock = threading.Lock()
+
+
+def round_robin(shards: List[str]) -> str:
+    """Cycle through the shards in order (per process)."""
+    with _round_robin_lock:
+        return shards[next(_round_robin_counter) % len(shards)]
+
+
+# Per-process estimate of the games in progress on each shard, and when it
+# was last counted (time.monotonic())
+_shard_loads: Dict[str, int] = {}
+_shard_loads_at = 0.0
+_shard_loads_lock = threading.Lock()
+
+
+def least_loaded(shards: List[str]) -> str:
+    """
+    Pick the shard with the fewest games in progress.
+
+    Counting them is a ``COUNT(*)`` on every shard, so this process counts
+    at most every ``TICTACTOE_SHARD_LOAD_TTL`` seconds. In between, each
+    placement adds one to its shard's count, so bursts still spread out.
+    Games finished or placed by other processes show up at the next count.
+    """
+    global _shard_loads_at
+    now = time.monotonic()
+    with _shard_loads_lock:
+        if now - _shard_loads_at >= get_setting('SHARD_LOAD_TTL') or set(_shard_loads) != set(shards):
+            _shard_loads.clear()
+            for alias in shards:
+                _shard_loads[alias] = Game.objects.using(alias).filter(
+                    status=Game.STATUS_IN_PROGRESS
+                ).count()
+            _shard_loads_at = now
+        alias = min(shards, key=_shard_loads.__getitem__)
+        _shard_loads[alias] += 1
+    return alias
+
+
+@receiver(setting_changed)
+def _reset_shard_loads(setting, **kwargs):
+    global _shard_loads_at
+    if setting.startswith('TICTACTOE_SHARD'):
+        with _shard_loads_lock:
+            _shard_loads.clear()
+            _shard_loads_at = 0.0
+
+
+PLACEMENT_POLICIES = {
+    'round_robin': round_robin,
+    'least_loaded': least_loaded,
+}
+
+
+def place_game() -> Optional[str]:
+    """Return the alias a new game should be created on, or None if unsharded."""
+    shards = shard_aliases()
+    if not shards:
+        return None
+    policy = get_setting('SHARD_PLACEMENT')
+    if not callable(policy):
+        policy = PLACEMENT_POLICIES.get(policy) or import_string(policy)
+    return policy(shards)
+
+
+def create_game(**fields) -> Game:
+    """Create a game on the shard chosen by the placement policy."""
+    return Game.objects.using(place_game()).create(**fields)
+
+
+def recent_games(limit: int) -> List[Game]:
+    """
+    Return the ``limit`` newest unarchived games across all shards.
+
+    Each database streams at most ``limit`` rows from its
+    ``(is_archived, -created_at)`` index and ``heapq.merge`` combines the
+    streams, so no shard is read in full. The default database is merged
+    in too, for the games matchmaking creates there.
+    """
+    listed = Game.objects.filter(is_archived=False).order_by('-created_at', '-pk')
+    if not shard_aliases():
+        return list(listed[:limit])
+    streams = [
+        # The router picks the default database or a replica of it
+        (listed if alias == DEFAULT_DB_ALIAS else listed.using(alias))[:limit].iterator(chunk_size=limit)
+        for alias in game_aliases()
+    ]
+    merged = heapq.merge(
+        *streams, key=lambda game: (game.created_at, public_id_for(game)), reverse=True
+    )
+    return list(itertools.islice(merged, limit))
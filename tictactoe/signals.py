@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent inside the transaction that saves a game's finishing move, or that
+# times it out (tictactoe.clock) or force-finishes it (admin), with ``game``.
+# Games finished without saving (e.g. tournament play in memory) do not
+# send it.
+game_finished = Signal()
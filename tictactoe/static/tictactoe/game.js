@@ -2,6 +2,66 @@ const TicTacToe = {
     apiBaseUrl: '/tictactoe/api',
     currentGameId: null,
     csrfToken: null,  // Will be set by template
+    state: null,  // Last game state rendered on the board
+    movePending: false,
+
+    // Mirror of Game.WINNING_COMBINATIONS in models.py
+    winningCombinations: [
+        [0, 1, 2], [3, 4, 5], [6, 7, 8],
+        [0, 3, 6], [1, 4, 7], [2, 5, 8],
+        [0, 4, 8], [2, 4, 6],
+    ],
+
+    checkWinner(board) {
+        for (const [a, b, c] of this.winningCombinations) {
+            if (board[a] && board[a] === board[b] && board[a] === board[c]) {
+                return board[a];
+            }
+        }
+        return null;
+    },
+
+    isDraw(board) {
+        return !board.includes(null) && this.checkWinner(board) === null;
+    },
+
+    /**
+     * Apply a move locally using the same rules as Game.make_move.
+     * Returns {state} with the new game state, or {error} if the move is illegal.
+     */
+    applyMove(gameData, position) {
+        if (gameData.status !== 'in_progress') {
+            return { error: 'Game is already finished' };
+        }
+        if (!Number.isInteger(position) || position < 0 || position > 8) {
+            return { error: 'Position must be between 0 and 8' };
+        }
+        if (gameData.board[position] !== null) {
+            return { error: 'Position already occupied' };
+        }
+
+        const board = gameData.board.slice();
+        board[position] = gameData.current_player;
+
+        const winner = this.checkWinner(board);
+        let status = 'in_progress';
+        if (winner === 'X') {
+            status = 'x_wins';
+        } else if (winner === 'O') {
+            status = 'o_wins';
+        } else if (this.isDraw(board)) {
+            status = 'draw';
+        }
+
+        let currentPlayer = gameData.current_player;
+        if (status === 'in_progress') {
+            currentPlayer = currentPlayer === 'X' ? 'O' : 'X';
+        }
+
+        return {
+            state: { ...gameData, board, status, current_player: currentPlayer },
+        };
+    },
 
     async createGame() {
         try {
@@ -51,6 +111,24 @@ const TicTacToe = {
     },
 
     async makeMove(gameId, position) {
+        if (this.movePending) {
+            this.showError('Waiting for the previous move');
+            return null;
+        }
+
+        // Reject illegal moves locally and render legal ones before the
+        // server answers; roll back if the server disagrees.
+        const previous = this.state;
+        if (previous) {
+            const result = this.applyMove(previous, position);
+            if (result.error) {
+                this.showError(result.error);
+                return null;
+            }
+            this.updateBoard(result.state);
+        }
+
+        this.movePending = true;
         try {
             const headers = {
                 'Content-Type': 'application/json',
@@ -70,19 +148,33 @@ const TicTacToe = {
 
             if (response.ok) {
                 this.updateBoard(data);
-                this.showMessage(data.message || 'Move successful', 'success');
+                if (data.status === 'in_progress') {
+                    this.showMessage(data.message || 'Move successful', 'success');
+                }
                 return data;
             } else {
+                this.rollback(previous);
                 this.showError(data.error || 'Invalid move');
                 return null;
             }
         } catch (error) {
+            this.rollback(previous);
             this.showError('Network error: ' + error.message);
             return null;
+        } finally {
+            this.movePending = false;
+        }
+    },
+
+    rollback(previous) {
+        if (previous) {
+            this.updateBoard(previous);
         }
     },
 
     updateBoard(gameData) {
+        this.state = gameData;
+
         // Update board cells
         const cells = document.querySelectorAll('.cell');
         cells.forEach((cell, index) => {
@@ -110,7 +202,8 @@ const TicTacToe = {
                 'in_progress': 'In Progress',
                 'x_wins': 'X Wins!',
                 'o_wins': 'O Wins!',
-                'draw': 'Draw'
+                'draw': 'Draw',
+                'timeout': 'Timed Out'
             }[gameData.status];
             statusEl.textContent = statusText;
             statusEl.className = `value status-${gameData.status}`;
@@ -121,7 +214,8 @@ const TicTacToe = {
             const messages = {
                 'x_wins': '🎉 Player X wins!',
                 'o_wins': '🎉 Player O wins!',
-                'draw': '🤝 It\'s a draw!'
+                'draw': '🤝 It\'s a draw!',
+                'timeout': `⏱ Player ${gameData.current_player} ran out of time`
             };
             this.showMessage(messages[gameData.status], 'success');
         }
@@ -143,11 +237,15 @@ const TicTacToe = {
         this.showMessage(text, 'error');
     },
 
-    initGame(gameId) {
+    initGame(gameId, initialState = null) {
         this.currentGameId = gameId;
 
-        // Load initial game state
-        this.loadGame(gameId);
+        // Use the state embedded by the template; only fetch if it is missing
+        if (initialState) {
+            this.updateBoard(initialState);
+        } else {
+            this.loadGame(gameId);
+        }
 
         // Setup cell click handlers
         const board = document.getElementById('game-board');
@@ -0,0 +1,52 @@
+"""
+Built-in bot strategies.
+
+A strategy is a callable ``strategy(board, player) -> position`` that picks
+an empty cell for ``player`` ('X' or 'O') on a nine-cell board. Strategies
+used by ``manage.py run_tournament`` are referenced by dotted path, so they
+must be importable module-level functions.
+"""
+import random
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from .models import Game
+
+
+def _empty_cells(board) -> List[int]:
+    return [position for position, cell in enumerate(board) if cell is None]
+
+
+def _winner(board) -> Optional[str]:
+    for a, b, c in Game.WINNING_COMBINATIONS:
+        if board[a] is not None and board[a] == board[b] == board[c]:
+            return board[a]
+    return None
+
+
+def random_strategy(board, player: str) -> int:
+    """Play a uniformly random empty cell."""
+    return random.choice(_empty_cells(board))
+
+
+def minimax_strategy(board, player: str) -> int:
+    """Play a perfect move, preferring faster wins and slower losses."""
+    return _negamax(tuple(board), player)[1]
+
+
+@lru_cache(maxsize=None)
+def _negamax(board: Tuple, player: str) -> Tuple[int, int]:
+    """Return (score, move) for ``player`` to move; positive scores win."""
+    opponent = Game.PLAYER_O if player == Game.PLAYER_X else Game.PLAYER_X
+    best_score, best_move = -100, -1
+    for position in _empty_cells(board):
+        child = board[:position] + (player,) + board[position + 1:]
+        if _winner(child) == player:
+            score = 10 + child.count(None)
+        elif None not in child:
+            score = 0
+        else:
+            score = -_negamax(child, opponent)[0]
+        if score > best_score:
+            best_score, best_move = score, position
+    return best_score, best_move
@@ -0,0 +1,314 @@
+"""
+Post-game task pipeline.
+
+When a game finishes, ``Game.save()`` sends ``game_finished`` inside the
+transaction that stores the final move. The receiver here writes one
+``OutboxTask`` row per handler in ``TICTACTOE_TASK_HANDLERS``, in the same
+transaction on the game's own database (its shard, when sharding is on),
+and after that transaction commits hands the rows to a small thread pool:
+
+* a dispatcher thread drains a bounded queue into batches of up to
+  ``TICTACTOE_TASK_BATCH_SIZE`` tasks per handler, waiting at most
+  ``TICTACTOE_TASK_BATCH_WAIT`` seconds for a batch to fill;
+* each batch runs on a ``ThreadPoolExecutor`` with a bounded number of
+  batches in flight, so a slow handler applies back-pressure to the queue
+  rather than growing memory;
+* a handler is called once per batch as ``handler(games)`` and its outbox
+  rows are deleted when it returns.
+
+Before running a batch the worker leases its rows for
+``TICTACTOE_TASK_LEASE`` seconds, so ``process_outbox`` and the pipeline
+never run the same task at once. The handler runs in a transaction on the
+default database, nested in one on the task's database that DELETEs its
+rows: if the handler fails, its writes roll back and the rows stay. For
+games on the default database the two are one transaction, so handlers
+that only write to it (such as ``update_player_stats``) take effect
+exactly once. For games on a shard the handler's writes commit first, so
+a crash between the two commits runs the task again.
+
+If the queue is full, or the process dies, tasks simply stay in the outbox
+and ``manage.py process_outbox`` runs them later once their lease ends.
+Handlers with side effects outside the database get at-least-once delivery.
+
+With ``TICTACTOE_TASKS_SYNC = True`` handlers run immediately in the
+saving thread, which is what the test settings use.
+"""
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .conf import get_setting
+from .models import Game, OutboxTask, PlayerStats
+from .sharding import game_aliases
+from .signals import game_finished
+
+logger = logging.getLogger(__name__)
+
+
+def update_player_stats(games: List[Game]) -> None:
+    """Add the results of ``games`` to PlayerStats, one UPDATE per user and counter."""
+    totals = Counter()
+    for game in games:
+        totals.update(game.result_counters())
+    for (user_id, counter), amount in totals.items():
+        PlayerStats.increment(user_id, counter, amount)
+
+
+class Metrics:
+    """Counters and per-handler latency, safe to read from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = Counter()
+        self.latency: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def observe(self, handler: str, seconds: float, tasks: int) -> None:
+        with self._lock:
+            stats = self.latency.setdefault(
+                handler, {'batches': 0, 'tasks': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+            )
+            stats['batches'] += 1
+            stats['tasks'] += tasks
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'latency': {name: dict(stats) for name, stats in self.latency.items()},
+            }
+
+
+metrics = Metrics()
+
+
+def load_games(tasks: Iterable[OutboxTask]) -> Dict[int, Game]:
+    """Return ``{task.pk: game}``, with one ``in_bulk`` query per database."""
+    by_database = defaultdict(list)
+    for task in tasks:
+        by_database[task.database].append(task)
+    games = {}
+    for database, database_tasks in by_database.items():
+        found = Game.objects.using(database).in_bulk([task.game_id for task in database_tasks])
+        for task in database_tasks:
+            if task.game_id in found:
+                games[task.pk] = found[task.game_id]
+    return games
+
+
+def claim(task_ids: List[int], using: str = DEFAULT_DB_ALIAS) -> List[OutboxTask]:
+    """Lease the tasks on ``using`` that no other worker holds; return the ones leased."""
+    token = uuid.uuid4()
+    now = timezone.now()
+    outbox = OutboxTask.objects.using(using)
+    outbox.filter(
+        Q(leased_until__isnull=True) | Q(leased_until__lt=now), pk__in=task_ids,
+    ).update(lease_token=token, leased_until=now + timedelta(seconds=get_setting('TASK_LEASE')))
+    return list(outbox.filter(pk__in=task_ids, lease_token=token))
+
+
+def run_batch(handler_path: str, task_ids: List[int], using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Run one handler over a batch of outbox tasks on ``using``; return whether it succeeded."""
+    tasks = claim(task_ids, using)
+    if not tasks:
+        return True
+    claimed = OutboxTask.objects.using(using).filter(
+        pk__in=[task.pk for task in tasks], lease_token=tasks[0].lease_token
+    )
+    games = load_games(tasks)
+    start = time.perf_counter()
+    try:
+        # Completing the tasks commits together with the handler's writes
+        # (just after them, for tasks on a shard)
+        with transaction.atomic(using=using), transaction.atomic():
+            import_string(handler_path)(list(games.values()))
+            claimed.delete()
+    except Exception as e:
+        logger.exception("Task handler %s failed", handler_path)
+        claimed.update(
+            attempts=F('attempts') + 1, last_error=repr(e), lease_token=None, leased_until=None
+        )
+        metrics.incr('failed', len(tasks))
+        return False
+    finally:
+        metrics.observe(handler_path, time.perf_counter() - start, len(tasks))
+    metrics.incr('processed', len(tasks))
+    return True
+
+
+class TaskPipeline:
+    """Bounded queue, batching dispatcher thread and worker pool."""
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 batch_size: Optional[int] = None, batch_wait: Optional[float] = None):
+        self.workers = workers or get_setting('TASK_WORKERS')
+        self.batch_size = batch_size or get_setting('TASK_BATCH_SIZE')
+        self.batch_wait = get_setting('TASK_BATCH_WAIT') if batch_wait is None else batch_wait
+        self._queue = queue.Queue(maxsize=queue_size or get_setting('TASK_QUEUE_SIZE'))
+        self._in_flight = threading.BoundedSemaphore(self.workers * 2)
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='tictactoe-tasks')
+        self._stop = threading.Event()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name='tictactoe-tasks-dispatch', daemon=True
+        )
+        self._dispatcher.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, handler_path: str, task_id: int, using: str = DEFAULT_DB_ALIAS) -> bool:
+        """Queue a task; return False (leaving it in the outbox) if the queue is full."""
+        try:
+            self._queue.put_nowait((handler_path, using, task_id))
+        except queue.Full:
+            metrics.incr('overflowed')
+            return False
+        metrics.incr('queued')
+        return True
+
+    def _next_batch(self) -> List:
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            batches = defaultdict(list)
+            for handler_path, using, task_id in self._next_batch():
+                batches[handler_path, using].append(task_id)
+            for (handler_path, using), task_ids in batches.items():
+                self._in_flight.acquire()
+                future = self._executor.submit(self._run, handler_path, task_ids, using)
+                future.add_done_callback(lambda _: self._in_flight.release())
+
+    def _run(self, handler_path: str, task_ids: List[int], using: str) -> None:
+        try:
+            run_batch(handler_path, task_ids, using)
+        finally:
+            close_old_connections()
+
+    def shutdown(self) -> None:
+        """Finish queued tasks, then stop the threads."""
+        self._stop.set()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+
+_pipeline: Optional[TaskPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline() -> TaskPipeline:
+    """Return the process-wide pipeline, starting it on first use."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = TaskPipeline()
+        return _pipeline
+
+
+def stop_pipeline() -> None:
+    global _pipeline
+    with _pipeline_lock:
+        pipeline, _pipeline = _pipeline, None
+    if pipeline is not None:
+        pipeline.shutdown()
+
+
+def get_metrics() -> dict:
+    """Queue depth, task counters and per-handler latency for monitoring."""
+    snapshot = metrics.snapshot()
+    snapshot['queue_depth'] = _pipeline.queue_depth if _pipeline is not None else 0
+    return snapshot
+
+
+@receiver(game_finished, dispatch_uid='tictactoe-task-outbox')
+def enqueue_game_tasks(sender, game, **kwargs) -> None:
+    """Record the post-game tasks for ``game`` next to it, and schedule them."""
+    using = game._state.db or DEFAULT_DB_ALIAS
+    tasks = [
+        OutboxTask(handler=handler_path, game_id=game.pk, database=using)
+        for handler_path in get_setting('TASK_HANDLERS')
+    ]
+    outbox = OutboxTask.objects.using(using)
+    if connections[using].features.can_return_rows_from_bulk_insert:
+        outbox.bulk_create(tasks)
+    else:
+        # The rows' primary keys are needed to run them
+        for task in tasks:
+            task.save(using=using)
+    if get_setting('TASKS_SYNC'):
+        for task in tasks:
+            run_batch(task.handler, [task.pk], using)
+        return
+
+    def submit():
+        pipeline = get_pipeline()
+        for task in tasks:
+            pipeline.submit(task.handler, task.pk, using)
+
+    transaction.on_commit(submit, using=using)
+
+
+def process_outbox(min_age: float = 0, batch_size: Optional[int] = None,
+                   max_attempts: Optional[int] = None) -> Dict[str, int]:
+    """
+    Run outbox tasks older than ``min_age`` seconds in the current thread.
+
+    Covers the outbox on the default database and on every shard. Tasks
+    that already failed ``max_attempts`` times are left for a human, and
+    tasks leased by a running worker are skipped. Returns the number of
+    tasks processed and failed.
+    """
+    batch_size = batch_size or get_setting('TASK_BATCH_SIZE')
+    max_attempts = max_attempts or get_setting('TASK_MAX_ATTEMPTS')
+    now = timezone.now()
+    result = Counter(processed=0, failed=0)
+    for using in game_aliases():
+        pending = OutboxTask.objects.using(using).filter(
+            Q(leased_until__isnull=True) | Q(leased_until__lt=now),
+            created_at__lte=now - timedelta(seconds=min_age),
+            attempts__lt=max_attempts,
+        ).order_by('pk')
+        last_pk = 0
+        while True:
+            chunk = list(pending.filter(pk__gt=last_pk).values_list('pk', 'handler')[:batch_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            by_handler = defaultdict(list)
+            for task_id, handler_path in chunk:
+                by_handler[handler_path].append(task_id)
+            for handler_path, task_ids in by_handler.items():
+                outcome = 'processed' if run_batch(handler_path, task_ids, using) else 'failed'
+                result[outcome] += len(task_ids)
+    return dict(result)
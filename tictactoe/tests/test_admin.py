@@ -0,0 +1,105 @@
+import pytest
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.test import RequestFactory
+
+from tictactoe.admin import EstimatedCountPaginator, GameAdmin
+from tictactoe.bulk import chunked_delete, chunked_update
+from tictactoe.models import Game, PlayerStats
+
+
+@pytest.fixture
+def game_admin():
+    return GameAdmin(Game, AdminSite())
+
+
+@pytest.fixture
+def admin_request():
+    request = RequestFactory().get('/admin/tictactoe/game/')
+    request._messages = CookieStorage(request)
+    return request
+
+
+@pytest.mark.django_db
+class TestGameAdmin:
+    """Test suite for the large-table Game admin."""
+
+    def test_search_exact_id(self, game_admin, admin_request):
+        """Test numeric search is an exact primary-key lookup."""
+        games = [Game.objects.create() for _ in range(12)]
+        queryset, _ = game_admin.get_search_results(
+            admin_request, Game.objects.all(), str(games[0].pk)
+        )
+        assert list(queryset) == [games[0]]
+
+    def test_search_status(self, game_admin, admin_request):
+        """Test status search matches the value or label exactly."""
+        finished = Game.objects.create(status=Game.STATUS_DRAW)
+        Game.objects.create()
+        queryset, _ = game_admin.get_search_results(admin_request, Game.objects.all(), 'Draw')
+        assert list(queryset) == [finished]
+        queryset, _ = game_admin.get_search_results(admin_request, Game.objects.all(), 'dra')
+        assert not queryset.exists()
+
+    def test_delete_selected_removed(self, game_admin, admin_request):
+        """Test the object-loading delete action is not offered."""
+        admin_request.user = type('User', (), {'has_perm': lambda *a: True})()
+        assert 'delete_selected' not in game_admin.get_actions(admin_request)
+
+    def test_archive_action(self, game_admin, admin_request):
+        """Test archiving flags every selected game."""
+        for _ in range(3):
+            Game.objects.create()
+        game_admin.archive_games(admin_request, Game.objects.all())
+        assert Game.objects.filter(is_archived=True).count() == 3
+
+    def test_force_finish_action(self, game_admin, admin_request):
+        """Test force-finish only touches in-progress games."""
+        Game.objects.create()
+        Game.objects.create(status=Game.STATUS_X_WINS)
+        game_admin.force_finish_games(admin_request, Game.objects.all())
+        assert sorted(Game.objects.values_list('status', flat=True)) == ['draw', 'x_wins']
+
+    def test_force_finish_records_draws(self, game_admin, admin_request):
+        """Test force-finished games count as draws in player stats."""
+        User = get_user_model()
+        alice, bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        Game.objects.create(player_x=alice, player_o=bob)
+        game_admin.force_finish_games(admin_request, Game.objects.all())
+        assert PlayerStats.objects.get(user=alice).draws == 1
+        assert PlayerStats.objects.get(user=bob).draws == 1
+
+    def test_delete_finished_action(self, game_admin, admin_request):
+        """Test only finished games are deleted."""
+        active = Game.objects.create()
+        Game.objects.create(status=Game.STATUS_DRAW)
+        game_admin.delete_finished_games(admin_request, Game.objects.all())
+        assert list(Game.objects.all()) == [active]
+
+    def test_paginator_falls_back_to_count(self):
+        """Test the paginator counts exactly where no estimate exists."""
+        Game.objects.create()
+        paginator = EstimatedCountPaginator(Game.objects.all(), 100)
+        assert paginator.count == 1
+
+
+@pytest.mark.django_db
+class TestChunkedOperations:
+    """Test suite for chunked bulk helpers."""
+
+    def test_chunked_update_issues_one_update_per_chunk(self, django_assert_num_queries):
+        """Test updates run as bounded statements."""
+        for _ in range(5):
+            Game.objects.create()
+        # Three pk pages plus the empty terminating page, and three UPDATEs.
+        with django_assert_num_queries(7):
+            updated = chunked_update(Game.objects.all(), chunk_size=2, is_archived=True)
+        assert updated == 5
+
+    def test_chunked_delete(self):
+        """Test deletes cover the whole queryset."""
+        for _ in range(5):
+            Game.objects.create()
+        assert chunked_delete(Game.objects.all(), chunk_size=2) == 5
+        assert not Game.objects.exists()
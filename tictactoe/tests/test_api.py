@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
 from tictactoe.models import Game
@@ -32,6 +34,14 @@ class TestGameAPI:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data) == 2
 
+    def test_list_hides_archived_games(self):
+        """Test archived games are left out of the list but still retrievable."""
+        listed = Game.objects.create()
+        archived = Game.objects.create(is_archived=True)
+        response = self.client.get(self.base_url)
+        assert [game['id'] for game in response.data] == [listed.id]
+        assert self.client.get(f'{self.base_url}{archived.id}/').status_code == status.HTTP_200_OK
+
     def test_list_games_empty(self):
         """Test listing games when none exist."""
         response = self.client.get(self.base_url)
@@ -269,3 +279,269 @@ class TestGameSerializer:
         # Invalid - missing
         serializer = MoveSerializer(data={})
         assert not serializer.is_valid()
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+    """Test suite for ?fields= selection and the compact format."""
+
+    def setup_method(self):
+        """Setup test client before each test."""
+        self.client = APIClient()
+        self.base_url = '/tictactoe/api/games/'
+
+    def test_retrieve_selected_fields(self):
+        """Test ?fields= returns only the requested fields."""
+        game = Game.objects.create()
+        game.make_move(4)
+        response = self.client.get(
+            f'{self.base_url}{game.id}/?fields=board,current_player,status'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data) == {'board', 'current_player', 'status'}
+        assert response.data['board'][4] == 'X'
+
+    def test_list_selected_fields(self):
+        """Test ?fields= applies to every game in a list."""
+        Game.objects.create()
+        Game.objects.create()
+        response = self.client.get(f'{self.base_url}?fields=id,status')
+        assert [set(game) for game in response.data] == [{'id', 'status'}] * 2
+
+    def test_selected_fields_limit_columns(self):
+        """Test the SELECT only reads the requested columns."""
+        game = Game.objects.create()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'{self.base_url}{game.id}/?fields=status')
+        select = queries.captured_queries[-1]['sql']
+        assert '"status"' in select
+        assert '"board"' not in select
+        assert '"created_at"' not in select
+
+    def test_board_display_needs_board(self):
+        """Test board_display still works when it is the only field."""
+        game = Game.objects.create()
+        response = self.client.get(f'{self.base_url}{game.id}/?fields=board_display')
+        assert set(response.data) == {'board_display'}
+        assert response.data['board_display'] == game.get_board_display()
+
+    def test_unknown_field_rejected(self):
+        """Test unknown field names return 400."""
+        game = Game.objects.create()
+        response = self.client.get(f'{self.base_url}{game.id}/?fields=status,bogus')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'fields' in response.data
+
+    def test_unknown_field_rejected_before_create(self):
+        """Test a create with unknown fields makes no game and stores no replay."""
+        for _ in range(2):
+            response = self.client.post(
+                f'{self.base_url}?fields=bogus', format='json', HTTP_IDEMPOTENCY_KEY='retry-me'
+            )
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert 'Idempotent-Replayed' not in response
+        assert not Game.objects.exists()
+
+    def test_compact_board(self):
+        """Test ?format=compact sends the board as a nine-character string."""
+        game = Game.objects.create()
+        game.make_move(0)
+        game.make_move(2)
+        response = self.client.get(f'{self.base_url}{game.id}/?format=compact')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['board'] == 'X.O......'
+
+    def test_compact_with_fields(self):
+        """Test compact format and field selection combine."""
+        game = Game.objects.create()
+        response = self.client.get(
+            f'{self.base_url}{game.id}/?format=compact&fields=board,status'
+        )
+        assert response.json() == {'board': '.........', 'status': 'in_progress'}
+
+    def test_compact_move_response(self):
+        """Test moves can also be answered in the compact format."""
+        game = Game.objects.create()
+        response = self.client.post(
+            f'{self.base_url}{game.id}/move/?format=compact&fields=board,status',
+            {'position': 8}, format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            'board': '........X', 'status': 'in_progress', 'message': 'Move successful',
+        }
+
+    def test_default_format_unchanged(self):
+        """Test the plain JSON response keeps the board as a list."""
+        game = Game.objects.create()
+        response = self.client.get(f'{self.base_url}{game.id}/')
+        assert response.json()['board'] == [None] * 9
+        assert 'board_display' in response.json()
+
+
+@pytest.mark.django_db
+class TestBulkRetrieve:
+    """Test suite for GET/POST /api/games/bulk/."""
+
+    def setup_method(self):
+        """Setup test client before each test."""
+        self.client = APIClient()
+        self.url = '/tictactoe/api/games/bulk/'
+
+    def test_get_many_games(self, django_assert_num_queries):
+        """Test games come back keyed by ID from a single query."""
+        games = [Game.objects.create() for _ in range(3)]
+        ids = ','.join(str(game.id) for game in games)
+        with django_assert_num_queries(1):
+            response = self.client.get(f'{self.url}?ids={ids}')
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.data) == [str(game.id) for game in games]
+        for game in games:
+            entry = response.data[str(game.id)]
+            assert entry['id'] == game.id
+            assert entry['etag'] == f'"{game.id}:{game.version}"'
+        assert 'Last-Modified' in response
+
+    def test_post_body(self):
+        """Test IDs can be sent in a POST body."""
+        game = Game.objects.create()
+        response = self.client.post(self.url, {'ids': [game.id]}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[str(game.id)]['board'] == [None] * 9
+
+    def test_missing_marker(self):
+        """Test unknown IDs map to a missing marker."""
+        game = Game.objects.create()
+        response = self.client.get(f'{self.url}?ids={game.id},99999')
+        assert response.data['99999'] == {'missing': True}
+        assert response.data[str(game.id)]['id'] == game.id
+
+    def test_duplicate_ids_collapsed(self):
+        """Test repeated IDs are returned once."""
+        game = Game.objects.create()
+        response = self.client.get(f'{self.url}?ids={game.id},{game.id}')
+        assert list(response.data) == [str(game.id)]
+
+    def test_invalid_ids(self):
+        """Test missing or malformed ids return 400."""
+        assert self.client.get(self.url).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.client.get(f'{self.url}?ids=1,x').status_code == status.HTTP_400_BAD_REQUEST
+        response = self.client.post(self.url, {'ids': []}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_max_ids(self, settings):
+        """Test requests over TICTACTOE_BULK_MAX_IDS are rejected."""
+        settings.TICTACTOE_BULK_MAX_IDS = 2
+        response = self.client.get(f'{self.url}?ids=1,2,3')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_if_none_match_marks_unchanged(self):
+        """Test games matching a sent etag are marked not_modified."""
+        unchanged = Game.objects.create()
+        changed = Game.objects.create()
+        etags = self.client.get(f'{self.url}?ids={unchanged.id},{changed.id}').data
+        changed.make_move(0)
+
+        response = self.client.get(
+            f'{self.url}?ids={unchanged.id},{changed.id}',
+            HTTP_IF_NONE_MATCH=', '.join(entry['etag'] for entry in etags.values()),
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[str(unchanged.id)] == {'not_modified': True}
+        assert response.data[str(changed.id)]['board'][0] == 'X'
+
+    def test_all_unchanged_returns_304(self):
+        """Test a 304 when every requested game is unchanged."""
+        games = [Game.objects.create() for _ in range(2)]
+        ids = ','.join(str(game.id) for game in games)
+        etags = [entry['etag'] for entry in self.client.get(f'{self.url}?ids={ids}').data.values()]
+        response = self.client.get(f'{self.url}?ids={ids}', HTTP_IF_NONE_MATCH=', '.join(etags))
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_missing_games_prevent_304(self):
+        """Test missing IDs are still reported when the rest are unchanged."""
+        game = Game.objects.create()
+        response = self.client.get(f'{self.url}?ids={game.id},99999', HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {str(game.id): {'not_modified': True}, '99999': {'missing': True}}
+
+    def test_if_modified_since(self):
+        """Test If-Modified-Since skips games not updated since then."""
+        game = Game.objects.create()
+        last_modified = self.client.get(f'{self.url}?ids={game.id}')['Last-Modified']
+        response = self.client.get(f'{self.url}?ids={game.id}', HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_fields_and_compact(self, django_assert_num_queries):
+        """Test ?fields= and ?format=compact apply to bulk responses."""
+        game = Game.objects.create()
+        game.make_move(4)
+        with django_assert_num_queries(1):
+            response = self.client.get(
+                f'{self.url}?ids={game.id}&fields=board,status&format=compact'
+            )
+        assert response.json() == {
+            str(game.id): {'board': '....X....', 'status': 'in_progress', 'etag': f'"{game.id}:2"'},
+        }
+
+
+@pytest.mark.django_db
+class TestTimeTravel:
+    """Test suite for ?ply= and the undo action."""
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.url = '/tictactoe/api/games/'
+
+    def test_retrieve_at_ply(self):
+        """Test ?ply=N returns the board after N moves."""
+        game = Game.objects.create()
+        for position in (4, 0, 8):
+            game.make_move(position)
+        response = self.client.get(f'{self.url}{game.id}/?ply=1')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['board'] == [None] * 4 + ['X'] + [None] * 4
+        assert response.data['ply'] == 1
+        assert response.data['current_player'] == 'O'
+        # The stored game is untouched
+        assert self.client.get(f'{self.url}{game.id}/').data['ply'] == 3
+
+    def test_retrieve_at_ply_with_fields(self, django_assert_num_queries):
+        """Test ?ply= loads the history column along with ?fields=."""
+        game = Game.objects.create()
+        game.make_move(4)
+        with django_assert_num_queries(1):
+            response = self.client.get(f'{self.url}{game.id}/?ply=0&fields=board')
+        assert response.data == {'board': [None] * 9}
+
+    @pytest.mark.parametrize('ply', ['2', '-1', 'x'])
+    def test_retrieve_bad_ply(self, ply):
+        """Test plies outside the game are rejected."""
+        game = Game.objects.create()
+        game.make_move(4)
+        response = self.client.get(f'{self.url}{game.id}/?ply={ply}')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'ply' in response.data['error']
+
+    def test_undo(self):
+        """Test POST undo takes back the last move."""
+        game = Game.objects.create()
+        for position in (0, 3, 1, 4, 2):
+            game.make_move(position)
+        response = self.client.post(f'{self.url}{game.id}/undo/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'in_progress'
+        assert response.data['board'][2] is None
+        assert response.data['current_player'] == 'X'
+        assert response.data['message'] == 'Move undone'
+
+    def test_undo_nothing(self):
+        """Test undo on a new game returns 400."""
+        game = Game.objects.create()
+        response = self.client.post(f'{self.url}{game.id}/undo/')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_undo_not_found(self):
+        """Test undo on a missing game returns 404."""
+        response = self.client.post(f'{self.url}99999/undo/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tictactoe.clock import TimeoutScheduler
+from tictactoe.models import Game
+
+
+def overdue(game, seconds=5):
+    Game.objects.filter(pk=game.pk).update(
+        move_deadline=timezone.now() - timedelta(seconds=seconds)
+    )
+
+
+@pytest.mark.django_db
+class TestMoveClock:
+    """Test suite for per-move time controls on the model."""
+
+    def test_untimed_game_has_no_deadline(self):
+        """Test games without a time limit never get a deadline."""
+        game = Game.objects.create()
+        game.make_move(0)
+        assert game.move_deadline is None
+
+    def test_deadline_set_on_create_and_move(self):
+        """Test each move restarts the clock for the next player."""
+        game = Game.objects.create(move_time_limit=30)
+        first = game.move_deadline
+        assert first is not None
+        game.make_move(0)
+        assert game.move_deadline >= first
+
+    def test_deadline_cleared_when_finished(self):
+        """Test a finished game has no deadline."""
+        game = Game.objects.create(move_time_limit=30)
+        for position in [0, 3, 1, 4, 2]:
+            game.make_move(position)
+        assert game.move_deadline is None
+
+    def test_move_after_deadline_rejected(self):
+        """Test moving after the deadline raises ValidationError."""
+        game = Game.objects.create(move_time_limit=30)
+        game.move_deadline = timezone.now() - timedelta(seconds=1)
+        with pytest.raises(ValidationError, match="Move time limit exceeded"):
+            game.make_move(0)
+
+
+@pytest.mark.django_db
+class TestTimeoutScheduler:
+    """Test suite for the heap-based expiry scheduler."""
+
+    def test_expires_overdue_games(self):
+        """Test overdue in-progress games are marked timed out."""
+        late = Game.objects.create(move_time_limit=30)
+        on_time = Game.objects.create(move_time_limit=30)
+        Game.objects.create()
+        overdue(late)
+
+        scheduler = TimeoutScheduler(horizon=10)
+        assert scheduler.run_pending() == 1
+        late.refresh_from_db()
+        on_time.refresh_from_db()
+        assert late.status == Game.STATUS_TIMEOUT
+        assert late.move_deadline is None
+        assert on_time.status == Game.STATUS_IN_PROGRESS
+
+    def test_only_loads_games_within_horizon(self):
+        """Test the heap holds only deadlines inside the horizon."""
+        Game.objects.create(move_time_limit=5)
+        Game.objects.create(move_time_limit=3600)
+        scheduler = TimeoutScheduler(horizon=60)
+        scheduler.refill()
+        assert len(scheduler) == 1
+
+    def test_scheduled_game_expires_when_due(self):
+        """Test a scheduled deadline expires once its time passes."""
+        game = Game.objects.create(move_time_limit=5)
+        scheduler = TimeoutScheduler(horizon=60)
+        assert scheduler.run_pending() == 0
+        assert scheduler.run_pending(now=timezone.now() + timedelta(seconds=10)) == 1
+        game.refresh_from_db()
+        assert game.status == Game.STATUS_TIMEOUT
+
+    def test_stale_deadline_does_not_expire_game(self):
+        """Test a game that moved since it was scheduled is not expired."""
+        game = Game.objects.create(move_time_limit=5)
+        scheduler = TimeoutScheduler(horizon=60)
+        scheduler.refill()
+        game.move_time_limit = 3600
+        game.make_move(0)
+        assert scheduler.run_pending(now=timezone.now() + timedelta(seconds=10)) == 0
+        game.refresh_from_db()
+        assert game.status == Game.STATUS_IN_PROGRESS
+
+    @pytest.mark.django_db(databases=['default', 'shard0', 'shard1'])
+    def test_expires_games_on_every_shard(self, settings):
+        """Test the sweep covers the shards and the default database."""
+        settings.TICTACTOE_SHARDS = ['shard0', 'shard1']
+        games = [Game.objects.using(alias).create(move_time_limit=30) for alias in ('default', 'shard0', 'shard1')]
+        for game in games:
+            Game.objects.using(game._state.db).filter(pk=game.pk).update(
+                move_deadline=timezone.now() - timedelta(seconds=5)
+            )
+        # Same local pk on every database, distinct public IDs
+        assert len({game.pk for game in games}) == 1
+
+        assert TimeoutScheduler(horizon=10).run_pending() == 3
+        for game in games:
+            game.refresh_from_db()
+            assert game.status == Game.STATUS_TIMEOUT
+
+    def test_expire_games_command(self):
+        """Test the one-shot management command."""
+        overdue(Game.objects.create(move_time_limit=30))
+        out = StringIO()
+        call_command('expire_games', stdout=out)
+        assert 'Expired 1 games' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_create_timed_game_via_api():
+    """Test POST /api/games/ accepts a move time limit."""
+    client = APIClient()
+    response = client.post('/tictactoe/api/games/', {'move_time_limit': 20}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['move_time_limit'] == 20
+    assert response.data['move_deadline'] is not None
+
+    response = client.post('/tictactoe/api/games/', {'move_time_limit': 0}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,140 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from tictactoe.fields import (
+    BoardFormField, board_to_string, decode_board, encode_board, string_to_board,
+)
+from tictactoe.models import Game, UltimateGame
+
+
+class TestBoardEncoding:
+    """Test suite for the packed board helpers."""
+
+    def test_round_trip(self):
+        """Test encoding and decoding are inverse."""
+        board = ['X', None, 'O', None, 'X', None, 'O', None, 'X']
+        assert decode_board(encode_board(board)) == board
+
+    def test_empty_board_is_zero(self):
+        """Test the empty board packs to 0."""
+        assert encode_board([None] * 9) == 0
+
+    def test_full_range_fits_small_integer(self):
+        """Test the largest board code fits a signed SMALLINT."""
+        assert encode_board(['O'] * 9) == 3 ** 9 - 1 < 2 ** 15
+
+    def test_invalid_cell_rejected(self):
+        """Test invalid cells raise ValueError."""
+        with pytest.raises(ValueError):
+            encode_board(['Z'] + [None] * 8)
+
+    def test_string_form(self):
+        """Test the nine-character form."""
+        board = ['X', None, 'O', None, None, 'X', None, None, None]
+        assert board_to_string(board) == 'X.O..X...'
+        assert string_to_board('X.O..X...') == board
+
+    def test_form_field(self):
+        """Test the admin form field edits the string form."""
+        field = BoardFormField()
+        assert field.prepare_value(['X'] + [None] * 8) == 'X........'
+        assert field.clean('x........') == ['X'] + [None] * 8
+        with pytest.raises(ValidationError):
+            field.clean('X')
+
+
+@pytest.mark.django_db
+class TestBoardField:
+    """Test suite for BoardField on the Game model."""
+
+    def test_stored_as_integer(self):
+        """Test the board column holds the packed code."""
+        game = Game.objects.create()
+        game.make_move(1)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT board FROM {Game._meta.db_table} WHERE id = %s', [game.id])
+            assert cursor.fetchone()[0] == 3
+
+    def test_loaded_as_list(self):
+        """Test the board is read back as a mutable list."""
+        game = Game.objects.create()
+        game.make_move(8)
+        game = Game.objects.get(pk=game.pk)
+        assert game.board == [None] * 8 + ['X']
+        game.board[0] = 'O'
+        game.save()
+        assert Game.objects.get(pk=game.pk).board[0] == 'O'
+
+    def test_bulk_create_gets_empty_board(self):
+        """Test unsaved defaults produce a valid board without save()."""
+        Game.objects.bulk_create([Game(), Game()])
+        assert all(game.board == [None] * 9 for game in Game.objects.all())
+
+    def test_empty_list_normalised_on_save(self):
+        """Test board=[] is saved and kept as the empty board, so moves work."""
+        game = Game.objects.create(board=[])
+        assert game.board == [None] * 9
+        game.make_move(0)
+        assert Game.objects.get(pk=game.pk).board[0] == 'X'
+
+    def test_string_normalised_on_save(self):
+        """Test the nine-character form is turned into a list on save."""
+        game = Game.objects.create(board='X........')
+        assert game.board == ['X'] + [None] * 8
+
+    def test_filter_by_board(self):
+        """Test lookups accept a board list."""
+        game = Game.objects.create()
+        game.make_move(4)
+        assert Game.objects.get(board=[None] * 4 + ['X'] + [None] * 4) == game
+
+
+@pytest.mark.django_db(transaction=True)
+def test_compact_board_migration_converts_rows():
+    """Test 0006 packs existing JSON boards and can be reversed."""
+    executor = MigrationExecutor(connection)
+    before = [('tictactoe', '0005_game_version')]
+    after = [('tictactoe', '0006_compact_board')]
+    executor.migrate(before)
+
+    OldGame = executor.loader.project_state(before).apps.get_model('tictactoe', 'Game')
+    boards = [['X', 'O', None, None, 'X', None, None, None, 'O'], [], [None] * 9]
+    for board in boards:
+        OldGame.objects.create(board=board)
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(after)
+    executor.loader.build_graph()
+    NewGame = executor.loader.project_state(after).apps.get_model('tictactoe', 'Game')
+    assert [game.board for game in NewGame.objects.order_by('pk')] == [
+        boards[0], [None] * 9, [None] * 9,
+    ]
+
+    executor.migrate(before)
+    executor.loader.build_graph()
+    assert [game.board for game in OldGame.objects.order_by('pk')] == [
+        boards[0], [None] * 9, [None] * 9,
+    ]
+
+    executor.loader.build_graph()
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+@pytest.mark.django_db
+class TestBitmaskField:
+    """Test suite for BitmaskField on the UltimateGame model."""
+
+    def test_stored_as_hex(self):
+        """Test masks wider than 64 bits are stored as hex text."""
+        game = UltimateGame.objects.create(x_cells=1 << 80)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT x_cells FROM {UltimateGame._meta.db_table} WHERE id = %s', [game.id])
+            assert cursor.fetchone()[0] == '1' + '0' * 20
+        assert UltimateGame.objects.get(pk=game.pk).x_cells == 1 << 80
+
+    def test_out_of_range_rejected(self):
+        """Test masks wider than the field are refused."""
+        with pytest.raises(ValueError):
+            UltimateGame.objects.create(x_cells=1 << 81)
@@ -0,0 +1,352 @@
+import time
+from io import StringIO
+
+import pytest
+from django.contrib.admin.sites import AdminSite
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db.models import F
+from rest_framework import status
+from rest_framework.permissions import BasePermission
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from tictactoe.admin import GameAdmin
+from tictactoe.api import GameViewSet
+from tictactoe.hotstore import (
+    CacheHotStore, LocalHotStore, compact_journal, current_game, evict_idle,
+    get_journal, get_store, play_move, recover_from_journal, undo_move,
+)
+from tictactoe.models import Game
+
+API_URL = '/tictactoe/api/games/'
+
+
+def saved_board(game):
+    return Game.objects.get(pk=game.pk).board
+
+
+class DenyObjects(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return False
+
+
+@pytest.mark.django_db
+class TestHotStore:
+    """Test suite for moves applied through the hot store."""
+
+    @pytest.fixture(autouse=True, params=['LocalHotStore', 'CacheHotStore'])
+    def hot_store(self, request, settings, tmp_path):
+        settings.TICTACTOE_HOT_STORE = f'tictactoe.hotstore.{request.param}'
+        settings.TICTACTOE_HOT_STORE_CHECKPOINT_MOVES = 3
+        settings.TICTACTOE_HOT_STORE_JOURNAL = str(tmp_path / 'moves.journal')
+        yield
+        # Game IDs are reused once each test's transaction rolls back
+        cache.clear()
+
+    def test_backend_selected_by_setting(self, settings):
+        """Test the store class follows TICTACTOE_HOT_STORE."""
+        expected = {'tictactoe.hotstore.LocalHotStore': LocalHotStore,
+                    'tictactoe.hotstore.CacheHotStore': CacheHotStore}
+        assert type(get_store()) is expected[settings.TICTACTOE_HOT_STORE]
+
+    def test_moves_written_behind(self, django_assert_num_queries):
+        """Test moves between checkpoints do not touch the database."""
+        game = Game.objects.create()
+        play_move(game.pk, 0)
+        with django_assert_num_queries(0):
+            play_move(game.pk, 1)
+        assert saved_board(game) == [None] * 9
+        assert current_game(game.pk).board[:2] == ['X', 'O']
+
+    def test_checkpoint_interval(self):
+        """Test the game is saved every HOT_STORE_CHECKPOINT_MOVES moves."""
+        game = Game.objects.create()
+        for position in (0, 1, 2):
+            play_move(game.pk, position)
+        assert saved_board(game)[:3] == ['X', 'O', 'X']
+        play_move(game.pk, 4)
+        assert saved_board(game)[4] is None
+
+    def test_finished_game_saved_before_return(self):
+        """Test the final move is saved synchronously and leaves the store."""
+        game = Game.objects.create()
+        for position in (0, 3, 1, 4):
+            play_move(game.pk, position)
+        finished = play_move(game.pk, 2)
+        assert finished.status == Game.STATUS_X_WINS
+        assert Game.objects.get(pk=game.pk).status == Game.STATUS_X_WINS
+        assert current_game(game.pk) is None
+
+    def test_illegal_move_leaves_state(self):
+        """Test a rejected move raises and changes nothing."""
+        game = Game.objects.create()
+        play_move(game.pk, 4)
+        with pytest.raises(ValidationError, match="Position already occupied"):
+            play_move(game.pk, 4)
+        assert current_game(game.pk).current_player == Game.PLAYER_O
+
+    def test_unknown_game(self):
+        """Test moving in a missing game raises DoesNotExist."""
+        with pytest.raises(Game.DoesNotExist):
+            play_move(99999, 0)
+
+    def test_timed_games_saved_every_move(self):
+        """Test timed games are checkpointed on every move for the move clock."""
+        game = Game.objects.create(move_time_limit=30)
+        play_move(game.pk, 0)
+        assert saved_board(game)[0] == 'X'
+
+    def test_version_advances_between_checkpoints(self):
+        """Test the hot copy's version changes on every move."""
+        game = Game.objects.create()
+        versions = [play_move(game.pk, position).version for position in (0, 1)]
+        assert versions[0] < versions[1]
+
+    def test_api_move_and_retrieve(self):
+        """Test the API moves through the store and reads the hot copy."""
+        game = Game.objects.create()
+        client = APIClient()
+        response = client.post(f'{API_URL}{game.pk}/move/', {'position': 4}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['board'][4] == 'X'
+        assert saved_board(game)[4] is None
+
+        response = client.get(f'{API_URL}{game.pk}/')
+        assert response.data['board'][4] == 'X'
+
+    def test_api_move_errors(self):
+        """Test the API keeps its 400 and 404 responses."""
+        game = Game.objects.create()
+        client = APIClient()
+        client.post(f'{API_URL}{game.pk}/move/', {'position': 4}, format='json')
+        response = client.post(f'{API_URL}{game.pk}/move/', {'position': 4}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = client.post(f'{API_URL}99999/move/', {'position': 0}, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_api_delete_discards_hot_copy(self):
+        """Test deleting a game also forgets its hot copy."""
+        game = Game.objects.create()
+        play_move(game.pk, 0)
+        response = APIClient().delete(f'{API_URL}{game.pk}/')
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert current_game(game.pk) is None
+
+    def test_api_list_and_bulk_read_hot_copies(self):
+        """Test the list and bulk endpoints show moves not yet saved."""
+        game = Game.objects.create()
+        client = APIClient()
+        etag = client.get(f'{API_URL}bulk/?ids={game.pk}').data[str(game.pk)]['etag']
+        play_move(game.pk, 4)
+
+        assert client.get(API_URL).data[0]['board'][4] == 'X'
+        response = client.get(f'{API_URL}bulk/?ids={game.pk}', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[str(game.pk)]['board'][4] == 'X'
+        assert response.data[str(game.pk)]['etag'] != etag
+
+    def test_api_move_and_undo_check_object_permissions(self, monkeypatch):
+        """Test the hot paths still apply the viewset's object permissions."""
+        game = Game.objects.create()
+        play_move(game.pk, 0)
+        monkeypatch.setattr(GameViewSet, 'permission_classes', [DenyObjects])
+        client = APIClient()
+        response = client.post(f'{API_URL}{game.pk}/move/', {'position': 4}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        response = client.post(f'{API_URL}{game.pk}/undo/')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert current_game(game.pk).board[:5] == ['X', None, None, None, None]
+
+    def test_html_list_reads_hot_copies(self, client):
+        """Test the game list page shows the same turn as the API."""
+        game = Game.objects.create()
+        play_move(game.pk, 4)
+        response = client.get('/tictactoe/')
+        assert response.context['games'][0].current_player == Game.PLAYER_O
+
+    @pytest.mark.parametrize('action,changes', [
+        ('archive_games', {'is_archived': True}),
+        ('force_finish_games', {'status': Game.STATUS_DRAW}),
+    ])
+    def test_admin_actions_discard_hot_copies(self, action, changes):
+        """Test admin bulk actions drop hot copies, which later moves cannot undo."""
+        game = Game.objects.create()
+        play_move(game.pk, 0)
+        request = RequestFactory().post('/admin/tictactoe/game/')
+        request._messages = CookieStorage(request)
+        getattr(GameAdmin(Game, AdminSite()), action)(request, Game.objects.filter(pk=game.pk))
+        assert current_game(game.pk) is None
+        for position in (1, 2, 3):
+            try:
+                play_move(game.pk, position)
+            except ValidationError:
+                pass
+        saved = Game.objects.get(pk=game.pk)
+        assert all(getattr(saved, field) == value for field, value in changes.items())
+
+    def test_checkpoint_keeps_outside_archive(self):
+        """Test a stale hot copy does not unarchive the row it is saved to."""
+        game = Game.objects.create()
+        play_move(game.pk, 0)
+        # Another process archives the game without reaching this store
+        Game.objects.filter(pk=game.pk).update(is_archived=True, version=F('version') + 1)
+        for position in (1, 2, 3):
+            play_move(game.pk, position)
+        saved = Game.objects.get(pk=game.pk)
+        assert saved.is_archived
+        # The checkpoint due at the third move finds the row changed: the
+        # stale copy is dropped and that move is played on the row
+        assert current_game(game.pk).board[:4] == [None, None, 'X', 'O']
+
+    def test_checkpoint_keeps_outside_finish(self):
+        """Test a game finished outside the store stays finished."""
+        game = Game.objects.create()
+        play_move(game.pk, 0)
+        Game.objects.filter(pk=game.pk).update(status=Game.STATUS_DRAW, version=F('version') + 1)
+        play_move(game.pk, 1)
+        with pytest.raises(ValidationError, match='finished'):
+            play_move(game.pk, 2)
+        assert Game.objects.get(pk=game.pk).status == Game.STATUS_DRAW
+        assert current_game(game.pk) is None
+
+    def test_checkpoint_does_not_recreate_deleted_game(self):
+        """Test saving a hot copy whose row was deleted does not insert it again."""
+        game = Game.objects.create()
+        play_move(game.pk, 0)
+        Game.objects.filter(pk=game.pk).delete()
+        play_move(game.pk, 1)
+        with pytest.raises(Game.DoesNotExist):
+            play_move(game.pk, 2)
+        assert not Game.objects.filter(pk=game.pk).exists()
+        assert current_game(game.pk) is None
+
+    def test_idle_games_saved_and_evicted(self, settings):
+        """Test an idle hot copy is written back and dropped."""
+        settings.TICTACTOE_HOT_STORE_IDLE_TIMEOUT = 60
+        game = Game.objects.create()
+        play_move(game.pk, 0)
+        assert evict_idle() == 0
+        assert evict_idle(now=time.time() + 61) == 1
+        assert current_game(game.pk) is None
+        assert saved_board(game)[0] == 'X'
+        assert get_store().idle(time.time() + 120) == {}
+
+    def test_idle_games_swept_by_later_moves(self, settings):
+        """Test play_move evicts games this process left idle."""
+        settings.TICTACTOE_HOT_STORE_IDLE_TIMEOUT = 60
+        idle, busy = Game.objects.create(), Game.objects.create()
+        play_move(idle.pk, 0)
+        store = get_store()
+        entry = store.get(idle.pk)
+        entry.touched = time.time() - 61
+        store.set(idle.pk, entry)
+        store.touch(idle.pk, entry.touched)
+        store.next_sweep = 0.0
+        play_move(busy.pk, 0)
+        assert current_game(idle.pk) is None
+        assert saved_board(idle)[0] == 'X'
+        assert current_game(busy.pk) is not None
+
+    def test_compact_journal_keeps_unsaved_moves(self):
+        """Test compaction drops saved moves and keeps the rest replayable."""
+        game = Game.objects.create()
+        for position in (0, 1, 2, 4):
+            play_move(game.pk, position)
+        # Plies 0-2 were checkpointed, ply 3 only lives in memory
+        assert compact_journal() == 3
+        assert get_journal().read() == {game.pk: {3: 4}}
+
+        get_store().delete(game.pk)
+        assert recover_from_journal() == 1
+        assert saved_board(game)[:5] == ['X', 'O', 'X', None, 'O']
+
+    def test_journal_compacted_when_too_large(self, settings):
+        """Test the journal is compacted once it passes its size limit."""
+        settings.TICTACTOE_HOT_STORE_JOURNAL_MAX_BYTES = 20
+        games = [Game.objects.create() for _ in range(3)]
+        for game in games:
+            for position in (0, 3, 1, 4, 2):
+                play_move(game.pk, position)
+        # Earlier games finished and were saved, so their lines are gone
+        assert set(get_journal().read()) <= {games[-1].pk}
+
+    def test_compact_drops_deleted_games(self):
+        """Test lines for games that no longer exist are dropped."""
+        journal = get_journal()
+        journal.append(99999, 0, 4)
+        assert compact_journal() == 1
+        assert journal.read() == {}
+
+    def test_recover_from_journal(self):
+        """Test moves lost with the store are replayed from the journal."""
+        game = Game.objects.create()
+        for position in (0, 1, 2, 4):
+            play_move(game.pk, position)
+        get_store().delete(game.pk)  # the process died
+        assert saved_board(game)[4] is None
+
+        assert recover_from_journal() == 1
+        recovered = Game.objects.get(pk=game.pk)
+        assert recovered.board[:5] == ['X', 'O', 'X', None, 'O']
+        assert recovered.current_player == Game.PLAYER_X
+
+        # The journal is emptied once replayed
+        assert recover_from_journal() == 0
+
+    def test_recover_finishes_game(self):
+        """Test replaying the last move of a game records its result."""
+        game = Game.objects.create()
+        for position in (0, 3, 1, 4, 2):
+            play_move(game.pk, position)
+        Game.objects.filter(pk=game.pk).update(board=[None] * 9, status=Game.STATUS_IN_PROGRESS)
+        recover_from_journal()
+        assert Game.objects.get(pk=game.pk).status == Game.STATUS_X_WINS
+
+    def test_undo_saved_and_journalled(self):
+        """Test an undo is saved at once and not undone by recovery."""
+        game = Game.objects.create()
+        for position in (0, 1):
+            play_move(game.pk, position)
+        game = undo_move(game.pk)
+        assert game.board[:2] == ['X', None]
+        assert saved_board(game)[:2] == ['X', None]
+        assert current_game(game.pk).board[:2] == ['X', None]
+
+        get_store().delete(game.pk)
+        recover_from_journal()
+        assert saved_board(game)[:2] == ['X', None]
+
+    def test_undo_after_clock_timeout_refused(self):
+        """Test undo sees a timeout the move clock wrote behind the hot copy."""
+        game = Game.objects.create(move_time_limit=30)
+        play_move(game.pk, 0)
+        # As written by TimeoutScheduler
+        Game.objects.filter(pk=game.pk).update(
+            status=Game.STATUS_TIMEOUT, move_deadline=None, version=F('version') + 1
+        )
+        with pytest.raises(ValidationError, match='timed out'):
+            undo_move(game.pk)
+        assert Game.objects.get(pk=game.pk).status == Game.STATUS_TIMEOUT
+
+    def test_recover_command(self):
+        """Test manage.py recover_hot_games reports recovered games."""
+        game = Game.objects.create()
+        play_move(game.pk, 0)
+        get_store().delete(game.pk)
+        out = StringIO()
+        call_command('recover_hot_games', stdout=out)
+        assert "Recovered 1 games." in out.getvalue()
+        assert saved_board(game)[0] == 'X'
+
+
+@pytest.mark.django_db
+def test_hot_store_off_by_default():
+    """Test moves are saved directly when no hot store is configured."""
+    game = Game.objects.create()
+    response = APIClient().post(f'{API_URL}{game.pk}/move/', {'position': 0}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert saved_board(game)[0] == 'X'
+    assert get_store() is None
@@ -0,0 +1,158 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from tictactoe.idempotency import (
+    REPLAYED_HEADER, StoredResponse, get_store, request_fingerprint, scoped_key,
+)
+from tictactoe.models import Game, IdempotencyKey
+
+API_URL = '/tictactoe/api/games/'
+
+
+@pytest.mark.django_db
+class TestIdempotencyKeys:
+    """Test suite for Idempotency-Key on create and move."""
+
+    @pytest.fixture(autouse=True, params=['CacheIdempotencyStore', 'DatabaseIdempotencyStore'])
+    def idempotency_store(self, request, settings):
+        settings.TICTACTOE_IDEMPOTENCY_STORE = f'tictactoe.idempotency.{request.param}'
+        self.client = APIClient()
+        yield
+        cache.clear()
+
+    def post(self, url, data=None, key='key-1'):
+        return self.client.post(url, data or {}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_create_returns_same_game(self):
+        """Test a retried create replays the first response without a new game."""
+        first = self.post(API_URL)
+        retry = self.post(API_URL)
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert retry.data['id'] == first.data['id']
+        assert retry[REPLAYED_HEADER] == 'true'
+        assert REPLAYED_HEADER not in first
+        assert Game.objects.count() == 1
+
+    def test_retried_move_replays_success(self):
+        """Test a retried move gets its 200 back instead of "occupied"."""
+        game = Game.objects.create()
+        url = f'{API_URL}{game.public_id}/move/'
+        first = self.post(url, {'position': 4})
+        retry = self.post(url, {'position': 4})
+        assert retry.status_code == status.HTTP_200_OK
+        assert retry.data == first.data
+        assert Game.objects.get(pk=game.pk).board[4] == 'X'
+        assert Game.objects.get(pk=game.pk).current_player == 'O'
+
+    def test_replay_skips_the_view(self, django_assert_max_num_queries):
+        """Test a replay does not load or save the game."""
+        game = Game.objects.create()
+        url = f'{API_URL}{game.public_id}/move/'
+        self.post(url, {'position': 4})
+        # The key lookup with the database store, nothing with the cache
+        with django_assert_max_num_queries(1):
+            self.post(url, {'position': 4})
+
+    def test_requests_without_key_unaffected(self):
+        """Test requests without the header are not stored."""
+        self.client.post(API_URL)
+        self.client.post(API_URL)
+        assert Game.objects.count() == 2
+        assert not IdempotencyKey.objects.exists()
+
+    def test_different_keys_are_independent(self):
+        """Test distinct keys create distinct games."""
+        self.post(API_URL, key='a')
+        self.post(API_URL, key='b')
+        assert Game.objects.count() == 2
+
+    def test_key_reused_for_different_request(self):
+        """Test reusing a key with another body returns 422."""
+        game = Game.objects.create()
+        url = f'{API_URL}{game.public_id}/move/'
+        self.post(url, {'position': 4})
+        response = self.post(url, {'position': 5})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_in_flight_request_conflicts(self):
+        """Test a retry while the first request is running returns 409."""
+        request = Request(APIRequestFactory().post(API_URL, {}, format='json'), parsers=[JSONParser()])
+        # The first request has claimed the key and not finished yet
+        get_store().claim(scoped_key(request, 'key-1'), request_fingerprint(request), 60)
+        response = self.post(API_URL)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert not Game.objects.exists()
+
+    def test_errors_are_replayed(self):
+        """Test a stored 400 is replayed too."""
+        game = Game.objects.create()
+        url = f'{API_URL}{game.public_id}/move/'
+        first = self.post(url, {'position': 9})
+        retry = self.post(url, {'position': 9})
+        assert first.status_code == retry.status_code == status.HTTP_400_BAD_REQUEST
+        assert retry[REPLAYED_HEADER] == 'true'
+
+    def test_key_too_long(self):
+        """Test oversized keys are rejected."""
+        response = self.post(API_URL, key='k' * 256)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Game.objects.exists()
+
+    def test_keys_scoped_per_user(self, django_user_model):
+        """Test two users may use the same key."""
+        for username in ('alice', 'bob'):
+            self.client.force_authenticate(django_user_model.objects.create_user(username))
+            self.post(API_URL)
+        assert Game.objects.count() == 2
+
+
+@pytest.mark.django_db
+class TestDatabaseIdempotencyStore:
+    """Test suite for the IdempotencyKey table store."""
+
+    @pytest.fixture(autouse=True)
+    def database_store(self, settings):
+        settings.TICTACTOE_IDEMPOTENCY_STORE = 'tictactoe.idempotency.DatabaseIdempotencyStore'
+        settings.TICTACTOE_IDEMPOTENCY_TTL = 60
+
+    def test_expired_key_can_be_reused(self):
+        """Test a key past its TTL is claimed afresh."""
+        store = get_store()
+        store.claim('k', 'f1', 60)
+        store.complete('k', StoredResponse('f1', 201, {'id': 1}), 60)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=61))
+        assert store.claim('k', 'f2', 60) is None
+        assert IdempotencyKey.objects.get().fingerprint == 'f2'
+
+    def test_abandoned_claim_taken_over(self):
+        """Test an in-flight claim older than claim_timeout is given up."""
+        store = get_store()
+        store.claim('k', 'f1', 60)
+        assert store.claim('k', 'f1', 60).in_flight
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(seconds=store.claim_timeout + 1)
+        )
+        assert store.claim('k', 'f1', 60) is None
+
+    def test_purge_command(self):
+        """Test purge_idempotency_keys deletes only expired rows."""
+        store = get_store()
+        for key in ('old', 'new'):
+            store.claim(key, 'f', 60)
+            store.complete(key, StoredResponse('f', 200, {}), 60)
+        IdempotencyKey.objects.filter(key='old').update(
+            created_at=timezone.now() - timedelta(seconds=61)
+        )
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        assert 'Deleted 1' in out.getvalue()
+        assert list(IdempotencyKey.objects.values_list('key', flat=True)) == ['new']
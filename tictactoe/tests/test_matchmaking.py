@@ -0,0 +1,188 @@
+import itertools
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tictactoe import matchmaking
+from tictactoe.matchmaking import DatabaseQueueBackend, InMemoryQueueBackend
+from tictactoe.models import Game, MatchmakingTicket
+
+
+@pytest.mark.django_db
+class TestInMemoryQueueBackend:
+    """Test suite for the process-local matchmaking queue."""
+
+    def test_first_player_waits(self):
+        """Test the first player to join is parked."""
+        backend = InMemoryQueueBackend()
+        assert backend.join('a') is None
+        assert backend.join('a') is None
+
+    def test_second_player_is_paired(self):
+        """Test the second player is paired with the waiting one."""
+        backend = InMemoryQueueBackend()
+        backend.join('a')
+        match = backend.join('b')
+        assert match is not None
+        assert Game.objects.filter(pk=match.game_id).exists()
+        assert match.symbol_for('a') == 'X'
+        assert match.symbol_for('b') == 'O'
+
+    def test_waiting_player_receives_match(self):
+        """Test the parked player gets the match on their next join."""
+        backend = InMemoryQueueBackend()
+        backend.join('a')
+        match = backend.join('b')
+        assert backend.join('a') == match
+        # The match is handed over once; joining again re-queues.
+        assert backend.join('a') is None
+
+    def test_expired_ticket_is_not_paired(self):
+        """Test players parked past the timeout are dropped."""
+        backend = InMemoryQueueBackend(timeout=0)
+        backend.join('a')
+        assert backend.join('b') is None
+
+    def test_leave_removes_waiting_player(self):
+        """Test leaving the queue prevents pairing."""
+        backend = InMemoryQueueBackend()
+        backend.join('a')
+        backend.leave('a')
+        assert backend.join('b') is None
+
+    def test_concurrent_joins_never_pair_twice(self, monkeypatch):
+        """Test racing joins pair every player exactly once."""
+        counter = itertools.count(1)
+        monkeypatch.setattr(
+            matchmaking, 'create_match_game',
+            lambda x, o: SimpleNamespace(public_id=next(counter))
+        )
+        backend = InMemoryQueueBackend()
+        players = [f'p{i}' for i in range(400)]
+        matches = []
+        lock = threading.Lock()
+
+        def worker(chunk):
+            for player in chunk:
+                match = backend.join(player)
+                if match is not None:
+                    with lock:
+                        matches.append(match)
+
+        threads = [threading.Thread(target=worker, args=(players[i::8],)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        paired = [p for m in matches for p in (m.player_x, m.player_o)]
+        assert len(paired) == len(set(paired)) == 400
+        assert len({m.game_id for m in matches}) == 200
+
+
+@pytest.mark.django_db
+class TestDatabaseQueueBackend:
+    """Test suite for the database matchmaking queue."""
+
+    def test_first_player_waits(self):
+        """Test the first player gets a waiting ticket."""
+        backend = DatabaseQueueBackend()
+        assert backend.join('a') is None
+        assert backend.join('a') is None
+        assert MatchmakingTicket.objects.filter(player='a', opponent='').count() == 1
+
+    def test_pairing_and_pickup(self):
+        """Test pairing creates a game and the parked player picks it up."""
+        backend = DatabaseQueueBackend()
+        backend.join('a')
+        match = backend.join('b')
+        assert match.player_x == 'a'
+        assert match.player_o == 'b'
+        assert Game.objects.filter(pk=match.game_id).exists()
+        assert backend.join('a') == match
+        assert not MatchmakingTicket.objects.exists()
+
+    def test_claimed_ticket_is_not_paired_again(self):
+        """Test a ticket claimed by another join is skipped."""
+        backend = DatabaseQueueBackend()
+        backend.join('a')
+        MatchmakingTicket.objects.filter(player='a').update(opponent='elsewhere')
+        assert backend.join('b') is None
+        assert Game.objects.count() == 0
+
+    def test_parked_players_pair_on_rejoin(self):
+        """Test two players parked by racing joins are paired when one joins again."""
+        backend = DatabaseQueueBackend()
+        # Both joins saw an empty queue and parked
+        MatchmakingTicket.objects.bulk_create([
+            MatchmakingTicket(player='a'), MatchmakingTicket(player='b'),
+        ])
+        match = backend.join('b')
+        assert (match.player_x, match.player_o) == ('a', 'b')
+        assert backend.join('a') == match
+        assert not MatchmakingTicket.objects.exists()
+
+    def test_rejoin_keeps_place_when_alone(self):
+        """Test a parked player who finds no opponent stays parked with their ticket."""
+        backend = DatabaseQueueBackend()
+        backend.join('a')
+        created_at = MatchmakingTicket.objects.get().created_at
+        assert backend.join('a') is None
+        ticket = MatchmakingTicket.objects.get()
+        assert (ticket.opponent, ticket.created_at) == ('', created_at)
+
+    def test_expired_ticket_is_purged(self):
+        """Test expired waiting tickets are not paired."""
+        backend = DatabaseQueueBackend()
+        backend.join('a')
+        MatchmakingTicket.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        assert backend.join('b') is None
+        assert list(MatchmakingTicket.objects.values_list('player', flat=True)) == ['b']
+
+
+@pytest.mark.django_db
+class TestMatchmakingAPI:
+    """Test suite for the matchmaking endpoints."""
+
+    def setup_method(self):
+        """Setup test client before each test."""
+        self.client = APIClient()
+        self.join_url = '/tictactoe/api/matchmaking/join/'
+        matchmaking._backend = None
+
+    def test_join_requires_player(self):
+        """Test anonymous join without a player key is rejected."""
+        response = self.client.post(self.join_url, {}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_join_and_match(self):
+        """Test two joins produce a game with X and O assigned."""
+        response = self.client.post(self.join_url, {'player': 'alice'}, format='json')
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == 'waiting'
+
+        response = self.client.post(self.join_url, {'player': 'bob'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'matched'
+        assert response.data['player'] == 'O'
+        game_id = response.data['game']['id']
+
+        response = self.client.post(self.join_url, {'player': 'alice'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['player'] == 'X'
+        assert response.data['game']['id'] == game_id
+
+    def test_leave(self):
+        """Test leaving the queue."""
+        self.client.post(self.join_url, {'player': 'alice'}, format='json')
+        response = self.client.post(
+            '/tictactoe/api/matchmaking/leave/', {'player': 'alice'}, format='json'
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        response = self.client.post(self.join_url, {'player': 'bob'}, format='json')
+        assert response.data['status'] == 'waiting'
@@ -1,5 +1,8 @@
+from datetime import timedelta
+
 import pytest
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from tictactoe.models import Game
 
 
@@ -207,3 +210,86 @@ class TestGameModel:
         game = Game.objects.create()
         game.board = ['X', 'O', 'X', 'X', 'O', 'O', 'O', 'X', 'X']
         assert game.is_draw() is True
+
+
+@pytest.mark.django_db
+class TestGameHistory:
+    """Test suite for the per-move history, board_at and undo."""
+
+    def play(self, *positions):
+        game = Game.objects.create()
+        for position in positions:
+            game.make_move(position)
+        return Game.objects.get(pk=game.pk)
+
+    def test_board_at_every_ply(self):
+        """Test each earlier board is read back from the history column."""
+        game = self.play(4, 0, 8, 2)
+        assert game.ply == 4
+        assert game.board_at(0) == [None] * 9
+        assert game.board_at(1) == [None] * 4 + ['X'] + [None] * 4
+        assert game.board_at(3) == ['O', None, None, None, 'X', None, None, None, 'X']
+        assert game.board_at(4) == game.board
+
+    def test_board_at_out_of_range(self):
+        """Test plies beyond the current one are rejected."""
+        game = self.play(4)
+        with pytest.raises(ValueError):
+            game.board_at(2)
+        with pytest.raises(ValueError):
+            game.board_at(-1)
+
+    def test_board_at_without_history(self):
+        """Test games whose moves were not recorded report it."""
+        game = Game.objects.create(board=['X', 'O'] + [None] * 7)
+        with pytest.raises(ValueError, match='No history'):
+            game.board_at(1)
+
+    def test_at_ply_snapshot(self):
+        """Test at_ply returns an unsaved copy with the turn at that ply."""
+        game = self.play(0, 3, 1, 4, 2)
+        snapshot = game.at_ply(3)
+        assert snapshot.board[:5] == ['X', 'X', None, 'O', None]
+        assert snapshot.ply == 3
+        assert snapshot.status == Game.STATUS_IN_PROGRESS
+        assert snapshot.current_player == Game.PLAYER_O
+        assert Game.objects.get(pk=game.pk).status == Game.STATUS_X_WINS
+
+    def test_undo(self):
+        """Test undo restores the previous board and turn."""
+        game = self.play(4, 0)
+        game.undo()
+        game.save()
+        game = Game.objects.get(pk=game.pk)
+        assert game.board == [None] * 4 + ['X'] + [None] * 4
+        assert game.current_player == Game.PLAYER_O
+        game.make_move(8)
+        assert game.board_at(2)[8] == 'O'
+
+    def test_undo_winning_move_reopens_game(self):
+        """Test update_status recomputes the status after an undo."""
+        game = self.play(0, 3, 1, 4, 2)
+        assert game.status == Game.STATUS_X_WINS
+        game.undo()
+        assert game.status == Game.STATUS_IN_PROGRESS
+        assert game.current_player == Game.PLAYER_X
+
+    def test_undo_empty_board(self):
+        """Test there is nothing to undo before the first move."""
+        with pytest.raises(ValidationError, match='No moves'):
+            Game.objects.create().undo()
+
+    def test_undo_past_deadline_refused(self):
+        """Test a move cannot be taken back once the deadline has passed."""
+        game = self.play(4)
+        game.move_deadline = timezone.now() - timedelta(seconds=1)
+        with pytest.raises(ValidationError, match='timed out'):
+            game.undo()
+
+    def test_undo_recorded_result_refused(self, django_user_model):
+        """Test a result counted in PlayerStats cannot be taken back."""
+        game = Game.objects.create(player_x=django_user_model.objects.create_user('alice'))
+        for position in (0, 3, 1, 4, 2):
+            game.make_move(position)
+        with pytest.raises(ValidationError, match='recorded'):
+            game.undo()
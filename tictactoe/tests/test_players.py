@@ -0,0 +1,180 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tictactoe.models import Game, PlayerStats
+
+
+def play(game, moves):
+    for position in moves:
+        game.make_move(position)
+    return game
+
+
+@pytest.fixture
+def alice(db):
+    return get_user_model().objects.create_user(username='alice')
+
+
+@pytest.fixture
+def bob(db):
+    return get_user_model().objects.create_user(username='bob')
+
+
+@pytest.mark.django_db
+class TestPlayerStats:
+    """Test suite for incremental player records."""
+
+    def test_win_and_loss_recorded(self, alice, bob):
+        """Test finishing a game credits the winner and the loser."""
+        game = Game.objects.create(player_x=alice, player_o=bob)
+        play(game, [0, 3, 1, 4, 2])  # X wins
+
+        assert PlayerStats.objects.get(user=alice).wins == 1
+        assert PlayerStats.objects.get(user=bob).losses == 1
+
+    def test_draw_recorded(self, alice, bob):
+        """Test a draw is credited to both players."""
+        game = Game.objects.create(player_x=alice, player_o=bob)
+        play(game, [0, 1, 2, 4, 3, 5, 7, 6, 8])
+
+        assert PlayerStats.objects.get(user=alice).draws == 1
+        assert PlayerStats.objects.get(user=bob).draws == 1
+
+    def test_counters_accumulate(self, alice, bob):
+        """Test counters are incremented, not recomputed."""
+        for _ in range(3):
+            play(Game.objects.create(player_x=bob, player_o=alice), [0, 3, 1, 4, 2])
+
+        stats = PlayerStats.objects.get(user=alice)
+        assert (stats.wins, stats.losses, stats.draws) == (0, 3, 0)
+        assert stats.games_played == 3
+
+    def test_anonymous_games_record_nothing(self):
+        """Test games without players leave no stats rows."""
+        play(Game.objects.create(), [0, 3, 1, 4, 2])
+        assert not PlayerStats.objects.exists()
+
+
+@pytest.mark.django_db
+class TestPlayerAPI:
+    """Test suite for the player endpoints."""
+
+    def setup_method(self):
+        """Setup test client before each test."""
+        self.client = APIClient()
+
+    def test_retrieve_player(self, alice, bob):
+        """Test a player's profile includes their record."""
+        play(Game.objects.create(player_x=alice, player_o=bob), [0, 3, 1, 4, 2])
+        response = self.client.get(f'/tictactoe/api/players/{alice.pk}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['username'] == 'alice'
+        assert response.data['wins'] == 1
+        assert response.data['losses'] == 0
+
+    def test_player_games_keyset_pagination(self, alice, bob):
+        """Test game history pages follow the cursor without overlap."""
+        for index in range(5):
+            if index % 2:
+                Game.objects.create(player_x=alice, player_o=bob)
+            else:
+                Game.objects.create(player_x=bob, player_o=alice)
+        Game.objects.create()
+
+        url = f'/tictactoe/api/players/{alice.pk}/games/?page_size=2'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data['results']) <= 2
+            seen.extend(game['id'] for game in response.data['results'])
+            url = response.data['next']
+
+        expected = list(
+            Game.objects.exclude(player_x=None).order_by('-created_at', '-id')
+            .values_list('id', flat=True)
+        )
+        assert seen == expected
+
+    def test_player_games_previous_link(self, alice, bob):
+        """Test following 'previous' back from the last page returns the same pages."""
+        for _ in range(5):
+            Game.objects.create(player_x=alice, player_o=bob)
+        url = f'/tictactoe/api/players/{alice.pk}/games/?page_size=2'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            pages.append([game['id'] for game in response.data['results']])
+            url = response.data['next']
+        url = response.data['previous']
+        for expected in reversed(pages[:-1]):
+            response = self.client.get(url)
+            assert [game['id'] for game in response.data['results']] == expected
+            url = response.data['previous']
+        assert url is None
+
+    def test_player_games_reads_each_index_without_or(self, alice, bob):
+        """Test each side is its own limited query rather than an OR."""
+        for _ in range(30):
+            Game.objects.create(player_x=alice, player_o=bob)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(f'/tictactoe/api/players/{alice.pk}/games/?page_size=5')
+        game_queries = [query['sql'] for query in context.captured_queries if 'tictactoe_game' in query['sql']]
+        assert len(game_queries) == 2
+        assert all(' OR ' not in sql and 'LIMIT 6' in sql for sql in game_queries)
+
+    def test_player_games_self_play_listed_once(self, alice):
+        """Test a game with the player on both sides appears once."""
+        game = Game.objects.create(player_x=alice, player_o=alice)
+        response = self.client.get(f'/tictactoe/api/players/{alice.pk}/games/')
+        assert [item['id'] for item in response.data['results']] == [game.pk]
+
+    def test_player_games_unknown_player(self):
+        """Test history for a non-existent player returns 404."""
+        response = self.client.get('/tictactoe/api/players/999/games/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_matchmaking_assigns_players(self, alice, bob):
+        """Test matched authenticated users are recorded on the game."""
+        from tictactoe import matchmaking
+        matchmaking._backend = None
+
+        self.client.force_authenticate(alice)
+        self.client.post('/tictactoe/api/matchmaking/join/')
+        self.client.force_authenticate(bob)
+        response = self.client.post('/tictactoe/api/matchmaking/join/')
+
+        game = Game.objects.get(pk=response.data['game']['id'])
+        assert game.player_x == alice
+        assert game.player_o == bob
+
+
+@pytest.mark.django_db
+class TestPlayerProfileView:
+    """Test suite for the player profile page."""
+
+    def test_profile_renders(self, client, alice, bob):
+        """Test the profile page shows the player's record."""
+        play(Game.objects.create(player_x=alice, player_o=bob), [0, 3, 1, 4, 2])
+        response = client.get(reverse('tictactoe:player-detail', args=[alice.pk]))
+        assert response.status_code == 200
+        assert response.context['stats'].wins == 1
+        assert len(response.context['games']) == 1
+
+    def test_profile_query_count_is_constant(self, client, alice, bob, django_assert_num_queries):
+        """Test the profile page cost does not grow with game count."""
+        url = reverse('tictactoe:player-detail', args=[alice.pk])
+        Game.objects.create(player_x=alice, player_o=bob)
+        # The player, then one query per side of their game history
+        with django_assert_num_queries(3):
+            client.get(url)
+
+        for _ in range(20):
+            play(Game.objects.create(player_x=alice, player_o=bob), [0, 3, 1, 4, 2])
+        with django_assert_num_queries(3):
+            client.get(url)
@@ -0,0 +1,113 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tictactoe.models import Game
+from tictactoe.routers import PIN_COOKIE, ReplicaRouter, use_replica
+
+DATABASES = ['default', 'replica']
+
+
+@pytest.mark.django_db(databases=DATABASES)
+class TestReplicaRouter:
+    """Test suite for read-replica routing."""
+
+    @pytest.fixture(autouse=True)
+    def routed(self, settings):
+        settings.DATABASE_ROUTERS = ['tictactoe.routers.ReplicaRouter']
+        settings.TICTACTOE_REPLICA_DATABASES = ['replica']
+
+    @pytest.fixture
+    def stale_game(self):
+        """A game with one move on the primary that the replica has not seen."""
+        game = Game.objects.create()
+        game.make_move(0)
+        Game.objects.using('replica').create(pk=game.pk)
+        return game
+
+    def test_reads_stay_on_primary_by_default(self):
+        """Test reads outside an opted-in view use the primary."""
+        router = ReplicaRouter()
+        assert router.db_for_read(Game) == 'default'
+        with use_replica():
+            assert router.db_for_read(Game) == 'replica'
+        assert router.db_for_read(Game) == 'default'
+
+    def test_writes_always_go_to_primary(self):
+        """Test writes go to the primary even inside a replica block."""
+        with use_replica():
+            assert ReplicaRouter().db_for_write(Game) == 'default'
+
+    def test_no_replicas_configured(self, settings):
+        """Test an empty replica list keeps every read on the primary."""
+        settings.TICTACTOE_REPLICA_DATABASES = []
+        with use_replica():
+            assert ReplicaRouter().db_for_read(Game) == 'default'
+
+    def test_api_retrieve_reads_replica(self, stale_game):
+        """Test GET /api/games/{id}/ is served from the replica."""
+        response = APIClient().get(f'/tictactoe/api/games/{stale_game.pk}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['board'][0] is None
+
+    def test_api_list_reads_replica(self, stale_game):
+        """Test GET /api/games/ is served from the replica."""
+        Game.objects.create()
+        response = APIClient().get('/tictactoe/api/games/')
+        assert [game['id'] for game in response.data] == [stale_game.pk]
+
+    def test_move_reads_and_writes_primary(self, stale_game):
+        """Test a move sees the primary's board and is saved there."""
+        response = APIClient().post(
+            f'/tictactoe/api/games/{stale_game.pk}/move/', {'position': 1}, format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert Game.objects.get(pk=stale_game.pk).board[:2] == ['X', 'O']
+        assert Game.objects.using('replica').get(pk=stale_game.pk).board[1] is None
+
+    def test_read_your_writes_after_move(self, stale_game):
+        """Test a client that just moved reads its move back from the primary."""
+        client = APIClient()
+        response = client.post(
+            f'/tictactoe/api/games/{stale_game.pk}/move/', {'position': 1}, format='json'
+        )
+        assert PIN_COOKIE in response.cookies
+
+        response = client.get(f'/tictactoe/api/games/{stale_game.pk}/')
+        assert response.data['board'][:2] == ['X', 'O']
+
+        # Other clients keep reading the replica
+        response = APIClient().get(f'/tictactoe/api/games/{stale_game.pk}/')
+        assert response.data['board'][0] is None
+
+    def test_expired_pin_reads_replica(self, stale_game):
+        """Test the pin only lasts for the read-your-writes window."""
+        client = APIClient()
+        client.cookies[PIN_COOKIE] = '1'
+        response = client.get(f'/tictactoe/api/games/{stale_game.pk}/')
+        assert response.data['board'][0] is None
+
+    def test_create_pins_client(self):
+        """Test creating a game starts the read-your-writes window."""
+        response = APIClient().post('/tictactoe/api/games/', {}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert PIN_COOKIE in response.cookies
+
+    def test_failed_move_does_not_pin(self, stale_game):
+        """Test rejected writes do not pin the client."""
+        response = APIClient().post(
+            f'/tictactoe/api/games/{stale_game.pk}/move/', {'position': 0}, format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert PIN_COOKIE not in response.cookies
+
+    def test_game_detail_page_reads_replica(self, client, stale_game):
+        """Test the HTML detail page is served from the replica."""
+        response = client.get(reverse('tictactoe:game-detail', args=[stale_game.pk]))
+        assert response.context['game'].board[0] is None
+
+    def test_replica_routing_reset_after_request(self, stale_game):
+        """Test the replica switch does not leak past the request."""
+        APIClient().get(f'/tictactoe/api/games/{stale_game.pk}/')
+        assert ReplicaRouter().db_for_read(Game) == 'default'
@@ -1,7 +1,10 @@
 import importlib
+import subprocess
 import sys
 from pathlib import Path
 
+import pytest
+
 
 def test_package_imports():
     """Test that tictactoe package can be imported."""
@@ -74,3 +77,49 @@ def test_static_directory_exists():
     static_path = Path(__file__).parent.parent / 'static' / 'tictactoe'
     assert static_path.exists()
     assert static_path.is_dir()
+
+
+LAZY_IMPORT_PROBE = '''
+import sys
+import types
+from django.conf import settings
+urls = types.ModuleType('probe_urls')
+settings.configure(
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'tictactoe'],
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    ROOT_URLCONF=urls,
+    STATIC_URL='/static/',
+    TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'APP_DIRS': True}],
+    USE_TZ=True,
+)
+import django
+django.setup()
+import tictactoe.models, tictactoe.views
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.urls import include, path
+urls.urlpatterns = [path('', include('tictactoe.html_urls'))]
+call_command('migrate', verbosity=0)
+call_command('check')
+game = tictactoe.models.Game.objects.create()
+response = tictactoe.views.game_detail(RequestFactory().get('/'), pk=game.pk)
+assert response.status_code == 200
+assert 'rest_framework' not in sys.modules, 'rest_framework was imported'
+'''
+
+
+def test_models_and_html_views_do_not_import_drf():
+    """Test models, migrate, the HTML URLs and the game page work without importing DRF."""
+    result = subprocess.run(
+        [sys.executable, '-c', LAZY_IMPORT_PROBE],
+        cwd=Path(__file__).resolve().parents[2], capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_views_exposes_api_viewsets():
+    """Test viewsets are still importable from tictactoe.views."""
+    from tictactoe import api, views
+    assert views.GameViewSet is api.GameViewSet
+    with pytest.raises(AttributeError):
+        views.NoSuchView
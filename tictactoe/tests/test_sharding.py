@@ -0,0 +1,182 @@
+import pytest
+from django.db import connections
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tictactoe.models import Game
+from tictactoe.sharding import (
+    DEFAULT_INDEX, SHARD_BITS, create_game, get_game, least_loaded, locate, recent_games,
+)
+
+DATABASES = ['default', 'shard0', 'shard1']
+API_URL = '/tictactoe/api/games/'
+
+
+def pick_last(shards):
+    return shards[-1]
+
+
+@pytest.mark.django_db(databases=DATABASES)
+class TestSharding:
+    """Test suite for games sharded across database aliases."""
+
+    @pytest.fixture(autouse=True)
+    def sharded(self, settings):
+        settings.DATABASE_ROUTERS = ['tictactoe.routers.ReplicaRouter']
+        settings.TICTACTOE_SHARDS = ['shard0', 'shard1']
+
+    def test_public_id_encodes_shard(self):
+        """Test the public ID round-trips to the game's shard and local pk."""
+        game = Game.objects.using('shard1').create()
+        assert game.public_id == (game.pk << SHARD_BITS) | 1
+        assert locate(game.public_id) == ('shard1', game.pk)
+
+    def test_same_local_pk_on_two_shards(self):
+        """Test games sharing a local pk still get distinct public IDs."""
+        first = Game.objects.using('shard0').create()
+        second = Game.objects.using('shard1').create()
+        assert first.pk == second.pk
+        assert first.public_id != second.public_id
+        assert get_game(second.public_id).pk == second.pk
+        assert get_game(second.public_id)._state.db == 'shard1'
+
+    def test_unknown_shard_raises_does_not_exist(self):
+        """Test an ID pointing at an unconfigured shard is not found."""
+        with pytest.raises(Game.DoesNotExist):
+            locate((1 << SHARD_BITS) | 7)
+
+    def test_round_robin_placement(self):
+        """Test consecutive games alternate between shards."""
+        shards = {create_game()._state.db for _ in range(2)}
+        assert shards == {'shard0', 'shard1'}
+
+    def test_least_loaded_placement(self, settings):
+        """Test least_loaded picks the shard with fewer games in progress."""
+        settings.TICTACTOE_SHARD_PLACEMENT = 'least_loaded'
+        Game.objects.using('shard0').create()
+        # Each placement counts towards its shard until the next count
+        assert [create_game()._state.db for _ in range(3)] == ['shard1', 'shard0', 'shard1']
+
+    def test_least_loaded_counts_cached(self, settings, django_assert_num_queries):
+        """Test least_loaded counts each shard once per TICTACTOE_SHARD_LOAD_TTL."""
+        settings.TICTACTOE_SHARD_PLACEMENT = 'least_loaded'
+        with django_assert_num_queries(1, connection=connections['shard0']):
+            for _ in range(3):
+                least_loaded(['shard0', 'shard1'])
+        settings.TICTACTOE_SHARD_LOAD_TTL = 0
+        with django_assert_num_queries(2, connection=connections['shard0']):
+            for _ in range(2):
+                least_loaded(['shard0', 'shard1'])
+
+    def test_dotted_path_placement(self, settings):
+        """Test a custom policy can be given by dotted path."""
+        settings.TICTACTOE_SHARD_PLACEMENT = 'tictactoe.tests.test_sharding.pick_last'
+        assert create_game()._state.db == 'shard1'
+
+    def test_recent_games_merges_shards(self):
+        """Test the newest games come back across shards, newest first."""
+        games = [create_game() for _ in range(6)]
+        newest = recent_games(4)
+        assert [game.public_id for game in newest] == [
+            game.public_id for game in reversed(games[2:])
+        ]
+
+    def test_recent_games_skip_archived(self):
+        """Test archived games are left out of the merged listing."""
+        listed = create_game()
+        create_game(is_archived=True)
+        assert [game.public_id for game in recent_games(4)] == [listed.public_id]
+
+    def test_default_database_games_addressable(self):
+        """Test games on the default database get an ID that locates them."""
+        game = Game.objects.create()
+        assert game.public_id == (game.pk << SHARD_BITS) | DEFAULT_INDEX
+        assert locate(game.public_id) == (None, game.pk)
+        assert get_game(game.public_id).pk == game.pk
+
+    def test_recent_games_include_default_database(self):
+        """Test the listing merges the default database with the shards."""
+        games = [Game.objects.using(alias).create() for alias in ('shard0', 'default', 'shard1')]
+        assert [game.public_id for game in recent_games(3)] == [
+            game.public_id for game in reversed(games)
+        ]
+
+    def test_matched_game_playable_by_public_id(self):
+        """Test a matchmaking game can be fetched and played through the API."""
+        from tictactoe import matchmaking
+        matchmaking._backend = None
+        client = APIClient()
+        client.post('/tictactoe/api/matchmaking/join/', {'player': 'a'}, format='json')
+        response = client.post('/tictactoe/api/matchmaking/join/', {'player': 'b'}, format='json')
+        game_id = response.data['game']['id']
+        assert locate(game_id)[0] is None
+        assert client.get(f'{API_URL}{game_id}/').status_code == status.HTTP_200_OK
+        response = client.post(f'{API_URL}{game_id}/move/', {'position': 4}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['board'][4] == 'X'
+
+    def test_move_saved_on_game_shard(self):
+        """Test moves are read from and written to the game's shard."""
+        game = Game.objects.using('shard1').create()
+        response = APIClient().post(
+            f'{API_URL}{game.public_id}/move/', {'position': 4}, format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['id'] == game.public_id
+        assert Game.objects.using('shard1').get(pk=game.pk).board[4] == 'X'
+        assert not Game.objects.using('shard0').filter(pk=game.pk).exists()
+
+    def test_api_create_and_retrieve(self):
+        """Test a game created via the API can be fetched by its public ID."""
+        response = APIClient().post(API_URL, {}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        game_id = response.data['id']
+        assert locate(game_id)[0] in ('shard0', 'shard1')
+
+        response = APIClient().get(f'{API_URL}{game_id}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['id'] == game_id
+
+    def test_api_retrieve_missing(self):
+        """Test unknown and malformed IDs return 404."""
+        client = APIClient()
+        assert client.get(f'{API_URL}{(99 << SHARD_BITS) | 1}/').status_code == 404
+        assert client.get(f'{API_URL}{(1 << SHARD_BITS) | 5}/').status_code == 404
+        assert client.get(f'{API_URL}abc/').status_code == 404
+
+    def test_api_list_is_limited(self, settings):
+        """Test the sharded list returns at most SHARD_LIST_LIMIT games."""
+        settings.TICTACTOE_SHARD_LIST_LIMIT = 3
+        games = [create_game() for _ in range(5)]
+        response = APIClient().get(API_URL)
+        assert [game['id'] for game in response.data] == [
+            game.public_id for game in reversed(games[2:])
+        ]
+
+    def test_bulk_across_shards(self):
+        """Test the bulk endpoint loads games from every shard."""
+        games = [Game.objects.using(alias).create() for alias in ('shard0', 'shard1')]
+        ids = [game.public_id for game in games] + [(50 << SHARD_BITS) | 1]
+        response = APIClient().post(f'{API_URL}bulk/', {'ids': ids}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert [response.data[str(game_id)].get('id') for game_id in ids[:2]] == ids[:2]
+        assert response.data[str(ids[2])] == {'missing': True}
+
+    def test_game_pages(self, client):
+        """Test the HTML list and detail pages use public IDs."""
+        game = Game.objects.using('shard1').create()
+        response = client.get(reverse('tictactoe:game-detail', args=[game.public_id]))
+        assert response.status_code == 200
+        assert response.context['game']._state.db == 'shard1'
+
+        response = client.get(reverse('tictactoe:game-list'))
+        assert reverse('tictactoe:game-detail', args=[game.public_id]) in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_unsharded_public_id_is_pk():
+    """Test public IDs equal primary keys when sharding is off."""
+    game = Game.objects.create()
+    assert game.public_id == game.pk
+    assert get_game(game.pk) == game
@@ -0,0 +1,263 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tictactoe.models import Game, OutboxTask, PlayerStats
+from tictactoe.signals import game_finished
+from tictactoe.clock import TimeoutScheduler
+from tictactoe.tasks import TaskPipeline, claim, get_metrics, process_outbox, run_batch, stop_pipeline
+
+calls = []
+
+
+def record_handler(games):
+    calls.append(sorted(game.pk for game in games))
+
+
+def failing_handler(games):
+    raise RuntimeError("handler failed")
+
+
+def stats_then_failing_handler(games):
+    from tictactoe.tasks import update_player_stats
+    update_player_stats(games)
+    raise RuntimeError("crashed after writing")
+
+
+def win_for_x(game):
+    for position in (0, 3, 1, 4, 2):
+        game.make_move(position)
+
+
+@pytest.fixture
+def finished_signals():
+    received = []
+
+    def handler(sender, game, **kwargs):
+        received.append(game.pk)
+
+    game_finished.connect(handler)
+    yield received
+    game_finished.disconnect(handler)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+class TestGameFinishedSignal:
+    """Test suite for the game_finished signal."""
+
+    def test_sent_once_when_game_finishes(self, finished_signals):
+        """Test the signal is sent by the save of the finishing move only."""
+        game = Game.objects.create()
+        win_for_x(game)
+        assert finished_signals == [game.pk]
+        game.save()
+        assert finished_signals == [game.pk]
+
+    def test_not_sent_for_unsaved_games(self, finished_signals):
+        """Test games played in memory do not send the signal."""
+        game = Game()
+        for position in (0, 3, 1, 4, 2):
+            game.apply_move(position)
+        assert game.status == Game.STATUS_X_WINS
+        assert finished_signals == []
+
+
+@pytest.mark.django_db
+class TestTaskPipeline:
+    """Test suite for post-game task handlers and the outbox."""
+
+    @pytest.fixture
+    def players(self):
+        User = get_user_model()
+        return User.objects.create(username='alice'), User.objects.create(username='bob')
+
+    def test_stats_updated_by_handler(self, players):
+        """Test the default handler records the result (sync mode)."""
+        alice, bob = players
+        game = Game.objects.create(player_x=alice, player_o=bob)
+        win_for_x(game)
+        assert PlayerStats.objects.get(user=alice).wins == 1
+        assert PlayerStats.objects.get(user=bob).losses == 1
+        assert not OutboxTask.objects.exists()
+
+    def test_handlers_from_settings(self, settings):
+        """Test every configured handler runs with the finished game."""
+        settings.TICTACTOE_TASK_HANDLERS = ['tictactoe.tests.test_tasks.record_handler']
+        game = Game.objects.create()
+        win_for_x(game)
+        assert calls == [[game.pk]]
+
+    def test_failed_task_stays_in_outbox(self, settings):
+        """Test a failing handler leaves its task for process_outbox."""
+        settings.TICTACTOE_TASK_HANDLERS = ['tictactoe.tests.test_tasks.failing_handler']
+        game = Game.objects.create()
+        win_for_x(game)
+        task = OutboxTask.objects.get()
+        assert task.game_id == game.pk
+        assert task.attempts == 1
+        assert 'handler failed' in task.last_error
+
+        OutboxTask.objects.update(handler='tictactoe.tests.test_tasks.record_handler')
+        assert process_outbox() == {'processed': 1, 'failed': 0}
+        assert calls == [[game.pk]]
+        assert not OutboxTask.objects.exists()
+
+    def test_process_outbox_batches_by_handler(self):
+        """Test leftover tasks are passed to their handler in batches."""
+        games = [Game.objects.create() for _ in range(5)]
+        OutboxTask.objects.bulk_create(
+            OutboxTask(handler='tictactoe.tests.test_tasks.record_handler', game_id=game.pk)
+            for game in games
+        )
+        assert process_outbox(batch_size=2)['processed'] == 5
+        assert [len(batch) for batch in calls] == [2, 2, 1]
+
+    def test_process_outbox_skips_exhausted_tasks(self, settings):
+        """Test tasks past TASK_MAX_ATTEMPTS are left alone."""
+        settings.TICTACTOE_TASK_MAX_ATTEMPTS = 2
+        game = Game.objects.create()
+        OutboxTask.objects.create(
+            handler='tictactoe.tests.test_tasks.record_handler', game_id=game.pk, attempts=2
+        )
+        assert process_outbox() == {'processed': 0, 'failed': 0}
+
+    def test_leased_tasks_not_run_twice(self):
+        """Test tasks leased by a running worker are skipped until the lease ends."""
+        game = Game.objects.create()
+        task = OutboxTask.objects.create(handler='tictactoe.tests.test_tasks.record_handler', game_id=game.pk)
+        assert claim([task.pk]) == [task]
+        assert claim([task.pk]) == []
+        assert run_batch(task.handler, [task.pk])
+        assert process_outbox() == {'processed': 0, 'failed': 0}
+        assert calls == []
+
+        OutboxTask.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+        assert process_outbox() == {'processed': 1, 'failed': 0}
+        assert calls == [[game.pk]]
+
+    def test_failed_handler_writes_roll_back(self, settings, players):
+        """Test stats written by a handler that then fails are not kept, so a retry counts once."""
+        alice, bob = players
+        settings.TICTACTOE_TASK_HANDLERS = ['tictactoe.tests.test_tasks.stats_then_failing_handler']
+        win_for_x(Game.objects.create(player_x=alice, player_o=bob))
+        assert not PlayerStats.objects.filter(user=alice, wins__gt=0).exists()
+
+        OutboxTask.objects.update(handler='tictactoe.tasks.update_player_stats')
+        assert process_outbox() == {'processed': 1, 'failed': 0}
+        assert PlayerStats.objects.get(user=alice).wins == 1
+
+    def test_timeout_sends_game_finished(self, settings, finished_signals):
+        """Test games expired by the move clock run the post-game handlers."""
+        settings.TICTACTOE_TASK_HANDLERS = ['tictactoe.tests.test_tasks.record_handler']
+        game = Game.objects.create(move_time_limit=30)
+        Game.objects.filter(pk=game.pk).update(move_deadline=timezone.now() - timedelta(seconds=5))
+        assert TimeoutScheduler(horizon=10).run_pending() == 1
+        assert finished_signals == [game.pk]
+        assert calls == [[game.pk]]
+
+    def test_process_outbox_command(self):
+        """Test manage.py process_outbox runs tasks and reports stats."""
+        game = Game.objects.create()
+        OutboxTask.objects.create(handler='tictactoe.tests.test_tasks.record_handler', game_id=game.pk)
+        out = StringIO()
+        call_command('process_outbox', '--stats', stdout=out)
+        assert '"pending": 1' in out.getvalue()
+        call_command('process_outbox', '--min-age', '0', stdout=out)
+        assert "Processed 1 tasks, 0 failed." in out.getvalue()
+        assert calls == [[game.pk]]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_pipeline_batches_and_reports_metrics(settings):
+    """Test the thread pool runs queued tasks in batches and records metrics."""
+    settings.TICTACTOE_TASK_HANDLERS = ['tictactoe.tests.test_tasks.record_handler']
+    settings.TICTACTOE_TASKS_SYNC = False
+    games = [Game.objects.create() for _ in range(3)]
+    tasks = OutboxTask.objects.bulk_create(
+        OutboxTask(handler='tictactoe.tests.test_tasks.record_handler', game_id=game.pk)
+        for game in games
+    )
+
+    pipeline = TaskPipeline(workers=1, batch_size=10, batch_wait=0.5)
+    for task in tasks:
+        assert pipeline.submit(task.handler, task.pk)
+    pipeline.shutdown()
+
+    assert calls == [sorted(game.pk for game in games)]
+    assert not OutboxTask.objects.exists()
+    latency = get_metrics()['latency']['tictactoe.tests.test_tasks.record_handler']
+    assert latency['batches'] >= 1
+    assert latency['tasks'] >= 3
+    assert 'queue_depth' in get_metrics()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_finished_game_queued_after_commit(settings):
+    """Test finishing a game queues its tasks on the process-wide pipeline."""
+    settings.TICTACTOE_TASK_HANDLERS = ['tictactoe.tests.test_tasks.record_handler']
+    settings.TICTACTOE_TASKS_SYNC = False
+    game = Game.objects.create()
+    win_for_x(game)
+    stop_pipeline()
+    assert calls == [[game.pk]]
+    assert not OutboxTask.objects.exists()
+
+
+@pytest.mark.django_db(databases=['default', 'shard0', 'shard1'])
+def test_sharded_game_outbox_on_its_shard(settings):
+    """Test a game on a shard gets its outbox rows, and its stats, from that shard."""
+    settings.TICTACTOE_SHARDS = ['shard0', 'shard1']
+    settings.TICTACTOE_TASK_HANDLERS = ['tictactoe.tasks.update_player_stats']
+    settings.TICTACTOE_TASKS_SYNC = False
+    alice = get_user_model().objects.create_user('alice')
+    # The shard's own user table backs its foreign keys
+    get_user_model().objects.db_manager('shard0').create_user('alice', id=alice.pk)
+    game = Game.objects.using('shard0').create(player_x_id=alice.pk)
+    win_for_x(game)
+    assert OutboxTask.objects.using('shard0').get().game_id == game.pk
+    assert not OutboxTask.objects.exists()
+
+    assert process_outbox() == {'processed': 1, 'failed': 0}
+    assert not OutboxTask.objects.using('shard0').exists()
+    assert PlayerStats.objects.get(user=alice).wins == 1
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'shard0', 'shard1'])
+def test_sharded_tasks_queued_after_shard_commit(settings, monkeypatch):
+    """Test tasks are handed to the pipeline only once the shard transaction commits."""
+    settings.TICTACTOE_SHARDS = ['shard0', 'shard1']
+    settings.TICTACTOE_TASK_HANDLERS = ['tictactoe.tests.test_tasks.record_handler']
+    settings.TICTACTOE_TASKS_SYNC = False
+    submitted = []
+
+    class RecordingPipeline:
+        def submit(self, handler_path, task_id, using):
+            submitted.append(using)
+
+    monkeypatch.setattr('tictactoe.tasks.get_pipeline', RecordingPipeline)
+    game = Game.objects.using('shard0').create()
+    with transaction.atomic(using='shard0'):
+        win_for_x(game)
+        assert submitted == []
+    assert submitted == ['shard0']
+
+
+@pytest.mark.django_db
+def test_outbox_without_bulk_insert_returning(settings, monkeypatch):
+    """Test tasks still run where bulk_create cannot return primary keys."""
+    settings.TICTACTOE_TASK_HANDLERS = ['tictactoe.tests.test_tasks.record_handler']
+    monkeypatch.setattr(type(connection.features), 'can_return_rows_from_bulk_insert', False)
+    game = Game.objects.create()
+    win_for_x(game)
+    assert calls == [[game.pk]]
+    assert not OutboxTask.objects.exists()
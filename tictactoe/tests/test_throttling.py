@@ -0,0 +1,148 @@
+import pytest
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tictactoe.models import Game
+from tictactoe.throttling import TokenBuckets, buckets, parse_rate
+
+API_URL = '/tictactoe/api/games/'
+
+
+@pytest.fixture(autouse=True)
+def clean_buckets():
+    yield
+    buckets.clear()
+    cache.clear()
+
+
+class TestTokenBuckets:
+    """Test suite for the in-process token buckets."""
+
+    def test_parse_rate(self):
+        """Test DRF-style rate strings."""
+        assert parse_rate('10/min') == (10, 60.0)
+        assert parse_rate('3/s') == (3, 1.0)
+        assert parse_rate('100/hour') == (100, 3600.0)
+        with pytest.raises(ValueError):
+            parse_rate('0/min')
+        with pytest.raises(ValueError):
+            parse_rate('fast')
+
+    def test_burst_then_wait(self):
+        """Test a bucket allows its capacity, then reports the refill wait."""
+        local = TokenBuckets()
+        assert [local.take('k', 3, 60, now=0) for _ in range(3)] == [0, 0, 0]
+        assert local.take('k', 3, 60, now=0) == pytest.approx(20)
+        assert local.take('k', 3, 60, now=20) == 0
+
+    def test_buckets_are_independent(self):
+        """Test keys have separate buckets."""
+        local = TokenBuckets()
+        assert local.take('a', 1, 60, now=0) == 0
+        assert local.take('b', 1, 60, now=0) == 0
+        assert local.take('a', 1, 60, now=0) > 0
+
+    def test_sync_shares_consumption(self):
+        """Test tokens taken by one process drain another's bucket after a sync."""
+        first, second = TokenBuckets(), TokenBuckets()
+        first.take('k', 10, 60, now=0)
+        second.take('k', 10, 60, now=0)
+        first.sync(now=0)
+        second.sync(now=0)
+        for _ in range(6):
+            first.take('k', 10, 60, now=0)
+        first.sync(now=0)
+        second.sync(now=0)
+        # second took 1 and saw first take 6 more: 3 tokens left
+        assert [second.take('k', 10, 60, now=0) for _ in range(3)] == [0, 0, 0]
+        assert second.take('k', 10, 60, now=0) > 0
+
+    def test_idle_full_buckets_dropped(self):
+        """Test sync forgets buckets that have refilled completely."""
+        local = TokenBuckets()
+        local.take('k', 2, 60, now=0)
+        local.sync(now=0)
+        assert len(local) == 1
+        local.sync(now=60)
+        assert len(local) == 0
+
+    def test_pruned_without_sync(self):
+        """Test full buckets are dropped on a timer when the cache sync is off."""
+        local = TokenBuckets()
+        local._last_prune = 0
+        local.take('k', 2, 60, now=0)
+        local.maybe_prune(100, synced=False, now=30)
+        assert len(local) == 1
+        local.maybe_prune(100, synced=False, now=local.prune_interval + 1)
+        assert len(local) == 0
+
+    def test_bucket_count_capped(self):
+        """Test the oldest buckets go once the cap is reached."""
+        local = TokenBuckets()
+        for i in range(10):
+            local.take(f'k{i}', 1, 60, now=0)
+            local.maybe_prune(10, synced=False, now=0)
+        assert len(local) == 9
+        assert local.take('k0', 1, 60, now=0) == 0  # dropped, so full again
+        assert local.take('k9', 1, 60, now=0) > 0
+
+
+@pytest.mark.django_db
+class TestThrottledEndpoints:
+    """Test suite for the throttles on the game API."""
+
+    def setup_method(self):
+        self.client = APIClient()
+
+    def test_no_rates_no_throttling(self):
+        """Test the throttles are off by default."""
+        for _ in range(5):
+            assert self.client.post(API_URL).status_code == status.HTTP_201_CREATED
+
+    def test_client_rate_on_create(self, settings, django_assert_num_queries):
+        """Test a client over its create rate gets 429 without touching the database."""
+        settings.TICTACTOE_THROTTLE_RATES = {'create': '2/min'}
+        assert self.client.post(API_URL).status_code == status.HTTP_201_CREATED
+        assert self.client.post(API_URL).status_code == status.HTTP_201_CREATED
+        with django_assert_num_queries(0):
+            response = self.client.post(API_URL)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) == 30
+        assert Game.objects.count() == 2
+
+    def test_clients_counted_separately(self, settings, django_user_model):
+        """Test one client's bucket does not throttle another."""
+        settings.TICTACTOE_THROTTLE_RATES = {'create': '1/min'}
+        assert self.client.post(API_URL).status_code == status.HTTP_201_CREATED
+        self.client.force_authenticate(django_user_model.objects.create_user('alice'))
+        assert self.client.post(API_URL).status_code == status.HTTP_201_CREATED
+
+    def test_game_rate_on_move(self, settings):
+        """Test the per-game bucket limits moves on one game only."""
+        settings.TICTACTOE_GAME_THROTTLE_RATES = {'move': '1/min'}
+        first, second = Game.objects.create(), Game.objects.create()
+        url = API_URL + '{}/move/'
+        response = self.client.post(url.format(first.public_id), {'position': 0}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        response = self.client.post(url.format(first.public_id), {'position': 1}, format='json')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        response = self.client.post(url.format(second.public_id), {'position': 0}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_unknown_games_bounded(self, settings):
+        """Test moves on missing games cannot grow the buckets past the cap."""
+        settings.TICTACTOE_GAME_THROTTLE_RATES = {'move': '60/min'}
+        settings.TICTACTOE_THROTTLE_SYNC_INTERVAL = None
+        settings.TICTACTOE_THROTTLE_MAX_BUCKETS = 20
+        for game_id in range(100000, 100050):
+            response = self.client.post(f'{API_URL}{game_id}/move/', {'position': 0}, format='json')
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert len(buckets) <= 20
+
+    def test_unlisted_actions_unaffected(self, settings):
+        """Test actions without a rate are never throttled."""
+        settings.TICTACTOE_THROTTLE_RATES = {'create': '1/min'}
+        self.client.post(API_URL)
+        for _ in range(3):
+            assert self.client.get(API_URL).status_code == status.HTTP_200_OK
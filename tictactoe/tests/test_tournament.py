@@ -0,0 +1,78 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from tictactoe.models import Game
+from tictactoe.strategies import minimax_strategy, random_strategy
+from tictactoe.tournament import play_game, run_tournament
+
+RANDOM = 'tictactoe.strategies.random_strategy'
+MINIMAX = 'tictactoe.strategies.minimax_strategy'
+
+
+class TestStrategies:
+    """Test suite for built-in strategies."""
+
+    def test_random_plays_empty_cell(self):
+        """Test random strategy only picks empty cells."""
+        board = ['X', 'O', 'X', 'O', None, 'X', 'O', 'X', 'O']
+        assert random_strategy(board, 'X') == 4
+
+    def test_minimax_takes_win(self):
+        """Test minimax completes a winning line."""
+        board = ['X', 'X', None, 'O', 'O', None, None, None, None]
+        assert minimax_strategy(board, 'X') == 2
+
+    def test_minimax_blocks(self):
+        """Test minimax blocks the opponent's line."""
+        board = ['O', 'O', None, 'X', None, None, 'X', None, None]
+        assert minimax_strategy(board, 'X') == 2
+
+    def test_minimax_self_play_draws(self):
+        """Test perfect play on both sides is a draw."""
+        game = play_game(minimax_strategy, minimax_strategy)
+        assert game.status == Game.STATUS_DRAW
+        assert game.pk is None
+
+
+@pytest.mark.django_db
+class TestTournament:
+    """Test suite for the round-robin runner."""
+
+    def test_round_robin_inline(self):
+        """Test every ordered pairing is played and saved."""
+        result = run_tournament([RANDOM, MINIMAX], games=20, workers=1, chunk_size=7, seed=1)
+        assert set(result.pairings) == {(RANDOM, MINIMAX), (MINIMAX, RANDOM)}
+        assert result.games == 40
+        assert result.pairings[(RANDOM, MINIMAX)].x_wins == 0
+        assert result.pairings[(MINIMAX, RANDOM)].o_wins == 0
+        assert Game.objects.count() == 40
+        assert not Game.objects.filter(status=Game.STATUS_IN_PROGRESS).exists()
+        # Saved with their move history, so they can be replayed
+        game = Game.objects.first()
+        assert game.history
+        assert game.board_at(game.ply - 1).count(None) == 10 - game.ply
+
+    def test_round_robin_process_pool(self):
+        """Test results are gathered from worker processes."""
+        result = run_tournament(
+            [RANDOM, MINIMAX], games=10, workers=2, chunk_size=5, seed=1, save=False
+        )
+        assert result.games == 20
+        assert sum(p.games for p in result.pairings.values()) == 20
+        assert Game.objects.count() == 0
+
+    def test_command_output(self):
+        """Test the command prints a table and throughput report."""
+        out = StringIO()
+        call_command('run_tournament', '--games', '4', '--workers', '1', '--batch-size', '3', stdout=out)
+        output = out.getvalue()
+        assert 'random_strategy vs minimax_strategy' in output
+        assert 'games/s per core' in output
+        assert Game.objects.count() == 8
+
+    def test_command_needs_two_strategies(self):
+        """Test a single strategy is rejected."""
+        with pytest.raises(CommandError):
+            call_command('run_tournament', RANDOM, stdout=StringIO())
@@ -0,0 +1,181 @@
+import pytest
+from django.core.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tictactoe import ultimate
+from tictactoe.models import Game, UltimateGame
+
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+
+def naive_winner(cells):
+    for a, b, c in LINES:
+        if cells[a] in ('X', 'O') and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return None
+
+
+def naive_moves(boards, forced, player):
+    """List-scanning reference implementation of the move generator."""
+    results = [naive_winner(board) or ('D' if None not in board else None) for board in boards]
+    if naive_winner(results) or None not in results:
+        return []
+    allowed = [forced] if forced is not None and results[forced] is None else [
+        b for b in range(9) if results[b] is None
+    ]
+    return [(b, p) for b in allowed for p in range(9) if boards[b][p] is None]
+
+
+def naive_perft(boards, forced, player, depth):
+    if depth == 0:
+        return 1
+    total = 0
+    for board, position in naive_moves(boards, forced, player):
+        boards[board][position] = player
+        total += naive_perft(boards, position, 'O' if player == 'X' else 'X', depth - 1)
+        boards[board][position] = None
+    return total
+
+
+def play_moves(state, moves):
+    for board, position in moves:
+        state = ultimate.play(state, ultimate.cell_index(board, position))
+    return state
+
+
+class TestEngine:
+    """Test suite for the bitboard engine."""
+
+    @pytest.mark.parametrize('depth,expected', [(1, 81), (2, 720)])
+    def test_perft_known_counts(self, depth, expected):
+        """Test move counts from the empty position."""
+        assert ultimate.perft(ultimate.State(), depth) == expected
+
+    def test_perft_matches_reference(self):
+        """Test depth-3 counts agree with a naive list-based generator."""
+        boards = [[None] * 9 for _ in range(9)]
+        assert ultimate.perft(ultimate.State(), 3) == naive_perft(boards, None, 'X', 3)
+
+    def test_perft_matches_reference_midgame(self):
+        """Test counts agree from a position with won and forced boards."""
+        moves = [
+            (4, 0), (0, 4), (4, 4), (4, 1), (1, 4), (4, 7), (7, 4), (4, 2), (2, 4),
+            (4, 3), (3, 4), (4, 5), (5, 4), (4, 6), (6, 4), (4, 8), (8, 4),
+        ]
+        state = play_moves(ultimate.State(), moves)
+        assert state.meta_o == 1 << 4
+        boards = [[None] * 9 for _ in range(9)]
+        for ply, (board, position) in enumerate(moves):
+            boards[board][position] = 'X' if ply % 2 == 0 else 'O'
+        # Board 4 is won, so the forced move into it frees the player
+        assert state.forced == ultimate.ANY_BOARD
+        assert ultimate.perft(state, 3) == naive_perft(boards, 4, 'O', 3)
+
+    def test_forced_board(self):
+        """Test a move sends the opponent to the matching sub-board."""
+        state = ultimate.play(ultimate.State(), ultimate.cell_index(0, 5))
+        assert state.forced == 5
+        assert set(ultimate.iter_cells(ultimate.legal_mask(state))) == {
+            ultimate.cell_index(5, p) for p in range(9)
+        }
+
+    def test_illegal_move_rejected(self):
+        """Test playing outside the forced board raises ValueError."""
+        state = ultimate.play(ultimate.State(), ultimate.cell_index(0, 5))
+        with pytest.raises(ValueError):
+            ultimate.play(state, ultimate.cell_index(0, 0))
+
+    def test_meta_board_win(self):
+        """Test winning three sub-boards in a row wins the game."""
+        state = ultimate.State(
+            x=sum(0b111 << (9 * b) for b in (0, 1)) | 0b11 << 18,
+            meta_x=0b11,
+        )
+        state = ultimate.play(state, ultimate.cell_index(2, 2))
+        assert state.meta_x == 0b111
+        assert state.winner == ultimate.PLAYER_X
+        assert ultimate.legal_mask(state) == 0
+
+
+@pytest.mark.django_db
+class TestUltimateGameModel:
+    """Test suite for the UltimateGame model."""
+
+    def test_round_trip(self):
+        """Test the bitmasks survive a save and reload."""
+        game = UltimateGame.objects.create()
+        game.make_move(8, 8)
+        game.make_move(8, 0)
+        game.refresh_from_db()
+        assert game.x_cells == 1 << 80
+        assert game.o_cells == 1 << 72
+        assert game.forced_board == 0
+        assert game.current_player == Game.PLAYER_X
+
+    def test_wrong_board_rejected(self):
+        """Test moves outside the forced board raise ValidationError."""
+        game = UltimateGame.objects.create()
+        game.make_move(0, 3)
+        with pytest.raises(ValidationError, match='board 3'):
+            game.make_move(0, 0)
+
+    def test_occupied_rejected(self):
+        """Test moves on an occupied cell raise ValidationError."""
+        game = UltimateGame.objects.create()
+        game.make_move(0, 0)
+        with pytest.raises(ValidationError, match='occupied'):
+            game.make_move(0, 0)
+
+    def test_win_sets_status(self):
+        """Test a meta-board line finishes the game."""
+        game = UltimateGame.objects.create(
+            x_cells=sum(0b111 << (9 * b) for b in (0, 1)) | 0b11 << 18, meta_x=0b11,
+        )
+        game.make_move(2, 2)
+        assert game.status == Game.STATUS_X_WINS
+        assert game.get_meta_board() == 'XXX......'
+        with pytest.raises(ValidationError, match='finished'):
+            game.make_move(3, 0)
+
+
+@pytest.mark.django_db
+class TestUltimateGameAPI:
+    """Test suite for the ultimate game endpoints."""
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.base_url = '/tictactoe/api/ultimate-games/'
+
+    def test_create(self):
+        """Test creating an empty game."""
+        response = self.client.post(self.base_url)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['boards'] == ['.........'] * 9
+        assert response.data['meta_board'] == '.........'
+        assert response.data['forced_board'] is None
+        assert len(response.data['legal_moves']) == 81
+
+    def test_move(self):
+        """Test a move updates the board and the forced board."""
+        game = UltimateGame.objects.create()
+        response = self.client.post(f'{self.base_url}{game.id}/move/', {'board': 4, 'position': 2}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['boards'][4] == '..X......'
+        assert response.data['forced_board'] == 2
+        assert response.data['current_player'] == 'O'
+        assert response.data['message'] == 'Move successful'
+
+    def test_illegal_move(self):
+        """Test a move on the wrong board returns 400."""
+        game = UltimateGame.objects.create()
+        self.client.post(f'{self.base_url}{game.id}/move/', {'board': 4, 'position': 2}, format='json')
+        response = self.client.post(f'{self.base_url}{game.id}/move/', {'board': 4, 'position': 3}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_move_requires_board(self):
+        """Test the board index is required."""
+        game = UltimateGame.objects.create()
+        response = self.client.post(f'{self.base_url}{game.id}/move/', {'position': 2}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'board' in response.data['error']
@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 from tictactoe.models import Game
 
@@ -17,6 +18,13 @@ class TestTemplateViews:
         assert 'games' in response.context
         assert len(response.context['games']) == 2
 
+    def test_game_list_hides_archived_games(self, client):
+        """Test archived games are not listed."""
+        listed = Game.objects.create()
+        Game.objects.create(is_archived=True)
+        response = client.get(reverse('tictactoe:game-list'))
+        assert [game.id for game in response.context['games']] == [listed.id]
+
     def test_game_list_view_empty(self, client):
         """Test game list view with no games."""
         response = client.get(reverse('tictactoe:game-list'))
@@ -43,6 +51,19 @@ class TestTemplateViews:
         assert response.status_code == 200
         assert 'tictactoe/game_list.html' in [t.name for t in response.templates]
 
+    def test_initial_state_matches_api_shape(self, client):
+        """Test the embedded state has the API's fields and values."""
+        from tictactoe.serializers import GameSerializer
+
+        game = Game.objects.create(move_time_limit=30)
+        game.make_move(0)
+        state = client.get(reverse('tictactoe:game-detail', args=[game.id])).context['initial_state']
+        api = GameSerializer(game).data
+        assert list(state) == list(api)
+        assert {key: state[key] for key in api if not key.endswith(('_at', '_deadline'))} == {
+            key: value for key, value in api.items() if not key.endswith(('_at', '_deadline'))
+        }
+
     def test_game_detail_template_used(self, client):
         """Test correct template is used for game detail."""
         game = Game.objects.create()
@@ -61,3 +82,67 @@ class TestTemplateViews:
         # Newer games should appear first
         assert games[0].id == game2.id
         assert games[1].id == game1.id
+
+    def test_game_detail_embeds_initial_state(self, client):
+        """Test the detail page embeds the API game state for game.js."""
+        game = Game.objects.create()
+        game.make_move(4)
+
+        response = client.get(reverse('tictactoe:game-detail', args=[game.id]))
+        content = response.content.decode()
+        assert 'id="game-initial-state"' in content
+        assert response.context['initial_state']['board'][4] == 'X'
+        assert response.context['initial_state']['current_player'] == 'O'
+
+
+@pytest.mark.django_db
+class TestFragmentCache:
+    """Test suite for opt-in template fragment caching."""
+
+    @pytest.fixture(autouse=True)
+    def enable_fragment_cache(self, settings):
+        settings.TICTACTOE_TEMPLATE_CACHE_TIMEOUT = 60
+        cache.clear()
+
+    def test_game_list_served_from_cache(self, client, django_assert_num_queries):
+        """Test a warm game list renders without touching the database."""
+        Game.objects.create()
+        url = reverse('tictactoe:game-list')
+        client.get(url)
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.status_code == 200
+
+    def test_game_list_invalidated_by_save(self, client):
+        """Test saving a game invalidates the cached list."""
+        url = reverse('tictactoe:game-list')
+        client.get(url)
+        game = Game.objects.create()
+        response = client.get(url)
+        assert f'#{game.id}' in response.content.decode()
+
+    def test_game_list_invalidated_by_delete(self, client):
+        """Test deleting a game invalidates the cached list."""
+        game = Game.objects.create()
+        url = reverse('tictactoe:game-list')
+        client.get(url)
+        game.delete()
+        response = client.get(url)
+        assert f'#{game.id}' not in response.content.decode()
+
+    def test_game_detail_renders_current_board(self, client):
+        """Test the game page is rendered fresh after a move."""
+        game = Game.objects.create()
+        url = reverse('tictactoe:game-detail', args=[game.id])
+        assert 'mark-X' not in client.get(url).content.decode()
+
+        game.make_move(4)
+        assert 'mark-X' in client.get(url).content.decode()
+
+    def test_version_increments_on_save(self):
+        """Test every save bumps the game version."""
+        game = Game.objects.create()
+        assert game.version == 1
+        game.make_move(0)
+        game.refresh_from_db()
+        assert game.version == 2
@@ -0,0 +1,270 @@
+"""
+Token-bucket throttles that shed load before any database work.
+
+``ClientRateThrottle`` keeps one bucket per client (user, or address for
+anonymous clients) and ``GameRateThrottle`` one per game, for each action
+with a rate in ``TICTACTOE_THROTTLE_RATES`` or
+``TICTACTOE_GAME_THROTTLE_RATES``::
+
+    TICTACTOE_THROTTLE_RATES = {'create': '20/min', 'move': '120/min'}
+    TICTACTOE_GAME_THROTTLE_RATES = {'move': '60/min'}
+
+A rate of ``N/period`` allows bursts of N requests, refilled evenly over
+the period. Throttles run in ``APIView.initial``, before the handler, so a
+rejected request costs no query or serializer work and gets 429 with a
+``Retry-After`` header.
+
+Buckets live in process memory, so checking one is a dict lookup and some
+arithmetic rather than a cache round trip. Every
+``TICTACTOE_THROTTLE_SYNC_INTERVAL`` seconds a process adds the tokens it
+took to a per-bucket counter in the cache and drains its own buckets by
+what the other processes took, so the limits hold across workers to
+within one interval.
+
+Buckets that have refilled completely are dropped every minute, whether or
+not the cache sync is on, and at most ``TICTACTOE_THROTTLE_MAX_BUCKETS``
+are kept: past that the oldest are dropped, and their clients start again
+with a full bucket.
+"""
+import itertools
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.throttling import BaseThrottle
+
+from .cache import get_cache
+from .conf import get_setting
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """Parse ``'N/period'`` (period s, sec, m, min, h, hour, d or day) into (N, seconds)."""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*([smhd])[a-z]*\s*', rate)
+    if match is None or int(match[1]) < 1:
+        raise ValueError(f"Invalid throttle rate: {rate!r}")
+    return int(match[1]), float(PERIODS[match[2]])
+
+
+class Bucket:
+    """Tokens left in one bucket, and its bookkeeping for cache sync."""
+
+    __slots__ = ('capacity', 'period', 'tokens', 'updated', 'pending', 'seen')
+
+    def __init__(self, capacity: int, period: float, now: float):
+        self.capacity = capacity
+        self.period = period
+        self.tokens = float(capacity)
+        self.updated = now
+        # Tokens taken here since the last sync, and the shared counter then
+        # (None until the first sync sets a baseline)
+        self.pending = 0
+        self.seen = None
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.capacity / self.period)
+            self.updated = now
+
+
+class TokenBuckets:
+    """Process-local token buckets, optionally synced through the cache."""
+
+    key_prefix = 'tictactoe:throttle:'
+    prune_interval = 60.0
+
+    def __init__(self):
+        self._buckets: Dict[str, Bucket] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_sync = self._last_prune = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def take(self, key: str, capacity: int, period: float, now: Optional[float] = None) -> float:
+        """Take a token from ``key``; return 0 if allowed, else seconds until one is free."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = Bucket(capacity, period, now)
+            else:
+                bucket.refill(now)
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                bucket.pending += 1
+                return 0.0
+            return (1 - bucket.tokens) * period / capacity
+
+    def maybe_prune(self, max_buckets: int, synced: bool = True, now: Optional[float] = None) -> None:
+        """Prune once a ``prune_interval`` has passed, or at once past ``max_buckets``."""
+        now = time.monotonic() if now is None else now
+        if len(self._buckets) < max_buckets and now - self._last_prune < self.prune_interval:
+            return
+        self.prune(max_buckets, synced, now)
+
+    def prune(self, max_buckets: Optional[int] = None, synced: bool = True,
+              now: Optional[float] = None) -> None:
+        """
+        Drop buckets that have refilled and, if ``synced``, have nothing
+        left to sync. If more than ``max_buckets`` remain, drop the oldest
+        down to 90% of it, so that a flood of new keys does not prune on
+        every request.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._last_prune = now
+            for key, bucket in list(self._buckets.items()):
+                if not (synced and bucket.pending):
+                    bucket.refill(now)
+                    if bucket.tokens >= bucket.capacity:
+                        del self._buckets[key]
+            if max_buckets is not None and len(self._buckets) >= max_buckets:
+                excess = len(self._buckets) - max_buckets * 9 // 10
+                for key in list(itertools.islice(self._buckets, excess)):
+                    del self._buckets[key]
+
+    def maybe_sync(self, interval: Optional[float], now: Optional[float] = None) -> None:
+        """Sync with the cache if ``interval`` seconds have passed, without ever waiting."""
+        now = time.monotonic() if now is None else now
+        if interval is None or now - self._last_sync < interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return  # another thread is syncing
+        try:
+            self._last_sync = now
+            self.sync(now)
+        finally:
+            self._sync_lock.release()
+
+    def sync(self, now: Optional[float] = None) -> None:
+        """
+        Publish the tokens taken here and drain what other processes took.
+
+        Buckets that have refilled completely and have nothing to publish
+        are dropped, which keeps memory bounded by recently active clients.
+        """
+        now = time.monotonic() if now is None else now
+        cache = get_cache()
+        with self._lock:
+            pushes = {}
+            for key, bucket in list(self._buckets.items()):
+                bucket.refill(now)
+                if bucket.pending:
+                    pushes[key] = (bucket.pending, bucket.period)
+                    bucket.pending = 0
+                elif bucket.tokens >= bucket.capacity:
+                    del self._buckets[key]
+            idle = [key for key in self._buckets if key not in pushes]
+
+        # Cache round trips happen outside the lock
+        totals = {}
+        for key, (pending, period) in pushes.items():
+            cache_key = self.key_prefix + key
+            cache.add(cache_key, 0, int(period * 2) + 1)
+            try:
+                totals[key] = (cache.incr(cache_key, pending), pending)
+            except ValueError:  # expired between add and incr
+                cache.set(cache_key, pending, int(period * 2) + 1)
+                totals[key] = (pending, pending)
+        if idle:
+            found = cache.get_many([self.key_prefix + key for key in idle])
+            for key in idle:
+                total = found.get(self.key_prefix + key)
+                if total is not None:
+                    totals[key] = (total, 0)
+
+        with self._lock:
+            for key, (total, pushed) in totals.items():
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                # Growth of the shared counter beyond our own push was taken
+                # by other processes. A counter that expired and restarted
+                # looks like negative growth, which is ignored.
+                others = 0 if bucket.seen is None else total - bucket.seen - pushed
+                if others > 0:
+                    bucket.tokens = max(0.0, bucket.tokens - others)
+                bucket.seen = total
+
+
+buckets = TokenBuckets()
+
+
+@receiver(setting_changed)
+def _reset_buckets(setting, **kwargs):
+    if 'THROTTLE' in setting and setting.startswith('TICTACTOE_'):
+        buckets.clear()
+
+
+class BucketThrottle(BaseThrottle):
+    """
+    Base class for the token-bucket throttles.
+
+    Subclasses name the setting holding their per-action rates and say
+    which identity a request is counted against.
+    """
+
+    rates_setting = None
+    scope = None
+
+    def get_bucket_ident(self, request, view) -> Optional[str]:
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        rate = get_setting(self.rates_setting).get(getattr(view, 'action', None))
+        if rate is None:
+            return True
+        ident = self.get_bucket_ident(request, view)
+        if ident is None:
+            return True
+        capacity, period = parse_rate(rate)
+        interval = get_setting('THROTTLE_SYNC_INTERVAL')
+        buckets.maybe_sync(interval)
+        buckets.maybe_prune(get_setting('THROTTLE_MAX_BUCKETS'), synced=interval is not None)
+        key = f'{self.scope}:{getattr(view, "basename", "")}:{view.action}:{ident}'
+        wait = buckets.take(key, capacity, period)
+        if wait:
+            self.retry_after = wait
+            return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class ClientRateThrottle(BucketThrottle):
+    """One bucket per user, or per client address for anonymous requests."""
+
+    rates_setting = 'THROTTLE_RATES'
+    scope = 'client'
+
+    def get_bucket_ident(self, request, view):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'addr:{self.get_ident(request)}'
+
+
+class GameRateThrottle(BucketThrottle):
+    """One bucket per game, for detail actions such as ``move``."""
+
+    rates_setting = 'GAME_THROTTLE_RATES'
+    scope = 'game'
+
+    def get_bucket_ident(self, request, view):
+        lookup = getattr(view, 'lookup_url_kwarg', None) or getattr(view, 'lookup_field', 'pk')
+        return view.kwargs.get(lookup)
@@ -0,0 +1,163 @@
+"""
+Round-robin tournaments between bot strategies.
+
+Games are played entirely in memory with ``Game.apply_move`` across a
+``ProcessPoolExecutor``; only the final positions are written back, in
+batched ``bulk_create`` calls.
+"""
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import permutations
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.utils.module_loading import import_string
+
+from .cache import bump_list_version
+from .models import Game
+
+DEFAULT_STRATEGIES = [
+    'tictactoe.strategies.random_strategy',
+    'tictactoe.strategies.minimax_strategy',
+]
+
+# (board, status, current_player, history) of a finished game
+FinalPosition = Tuple[List, str, str, int]
+
+
+@dataclass
+class PairingResult:
+    """Outcome of all games between one X strategy and one O strategy."""
+
+    strategy_x: str
+    strategy_o: str
+    games: int = 0
+    x_wins: int = 0
+    o_wins: int = 0
+    draws: int = 0
+    positions: List[FinalPosition] = field(default_factory=list, repr=False)
+
+    def add(self, other: 'PairingResult') -> None:
+        self.games += other.games
+        self.x_wins += other.x_wins
+        self.o_wins += other.o_wins
+        self.draws += other.draws
+
+
+@dataclass
+class TournamentResult:
+    pairings: Dict[Tuple[str, str], PairingResult]
+    games: int
+    elapsed: float
+    workers: int
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def games_per_second_per_core(self) -> float:
+        return self.games_per_second / self.workers
+
+
+def play_game(strategy_x: Callable, strategy_o: Callable) -> Game:
+    """Play one unsaved game to completion and return it."""
+    game = Game()
+    while game.status == Game.STATUS_IN_PROGRESS:
+        strategy = strategy_x if game.current_player == Game.PLAYER_X else strategy_o
+        game.apply_move(strategy(game.board, game.current_player))
+    return game
+
+
+def play_pairing(strategy_x: str, strategy_o: str, games: int, seed: Optional[int],
+                 keep_positions: bool = True) -> PairingResult:
+    """Play ``games`` games between two strategies given by dotted path."""
+    if seed is not None:
+        random.seed(seed)
+    play_x = import_string(strategy_x)
+    play_o = import_string(strategy_o)
+
+    result = PairingResult(strategy_x, strategy_o)
+    for _ in range(games):
+        game = play_game(play_x, play_o)
+        result.games += 1
+        if game.status == Game.STATUS_X_WINS:
+            result.x_wins += 1
+        elif game.status == Game.STATUS_O_WINS:
+            result.o_wins += 1
+        else:
+            result.draws += 1
+        if keep_positions:
+            result.positions.append((game.board, game.status, game.current_player, game.history))
+    return result
+
+
+def _init_worker() -> None:
+    # Worker processes started with "spawn" need their own app registry.
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+
+
+def schedule(strategies: List[str], games: int, chunk_size: int,
+             seed: Optional[int]) -> Iterable[Tuple]:
+    """Split every ordered pairing into tasks of at most ``chunk_size`` games."""
+    task = 0
+    for strategy_x, strategy_o in permutations(strategies, 2):
+        for start in range(0, games, chunk_size):
+            chunk_seed = None if seed is None else seed + task
+            yield strategy_x, strategy_o, min(chunk_size, games - start), chunk_seed
+            task += 1
+
+
+def run_tournament(strategies: List[str], games: int, workers: Optional[int] = None,
+                   chunk_size: int = 500, seed: Optional[int] = None, save: bool = True,
+                   batch_size: int = 1000) -> TournamentResult:
+    """
+    Play a round robin in which every strategy plays every other as X and as O.
+
+    With ``workers=1`` games are played in the current process.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = list(schedule(strategies, games, chunk_size, seed))
+    pairings = {
+        (x, o): PairingResult(x, o) for x, o in permutations(strategies, 2)
+    }
+    pending_rows: List[Game] = []
+
+    def collect(chunk: PairingResult) -> None:
+        pairings[(chunk.strategy_x, chunk.strategy_o)].add(chunk)
+        if not save:
+            return
+        pending_rows.extend(
+            Game(board=board, status=status, current_player=player, history=history, version=1)
+            for board, status, player, history in chunk.positions
+        )
+        while len(pending_rows) >= batch_size:
+            Game.objects.bulk_create(pending_rows[:batch_size])
+            del pending_rows[:batch_size]
+
+    start = time.perf_counter()
+    if workers == 1:
+        for task in tasks:
+            collect(play_pairing(*task, keep_positions=save))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(play_pairing, *task, keep_positions=save) for task in tasks]
+            for future in as_completed(futures):
+                collect(future.result())
+    if pending_rows:
+        Game.objects.bulk_create(pending_rows)
+    if save:
+        bump_list_version()
+    elapsed = time.perf_counter() - start
+
+    return TournamentResult(
+        pairings=pairings,
+        games=sum(result.games for result in pairings.values()),
+        elapsed=elapsed,
+        workers=workers,
+    )
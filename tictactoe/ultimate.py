@@ -0,0 +1,132 @@
+"""
+Bitboard engine for ultimate tic-tac-toe.
+
+The 81 cells are bits of two integers, one per player: sub-board ``b``
+(0-8, row by row) owns bits ``9*b .. 9*b + 8`` and cell ``p`` of it is bit
+``9*b + p``. Decided sub-boards are three 9-bit masks (won by X, won by O,
+drawn), which together form the meta-board.
+
+A move in cell ``p`` sends the opponent to sub-board ``p``; if that board
+is already decided they may play in any open board. Every question the
+rules ask is answered with a few shifts and masks plus lookups in tables
+built once at import, so ``legal_mask`` and ``play`` cost the same on an
+empty board as on a nearly full one.
+
+This module has no Django dependencies; ``UltimateGame`` stores a
+``State`` in its fields.
+"""
+from typing import Iterator, NamedTuple, Optional
+
+CELLS = 81
+SUB_CELLS = 9
+SUB_MASK = (1 << SUB_CELLS) - 1
+FULL_MASK = (1 << CELLS) - 1
+ANY_BOARD = -1
+
+PLAYER_X, PLAYER_O = 0, 1
+
+LINES = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),
+    (0, 4, 8), (2, 4, 6),
+)
+LINE_MASKS = tuple(sum(1 << cell for cell in line) for line in LINES)
+
+# WINS[m]: does the 9-bit mask m contain a complete line?
+WINS = tuple(any(m & line == line for line in LINE_MASKS) for m in range(1 << SUB_CELLS))
+
+# BOARD_MASKS[b]: the 81-bit mask of sub-board b's cells
+BOARD_MASKS = tuple(SUB_MASK << (SUB_CELLS * board) for board in range(SUB_CELLS))
+
+# OPEN_CELLS[d]: cells of every sub-board not in the decided-board mask d
+OPEN_CELLS = tuple(
+    sum(BOARD_MASKS[board] for board in range(SUB_CELLS) if not decided >> board & 1)
+    for decided in range(1 << SUB_CELLS)
+)
+
+
+class State(NamedTuple):
+    """An immutable ultimate tic-tac-toe position."""
+
+    x: int = 0
+    o: int = 0
+    meta_x: int = 0
+    meta_o: int = 0
+    meta_draw: int = 0
+    forced: int = ANY_BOARD
+    player: int = PLAYER_X
+
+    @property
+    def decided(self) -> int:
+        return self.meta_x | self.meta_o | self.meta_draw
+
+    @property
+    def winner(self) -> Optional[int]:
+        if WINS[self.meta_x]:
+            return PLAYER_X
+        if WINS[self.meta_o]:
+            return PLAYER_O
+        return None
+
+    @property
+    def is_over(self) -> bool:
+        return self.winner is not None or self.decided == SUB_MASK
+
+
+def legal_mask(state: State) -> int:
+    """Return the 81-bit mask of cells the player to move may play."""
+    if state.is_over:
+        return 0
+    empty = FULL_MASK & ~(state.x | state.o)
+    if state.forced == ANY_BOARD:
+        return empty & OPEN_CELLS[state.decided]
+    return empty & BOARD_MASKS[state.forced]
+
+
+def iter_cells(mask: int) -> Iterator[int]:
+    """Yield the indices of the set bits of ``mask``, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def cell_index(board: int, position: int) -> int:
+    return board * SUB_CELLS + position
+
+
+def play(state: State, cell: int) -> State:
+    """Return the position after the player to move plays ``cell`` (0-80)."""
+    bit = 1 << cell
+    if not 0 <= cell < CELLS or not legal_mask(state) & bit:
+        raise ValueError(f"Illegal move in cell {cell}")
+    board, position = divmod(cell, SUB_CELLS)
+    shift = board * SUB_CELLS
+
+    x, o = state.x, state.o
+    meta_x, meta_o, meta_draw = state.meta_x, state.meta_o, state.meta_draw
+    if state.player == PLAYER_X:
+        x |= bit
+        if WINS[(x >> shift) & SUB_MASK]:
+            meta_x |= 1 << board
+    else:
+        o |= bit
+        if WINS[(o >> shift) & SUB_MASK]:
+            meta_o |= 1 << board
+    board_bit = 1 << board
+    if not (meta_x | meta_o) & board_bit and ((x | o) >> shift) & SUB_MASK == SUB_MASK:
+        meta_draw |= board_bit
+
+    decided = meta_x | meta_o | meta_draw
+    forced = ANY_BOARD if decided >> position & 1 else position
+    return State(x, o, meta_x, meta_o, meta_draw, forced, state.player ^ 1)
+
+
+def perft(state: State, depth: int) -> int:
+    """Count the move sequences of length ``depth`` from ``state``."""
+    if depth == 0:
+        return 1
+    mask = legal_mask(state)
+    if depth == 1:
+        return bin(mask).count('1')
+    return sum(perft(play(state, cell), depth - 1) for cell in iter_cells(mask))
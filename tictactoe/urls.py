@@ -1,17 +1,12 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from . import views
+from . import html_urls
 
 app_name = 'tictactoe'
 
-router = DefaultRouter()
-router.register(r'games', views.GameViewSet, basename='game')
-
 urlpatterns = [
     # API URLs
-    path('api/', include(router.urls)),
+    path('api/', include('tictactoe.api_urls')),
 
     # Frontend URLs
-    path('', views.game_list, name='game-list'),
-    path('game/<int:pk>/', views.game_detail, name='game-detail'),
+    *html_urls.urlpatterns,
 ]
@@ -1,84 +1,175 @@
-from rest_framework import viewsets, status
-from rest_framework.decorators import action
-from rest_framework.response import Response
-from django.core.exceptions import ValidationError as DjangoValidationError
+"""
+Template views.
+
+The REST API viewsets live in ``tictactoe.api``; they are still reachable
+as ``tictactoe.views.GameViewSet`` etc., but only imported (together with
+Django REST framework) on first access.
+"""
+import heapq
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404
-from .models import Game
-from .serializers import GameSerializer, MoveSerializer, GameDetailSerializer
+from django.utils.functional import SimpleLazyObject
+from .cache import fragment_cache_enabled, get_list_version
+from .conf import get_setting
+from .hotstore import current_game, with_hot_copies
+from .models import Game, PlayerStats
+from .routers import replica_reads
+from .sharding import get_game, recent_games, shard_aliases
 
+API_VIEWSETS = ('GameViewSet', 'MatchmakingViewSet', 'PlayerViewSet')
 
-def game_list(request):
-    """Display list of all games."""
-    games = Game.objects.all()
-    return render(request, 'tictactoe/game_list.html', {'games': games})
-
-
-def game_detail(request, pk):
-    """Display single game for playing."""
-    game = get_object_or_404(Game, pk=pk)
-    return render(request, 'tictactoe/game_detail.html', {'game': game})
+RECENT_GAMES_LIMIT = 10
 
 
-class GameViewSet(viewsets.ModelViewSet):
+class PlayerGames:
+    """
+    The games a player took part in, as the union of two querysets.
+
+    ``Q(player_x=...) | Q(player_o=...)`` is planned as an OR of two index
+    scans followed by a sort of every matching row. Here each side stays
+    its own queryset, read in order along its ``(player, -created_at)``
+    index and limited to the slice asked for, and the two streams are
+    merged, so a page reads at most twice its size whatever the player's
+    history. The merge happens in Python because SQLite does not allow
+    ORDER BY or LIMIT inside the parts of a compound SELECT.
+
+    Supports the ``order_by``, ``filter``, ``select_related`` and slicing
+    used by ``CursorPagination`` and the profile page.
     """
-    ViewSet for Game model.
 
-    Provides CRUD operations plus custom 'move' action.
+    def __init__(self, sides, ordering=('-created_at', '-id')):
+        self.sides = sides
+        self.ordering = tuple(ordering)
+
+    def _apply(self, method, *args, **kwargs):
+        return PlayerGames(
+            [getattr(side, method)(*args, **kwargs) for side in self.sides], self.ordering
+        )
+
+    def filter(self, *args, **kwargs):
+        return self._apply('filter', *args, **kwargs)
+
+    def select_related(self, *fields):
+        return self._apply('select_related', *fields)
+
+    def order_by(self, *ordering):
+        if len({field.startswith('-') for field in ordering}) != 1:
+            raise ValueError("All PlayerGames ordering fields must share one direction")
+        games = self._apply('order_by', *ordering)
+        games.ordering = ordering
+        return games
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.stop is None or key.step is not None:
+            raise TypeError("PlayerGames only supports bounded slices")
+        start = key.start or 0
+        fields = [field.lstrip('-') for field in self.ordering]
+        streams = [
+            side.order_by(*self.ordering)[:key.stop].iterator(chunk_size=key.stop)
+            for side in self.sides
+        ]
+        merged = heapq.merge(
+            *streams,
+            key=lambda game: tuple(getattr(game, field) for field in fields),
+            reverse=self.ordering[0].startswith('-'),
+        )
+        # A game the player played against themselves comes from both sides
+        seen = set()
+        unique = (game for game in merged if not (game.pk in seen or seen.add(game.pk)))
+        return list(itertools.islice(unique, start, key.stop))
+
+
+def player_games(player) -> PlayerGames:
+    """Return the games ``player`` took part in, newest first (see PlayerGames)."""
+    return PlayerGames([Game.objects.filter(player_x=player), Game.objects.filter(player_o=player)])
+
+
+def get_game_or_404(public_id, queryset=None) -> Game:
+    """Load a game by public ID (from the hot store or its shard), or raise Http404."""
+    try:
+        public_id = int(public_id)
+        return current_game(public_id) or get_game(public_id, queryset)
+    except (Game.DoesNotExist, TypeError, ValueError):
+        raise Http404("No game matches the given query.")
+
+
+def fragment_cache_context() -> dict:
+    """Template context controlling fragment caching (see tictactoe.cache)."""
+    if not fragment_cache_enabled():
+        return {'cache_timeout': None}
+    return {
+        'cache_timeout': get_setting('TEMPLATE_CACHE_TIMEOUT'),
+        'cache_alias': get_setting('CACHE_ALIAS'),
+    }
+
+
+@replica_reads
+def game_list(request):
+    """Display list of unarchived games (the newest ones when sharded), as the API lists them."""
+    if shard_aliases():
+        games = recent_games(get_setting('SHARD_LIST_LIMIT'))
+    else:
+        games = Game.objects.filter(is_archived=False)
+    # Lazy, so a cached fragment still costs no query
+    context = {'games': SimpleLazyObject(lambda: with_hot_copies(games)), **fragment_cache_context()}
+    if context['cache_timeout'] is not None:
+        context['list_version'] = get_list_version()
+    return render(request, 'tictactoe/game_list.html', context)
+
+
+def game_state(game) -> dict:
     """
+    Return ``game`` in the shape of the API's GameSerializer, as plain data.
 
-    queryset = Game.objects.all()
-    serializer_class = GameSerializer
-
-    def get_serializer_class(self):
-        """Use detailed serializer for retrieve action."""
-        if self.action == 'retrieve':
-            return GameDetailSerializer
-        return GameSerializer
-
-    def create(self, request, *args, **kwargs):
-        """
-        Create a new game.
-
-        POST /api/games/
-        """
-        game = Game.objects.create()
-        serializer = self.get_serializer(game)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-
-    @action(detail=True, methods=['post'])
-    def move(self, request, pk=None):
-        """
-        Make a move in the game.
-
-        POST /api/games/{id}/move/
-        Body: {"position": 0-8}
-
-        Returns:
-            200: Move successful, returns updated game state
-            400: Invalid move (occupied, out of turn, game over)
-            404: Game not found
-        """
-        game = self.get_object()
-        serializer = MoveSerializer(data=request.data)
-
-        if not serializer.is_valid():
-            return Response(
-                {'error': serializer.errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        position = serializer.validated_data['position']
-
-        try:
-            result = game.make_move(position)
-            game_serializer = self.get_serializer(game)
-            return Response({
-                **game_serializer.data,
-                'message': result['message']
-            }, status=status.HTTP_200_OK)
-
-        except DjangoValidationError as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    Used for the page's initial state so that rendering it needs neither
+    DRF nor a serializer instance; ``json_script`` encodes the datetimes.
+    """
+    return {
+        'id': game.public_id,
+        'board': game.board,
+        'ply': game.ply,
+        'current_player': game.current_player,
+        'status': game.status,
+        'player_x': game.player_x_id,
+        'player_o': game.player_o_id,
+        'move_time_limit': game.move_time_limit,
+        'move_deadline': game.move_deadline,
+        'created_at': game.created_at,
+        'updated_at': game.updated_at,
+    }
+
+
+@replica_reads
+def game_detail(request, pk):
+    """Display single game for playing."""
+    game = get_game_or_404(pk)
+    return render(request, 'tictactoe/game_detail.html', {
+        'game': game,
+        # Same shape as the API, so game.js can start without fetching it
+        'initial_state': game_state(game),
+    })
+
+
+@replica_reads
+def player_detail(request, pk):
+    """Display a player's record and most recent games."""
+    player = get_object_or_404(
+        get_user_model().objects.select_related('tictactoe_stats'), pk=pk
+    )
+    games = player_games(player).select_related('player_x', 'player_o')[:RECENT_GAMES_LIMIT]
+    return render(request, 'tictactoe/player_detail.html', {
+        'player': player,
+        'stats': PlayerStats.for_user(player),
+        'games': games,
+    })
+
+
+def __getattr__(name):
+    # Backwards compatibility for imports from before the API moved to tictactoe.api
+    if name in API_VIEWSETS:
+        from . import api
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")